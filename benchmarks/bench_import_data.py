@@ -0,0 +1,76 @@
+"""
+Compare the csv ingestion of `_import_data` with the string-based approach
+that it replaced.
+
+Usage: python benchmarks/bench_import_data.py [--years 150] [--repeat 5]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import pandas as pd
+
+from hotspell.utils import _import_data
+from synthetic import write_station
+
+
+def string_import_data(filename, var):
+    """The previous implementation, which concatenated the dates as strings."""
+    df = pd.read_csv(filename, header=None, index_col=None)
+    if var == "tmax":
+        df = df.drop(columns=[3])
+    elif var == "tmin":
+        df = df.drop(columns=[4])
+    df.columns = ["year", "month", "day", "var"]
+    df["date"] = (
+        df["year"].astype(str)
+        + df["month"].astype(str).str.zfill(2)
+        + df["day"].astype(str).str.zfill(2)
+    )
+    df = df[["date", "var"]]
+    df["date"] = pd.to_datetime(df["date"], format="%Y%m%d")
+    df.set_index("date", inplace=True)
+    df.index.names = ["index"]
+    return df
+
+
+def measure(func, filename, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(filename, "tmax")
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func(filename, "tmax")
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as folder:
+        filename = os.path.join(folder, "station.csv")
+        write_station(filename, args.years)
+
+        pd.testing.assert_frame_equal(
+            string_import_data(filename, "tmax"), _import_data(filename, "tmax")
+        )
+        for name, func in [
+            ("string", string_import_data),
+            ("arithmetic", _import_data),
+        ]:
+            seconds, peak = measure(func, filename, args.repeat)
+            print(f"{name:>10}: {seconds * 1000:8.1f} ms, peak {peak / 2**20:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
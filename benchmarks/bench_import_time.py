@@ -0,0 +1,142 @@
+"""
+Time the import of hotspell in fresh interpreters.
+
+Short-lived processes, such as the worker processes of `get_heatwaves_many`
+and command line invocations, pay the import time of hotspell every time.
+Each statement is timed in a new interpreter, so modules imported by a
+previous run are not cached, and the best time of `--repeat` runs is
+reported, along with the peak memory of the interpreter. On Linux the peak
+memory of a new interpreter starts from that of this script, which is why
+this script does not import NumPy or pandas itself. With `--max-ms`, the
+script fails if `import hotspell` takes longer, so it can be used to catch
+regressions. With `--details`, the slowest modules imported by each
+statement are listed, as reported by `python -X importtime`.
+
+The results are written as JSON, which can be compared with the output of
+another commit using benchmarks/compare.py.
+
+Usage: python benchmarks/bench_import_time.py [--repeat 5] [--max-ms 50]
+       [--details] [--output import_results.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from importlib.metadata import PackageNotFoundError, version
+
+STATEMENTS = [
+    "import hotspell",
+    "from hotspell import index",
+    "from hotspell import get_heatwaves",
+    "import hotspell.grid",
+]
+
+# Run in the new interpreter: time the statement and report the peak memory
+TIMER = """
+import resource, sys, time
+start = time.perf_counter()
+exec(sys.argv[1])
+seconds = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(seconds, peak * (1 if sys.platform == "darwin" else 1024))
+"""
+
+
+def time_statement(statement, repeat):
+    """Time a statement in new interpreters."""
+    timings = []
+    for _ in range(repeat):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER, statement],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.split()
+        timings.append(float(output[0]))
+        peak = int(output[1])
+    return {"seconds": min(timings), "peak_mib": peak / 2**20}
+
+
+def slowest_modules(statement, count=10):
+    """List the modules with the longest cumulative import time."""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stderr
+    modules = []
+    for line in stderr.splitlines()[1:]:
+        _, cumulative, name = line.split("|")
+        modules.append((int(cumulative), name.strip()))
+    return sorted(modules, reverse=True)[:count]
+
+
+def environment():
+    """Describe the environment, like bench_pipeline.py, without imports."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    packages = {}
+    for package in ["numpy", "pandas"]:
+        try:
+            packages[package] = version(package)
+        except PackageNotFoundError:
+            packages[package] = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        **packages,
+        "machine": platform.machine(),
+        "processors": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--statements", nargs="+", default=STATEMENTS)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float)
+    parser.add_argument("--details", action="store_true")
+    parser.add_argument("--output", default="import_results.json")
+    args = parser.parse_args()
+
+    results = []
+    for statement in args.statements:
+        result = time_statement(statement, args.repeat)
+        result.update(benchmark="import_time", stage=statement)
+        print(
+            f"{statement:>40}: {result['seconds'] * 1000:8.1f} ms, "
+            f"peak {result['peak_mib']:6.1f} MiB"
+        )
+        if args.details:
+            for cumulative, name in slowest_modules(statement):
+                print(f"{'':>42}{cumulative / 1000:8.1f} ms {name}")
+        results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+    if args.max_ms is not None:
+        seconds = time_statement("import hotspell", args.repeat)["seconds"]
+        if seconds * 1000 > args.max_ms:
+            sys.exit(
+                f"import hotspell took {seconds * 1000:.1f} ms "
+                f"(more than {args.max_ms} ms)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+"""
+Time each stage of the `get_heatwaves` pipeline on synthetic station data.
+
+For every record length, hemisphere and index, the stages (csv import, daily
+thresholds, adding the thresholds to the data, heat wave detection and
+annual metrics) are timed separately, along with `get_heatwaves` as a whole.
+Batches of stations are timed with `get_heatwaves_many`. The best time of
+`--repeat` runs and the peak memory allocated by Python (measured in a
+separate run with tracemalloc) are reported. For batches processed by worker
+processes the peak memory refers to the main process only.
+
+The results are written as JSON, which can be compared with the output of
+another commit using benchmarks/compare.py.
+
+Usage: python benchmarks/bench_pipeline.py [--years 1 30 100 150]
+       [--stations 1 10 100] [--jobs 1] [--repeat 3] [--output results.json]
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from hotspell.heatwaves import (
+    _add_threshold_to_timeseries,
+    _compute_daily_thresholds_many,
+    _extend_plus_minus_one_month,
+    _find_heatwaves,
+    get_heatwaves,
+    get_heatwaves_many,
+)
+from hotspell.indices import index
+from hotspell.metrics import _get_annual_metrics
+from hotspell.utils import _import_data
+from synthetic import write_station
+
+LAST_YEAR = 2020
+SUMMER_MONTHS = {"north": (6, 7, 8), "south": (12, 1, 2)}
+
+
+def measure(func, repeat):
+    """Time a function and measure the peak memory that it allocates."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    func()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        "seconds": min(timings),
+        "median_seconds": statistics.median(timings),
+        "peak_mib": peak / 2**20,
+    }
+
+
+def ref_years(years):
+    """The reference period: the first 30 years of the record at most."""
+    first_year = LAST_YEAR - years + 1
+    return (f"{first_year}-01-01", f"{first_year + min(years, 30) - 1}-12-31")
+
+
+def bench_stages(filename, years, hw_index, summer_months, repeat):
+    """Time the stages of the pipeline on the data of one station."""
+    ref = ref_years(years)
+    state = {}
+
+    def import_data():
+        state["data"] = _import_data(filename=filename, var=hw_index.var)
+        state["ref_period"] = state["data"].loc[ref[0] : ref[1]]
+
+    def thresholds():
+        # The path of get_heatwaves, which builds a quantile index of the
+        # reference period for percentile-based indices
+        (state["thresholds"],) = _compute_daily_thresholds_many(
+            timeseries_ref_period=state["ref_period"].rename(
+                columns={"var": hw_index.var}
+            ),
+            hw_indices=[hw_index],
+            summer_months=_extend_plus_minus_one_month(summer_months),
+        )
+
+    def add_thresholds():
+        state["timeseries"] = _add_threshold_to_timeseries(
+            state["data"], state["thresholds"]
+        )
+
+    def find_heatwaves():
+        state["heatwaves"] = _find_heatwaves(
+            timeseries=state["timeseries"],
+            hw_index=hw_index,
+            summer_months=summer_months,
+        )
+
+    def metrics():
+        _get_annual_metrics(
+            state["heatwaves"],
+            state["ref_period"],
+            state["timeseries"],
+            10,
+            summer_months,
+            hw_index.var,
+        )
+
+    def total():
+        get_heatwaves(
+            filename,
+            hw_index,
+            ref_years=ref,
+            summer_months=summer_months,
+            export=False,
+        )
+
+    stages = [
+        ("import", import_data),
+        ("thresholds", thresholds),
+        ("add_thresholds", add_thresholds),
+        ("find_heatwaves", find_heatwaves),
+        ("metrics", metrics),
+        ("total", total),
+    ]
+    results = []
+    for stage, func in stages:
+        result = measure(func, repeat)
+        result["stage"] = stage
+        results.append(result)
+    for result in results:
+        result["rows"] = len(state["data"])
+    return results
+
+
+def bench_batch(folder, n_stations, years, hw_index, n_jobs, repeat):
+    """Time `get_heatwaves_many` on a batch of stations."""
+    for station in range(n_stations):
+        write_station(
+            os.path.join(folder, f"station_{station:05d}.csv"),
+            years,
+            seed=station,
+            last_year=LAST_YEAR,
+        )
+
+    def batch():
+        get_heatwaves_many(
+            folder,
+            hw_index,
+            ref_years=ref_years(years),
+            summer_months=SUMMER_MONTHS["north"],
+            n_jobs=n_jobs,
+        )
+
+    result = measure(batch, repeat)
+    result["seconds_per_station"] = result["seconds"] / n_stations
+    return result
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processors": os.cpu_count(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, nargs="+", default=[1, 30, 100, 150])
+    parser.add_argument("--indices", nargs="+", default=["ctx90pct", "hot_days"])
+    parser.add_argument("--stations", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--batch-years", type=int, default=30)
+    parser.add_argument("--jobs", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for years in args.years:
+            for hemisphere, summer_months in SUMMER_MONTHS.items():
+                filename = os.path.join(folder, f"{hemisphere}_{years}.csv")
+                write_station(
+                    filename,
+                    years,
+                    seed=args.seed,
+                    hemisphere=hemisphere,
+                    last_year=LAST_YEAR,
+                )
+                for name in args.indices:
+                    stages = bench_stages(
+                        filename, years, index(name), summer_months, args.repeat
+                    )
+                    for result in stages:
+                        result.update(
+                            benchmark="stages",
+                            years=years,
+                            hemisphere=hemisphere,
+                            index=name,
+                        )
+                        print(
+                            f"{name:>10} {hemisphere:>5} {years:4d} years "
+                            f"{result['stage']:>15}: "
+                            f"{result['seconds'] * 1000:9.1f} ms, "
+                            f"peak {result['peak_mib']:7.1f} MiB"
+                        )
+                    results.extend(stages)
+
+        for n_stations in args.stations:
+            with tempfile.TemporaryDirectory(dir=folder) as batch_folder:
+                result = bench_batch(
+                    batch_folder,
+                    n_stations,
+                    args.batch_years,
+                    index(args.indices[0]),
+                    args.jobs,
+                    1 if n_stations > 100 else args.repeat,
+                )
+            result.update(
+                benchmark="batch",
+                stations=n_stations,
+                years=args.batch_years,
+                index=args.indices[0],
+                jobs=args.jobs,
+            )
+            print(
+                f"{n_stations:6d} stations: {result['seconds']:8.2f} s, "
+                f"{result['seconds_per_station'] * 1000:7.1f} ms per station"
+            )
+            results.append(result)
+
+    with open(args.output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
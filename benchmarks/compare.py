@@ -0,0 +1,44 @@
+"""
+Compare two result files of benchmarks/bench_pipeline.py.
+
+Usage: python benchmarks/compare.py baseline.json new.json
+"""
+
+import argparse
+import json
+
+KEYS = ["benchmark", "index", "hemisphere", "years", "stage", "stations", "jobs"]
+
+
+def load(filename):
+    with open(filename) as f:
+        results = json.load(f)["results"]
+    return {tuple(result.get(key) for key in KEYS): result for result in results}
+
+
+def describe(key):
+    return " ".join(str(value) for value in key if value is not None)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline")
+    parser.add_argument("new")
+    args = parser.parse_args()
+
+    baseline = load(args.baseline)
+    new = load(args.new)
+    for key, result in new.items():
+        if key not in baseline:
+            continue
+        before = baseline[key]
+        print(
+            f"{describe(key):>45}: "
+            f"{before['seconds'] * 1000:9.1f} -> {result['seconds'] * 1000:9.1f} ms "
+            f"({before['seconds'] / result['seconds']:5.2f}x), "
+            f"peak {before['peak_mib']:7.1f} -> {result['peak_mib']:7.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
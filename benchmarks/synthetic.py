@@ -0,0 +1,104 @@
+"""
+Generate synthetic weather station data in the input format of hotspell.
+
+The daily maximum temperature is a seasonal cycle plus an autocorrelated
+(AR(1)) anomaly, which produces runs of hot days like real heat waves. The
+minimum temperature follows the maximum with a noisy diurnal range. Data of
+the southern hemisphere have their seasonal cycle shifted by half a year.
+Missing days are removed from the output, both as isolated days and as
+longer gaps, as happens with station records.
+
+Usage: python benchmarks/synthetic.py output.csv [--years 30] [--seed 0]
+       [--hemisphere north] [--missing-pct 2]
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+
+def generate_station(
+    years, seed=0, hemisphere="north", missing_pct=2, last_year=2020, ar_coef=0.7
+):
+    """
+    Generate the daily data of a synthetic station.
+
+    Parameters
+    ----------
+    years : int
+        The length of the record, which ends on the 31st of December of
+        `last_year`.
+    seed : int, default 0
+    hemisphere : {"north", "south"}, default "north"
+    missing_pct : float, default 2
+        The percentage of missing days. Half of them are isolated days and
+        half are gaps of up to 30 days.
+    last_year : int, default 2020
+    ar_coef : float, default 0.7
+        The lag-1 autocorrelation of the temperature anomalies.
+
+    Returns
+    -------
+    DataFrame
+        The columns year, month, day, tmin and tmax, without missing days.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{last_year - years + 1}-01-01", f"{last_year}-12-31")
+    n_days = len(dates)
+
+    # The warmest day is around the 20th of July (or of January)
+    phase = 201 if hemisphere == "north" else 17
+    seasonal = 24 + 9 * np.cos(2 * np.pi * (dates.dayofyear.values - phase) / 365.25)
+    trend = 0.02 * (dates.year.values - dates.year[0])
+
+    innovations = rng.normal(scale=2.5 * np.sqrt(1 - ar_coef**2), size=n_days)
+    anomaly = np.empty(n_days)
+    anomaly[0] = innovations[0]
+    for day in range(1, n_days):
+        anomaly[day] = ar_coef * anomaly[day - 1] + innovations[day]
+
+    tmax = seasonal + trend + anomaly
+    tmin = tmax - rng.normal(loc=10, scale=1.5, size=n_days)
+
+    keep = rng.random(n_days) >= missing_pct / 200
+    n_gaps = int(n_days * missing_pct / 200 / 15)
+    for start in rng.integers(0, n_days, size=n_gaps):
+        keep[start : start + rng.integers(1, 31)] = False
+
+    return pd.DataFrame(
+        {
+            "year": dates.year[keep],
+            "month": dates.month[keep],
+            "day": dates.day[keep],
+            "tmin": np.round(tmin[keep], 1),
+            "tmax": np.round(tmax[keep], 1),
+        }
+    )
+
+
+def write_station(filename, years, **kwargs):
+    """Write a synthetic station (see `generate_station`) as a csv file."""
+    generate_station(years, **kwargs).to_csv(filename, header=False, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("filename")
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--hemisphere", choices=["north", "south"], default="north")
+    parser.add_argument("--missing-pct", type=float, default=2)
+    args = parser.parse_args()
+
+    write_station(
+        args.filename,
+        args.years,
+        seed=args.seed,
+        hemisphere=args.hemisphere,
+        missing_pct=args.missing_pct,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,2 +1,51 @@
-from .heatwaves import get_heatwaves
-from .indices import index
+"""
+Detect heat waves from weather station data.
+
+The public functions and classes, as well as the submodules, are imported
+when they are first accessed, so that ``import hotspell`` does not import
+NumPy and pandas until they are needed.
+"""
+
+from importlib import import_module
+
+# The submodule of each public name
+_EXPORTS = {
+    "ThresholdCache": "cache",
+    "MemoryThresholdCache": "cache",
+    "read_dataset": "export",
+    "get_heatwaves_grid": "grid",
+    "get_heatwaves": "heatwaves",
+    "get_heatwaves_indices": "heatwaves",
+    "get_heatwaves_many": "heatwaves",
+    "monitor_heatwaves": "incremental",
+    "index": "indices",
+    "get_heatwaves_long": "long_format",
+    "Profile": "profiling",
+    "QuantileIndex": "quantiles",
+    "get_heatwaves_sensitivity": "sensitivity",
+    "HeatWaveServer": "server",
+    "StationStore": "store",
+    "create_store": "store",
+    "get_heatwaves_store": "store",
+    "get_heatwaves_streaming": "streaming",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        # Submodules are also imported on first access
+        try:
+            return import_module(f".{name}", __name__)
+        except ModuleNotFoundError as error:
+            if error.name != f"{__name__}.{name}":
+                raise
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_EXPORTS[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *__all__})
@@ -0,0 +1,273 @@
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+
+# Increase when the way thresholds are computed changes, so that old cached
+# values are not used anymore
+CACHE_VERSION = 1
+DEFAULT_MAX_SIZE = 256 * 2**20
+EVICTION_INTERVAL = 64
+
+
+class _BaseThresholdCache:
+    """
+    The interface of the caches of the daily thresholds of percentile-based
+    indices.
+
+    The thresholds are stored under the keys computed by `key`. Subclasses
+    implement `load`, `save` and `evict`, and set `max_size`.
+    """
+
+    def key(self, timeseries_ref_period, hw_index, summer_months, bootstrap=False):
+        """
+        Compute the cache key of the thresholds of an index.
+
+        Parameters
+        ----------
+        timeseries_ref_period : DataFrame
+            The weather data for the reference period.
+        hw_index : HeatWaveIndex object
+        summer_months : tuple of int or None
+            The months for which thresholds are computed.
+        bootstrap : bool, default False
+            Whether the thresholds of the years of the reference period are
+            computed by bootstrap resampling.
+
+        Returns
+        -------
+        str
+        """
+        digest = hashlib.sha256()
+        digest.update(
+            timeseries_ref_period.index.values.astype("datetime64[D]").tobytes()
+        )
+        digest.update(
+            np.ascontiguousarray(timeseries_ref_period["var"].values, "float64")
+        )
+        params = (
+            CACHE_VERSION,
+            hw_index.var,
+            hw_index.pct,
+            hw_index.window_length,
+            summer_months,
+        )
+        if bootstrap:
+            params += ("bootstrap",)
+        digest.update(repr(params).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Load the thresholds stored under a key.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        ndarray or None
+            None if the key is not found in the cache.
+        """
+        raise NotImplementedError
+
+    def save(self, key, thresholds):
+        """
+        Store thresholds under a key.
+
+        Parameters
+        ----------
+        key : str
+        thresholds : ndarray
+        """
+        raise NotImplementedError
+
+    def evict(self):
+        """Remove the least recently used entries that exceed `max_size`."""
+        raise NotImplementedError
+
+
+class ThresholdCache(_BaseThresholdCache):
+    """
+    An on-disk cache of the daily thresholds of percentile-based indices.
+
+    Each entry is a .npy file named after a hash of the reference period data
+    and of the index parameters, so thresholds are reused for as long as the
+    reference period remains unchanged. Files are written atomically, which
+    makes the cache safe to share between multiple processes. When the total
+    size of the cache exceeds `max_size`, the least recently used entries are
+    removed. The size is checked periodically, so it may be exceeded by a few
+    entries.
+
+    Parameters
+    ----------
+    cache_dir : str or path object
+        The folder of the cache. It is created if it does not exist.
+    max_size : int, default 268435456
+        The maximum total size of the cache in bytes (256 MiB by default).
+    """
+
+    def __init__(self, cache_dir, max_size=DEFAULT_MAX_SIZE):
+        self.cache_dir = os.fspath(cache_dir)
+        self.max_size = max_size
+        self._writes = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def load(self, key):
+        """
+        Load the thresholds stored under a key.
+
+        Parameters
+        ----------
+        key : str
+
+        Returns
+        -------
+        ndarray or None
+            None if the key is not found in the cache.
+        """
+        path = self._path(key)
+        try:
+            thresholds = np.load(path)
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError):
+            _remove(path)
+            return None
+        return thresholds
+
+    def save(self, key, thresholds):
+        """
+        Store thresholds under a key.
+
+        Parameters
+        ----------
+        key : str
+        thresholds : ndarray
+        """
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                np.save(f, thresholds)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            _remove(tmp_path)
+            raise
+
+        self._writes += 1
+        if self._writes % EVICTION_INTERVAL == 0:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used entries that exceed `max_size`."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if not entry.name.endswith(".npy"):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for _, entry_size, path in sorted(entries):
+            if size <= self.max_size:
+                break
+            _remove(path)
+            size -= entry_size
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.npy")
+
+
+class MemoryThresholdCache(_BaseThresholdCache):
+    """
+    An in-memory cache of the daily thresholds of percentile-based indices.
+
+    It uses the same keys as ThresholdCache, but the thresholds are kept in
+    memory, which suits long-running processes (see `HeatWaveServer`). When
+    the total size of the thresholds exceeds `max_size`, the least recently
+    used entries are removed. It can be shared between threads, but not
+    between processes.
+
+    Parameters
+    ----------
+    max_size : int, default 268435456
+        The maximum total size of the cache in bytes (256 MiB by default).
+    """
+
+    def __init__(self, max_size=DEFAULT_MAX_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """The total size of the cached thresholds."""
+        return self._size
+
+    def load(self, key):
+        with self._lock:
+            thresholds = self._entries.get(key)
+            if thresholds is not None:
+                self._entries.move_to_end(key)
+        return thresholds
+
+    def save(self, key, thresholds):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous.nbytes
+            self._entries[key] = thresholds
+            self._size += thresholds.nbytes
+            self._evict()
+
+    def evict(self):
+        with self._lock:
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_size and self._entries:
+            _, thresholds = self._entries.popitem(last=False)
+            self._size -= thresholds.nbytes
+
+
+@lru_cache(maxsize=None)
+def _open_cache(cache_dir):
+    """Return a single ThresholdCache object per folder and process."""
+    return ThresholdCache(cache_dir)
+
+
+def _get_cache(cache_dir):
+    """
+    Get the cache that corresponds to the `cache_dir` argument.
+
+    Parameters
+    ----------
+    cache_dir : str, path object, ThresholdCache, MemoryThresholdCache or None
+
+    Returns
+    -------
+    ThresholdCache, MemoryThresholdCache or None
+    """
+    if cache_dir is None or isinstance(cache_dir, _BaseThresholdCache):
+        return cache_dir
+    return _open_cache(os.path.abspath(cache_dir))
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,272 @@
+"""
+The hotspell command, for detecting the heat waves of many stations.
+
+Examples
+--------
+Detect the heat waves of all the stations of a folder, using four worker
+processes, and write them to a dataset in Parquet format::
+
+    hotspell stations/ --index ctx90pct --jobs 4 --output results --format parquet
+
+Use a custom index and a long-format file with the data of all stations::
+
+    hotspell --long stations.csv --index hw95 --var tmax --pct 95 \\
+        --min-duration 3 --window-length 15 --output results
+
+Process two stations of a store created by `create_store`::
+
+    hotspell athens madrid --store stations.hss --index ctx90pct --output results
+
+The dataset can be read with `read_dataset`.
+"""
+
+import argparse
+import glob
+import os
+import time
+from functools import partial
+
+from .export import EXPORT_FORMATS
+from .heatwaves import (
+    _EXPORT_SUFFIXES,
+    _get_station_heatwaves,
+    _list_station_files,
+    _map_stations,
+    _write_to_dataset,
+)
+from .indices import _index_components, _index_from_parameters
+from .metrics import METRICS, _metric_names
+from .profiling import Profile
+from .store import StationStore, _read_station
+from .utils import _import_data, _import_long_data
+
+
+def main(argv=None):
+    """
+    Run the hotspell command.
+
+    The output of the stations is written to the dataset a few hundred
+    stations at a time and is then discarded, and stations are sent to the
+    worker processes one at a time, with at most two per worker in flight. Apart
+    from a long-format file, which is read at once, the memory used does not
+    grow with the number of stations. A dataset that already exists in the
+    output folder is replaced. A summary of the time spent in each stage is
+    printed at the end.
+
+    Parameters
+    ----------
+    argv : list of str, optional
+        The command line arguments. If None, they are read from `sys.argv`.
+
+    Returns
+    -------
+    int
+        The exit status.
+    """
+    parser = _create_parser()
+    args = parser.parse_args(argv)
+    try:
+        hw_index = _index_from_parameters(
+            args.index,
+            var=args.var,
+            pct=args.pct,
+            fixed_thres=args.fixed_thres,
+            min_duration=args.min_duration,
+            window_length=args.window_length,
+        )
+        metric_names = _metric_names(False if args.no_metrics else args.metrics)
+        if args.long is not None:
+            if args.inputs or args.store is not None:
+                raise ValueError("--long cannot be combined with other inputs.")
+        elif args.store is None and not args.inputs:
+            raise ValueError("Either input files, --long or --store is required.")
+    except ValueError as error:
+        parser.error(str(error))
+
+    profile = Profile(memory=args.memory)
+    start = time.perf_counter()
+    try:
+        station_ids, stations, worker = _prepare_stations(
+            args, hw_index, metric_names, profile
+        )
+    except (OSError, ValueError) as error:
+        parser.error(str(error))
+
+    _write_to_dataset(
+        _map_stations(worker, stations, len(station_ids), args.jobs, 1),
+        station_ids,
+        args.output,
+        args.format,
+        profile=profile,
+        collect=False,
+    )
+
+    if not args.quiet:
+        seconds = time.perf_counter() - start
+        print(
+            f"{len(station_ids)} stations in {seconds:.2f} s, "
+            f"written to {args.output}"
+        )
+        print(profile.summary().to_string(float_format="{:.4f}".format))
+    return 0
+
+
+def _create_parser():
+    parser = argparse.ArgumentParser(
+        prog="hotspell",
+        description="Detect heat waves from the data of many weather stations.",
+    )
+    parser.add_argument(
+        "inputs",
+        nargs="*",
+        help=(
+            "csv files, glob patterns or folders with a csv file per station, "
+            "or station ids with --store"
+        ),
+    )
+    parser.add_argument(
+        "--long",
+        metavar="FILE",
+        help="a long-format csv file with the data of all stations",
+    )
+    parser.add_argument(
+        "--store",
+        metavar="FILE",
+        help="a store created by create_store, whose stations are all processed "
+        "unless station ids are given",
+    )
+
+    index_options = parser.add_argument_group(
+        "heat wave index",
+        "A predefined index, or a custom index named by --index and defined by "
+        "the other options.",
+    )
+    index_options.add_argument("--index", required=True)
+    index_options.add_argument("--var", choices=["tmin", "tmax"])
+    index_options.add_argument("--pct", type=float)
+    index_options.add_argument("--fixed-thres", type=float)
+    index_options.add_argument("--min-duration", type=int)
+    index_options.add_argument("--window-length", type=int)
+
+    options = parser.add_argument_group("detection")
+    options.add_argument(
+        "--ref-years",
+        nargs=2,
+        default=("1961-01-01", "1990-12-31"),
+        metavar=("START", "END"),
+    )
+    options.add_argument(
+        "--summer-months", nargs="+", type=int, default=(6, 7, 8), metavar="MONTH"
+    )
+    options.add_argument(
+        "--all-year",
+        action="store_true",
+        help="detect heat waves in all months instead of the summer months",
+    )
+    options.add_argument("--max-missing-days-pct", type=float, default=10)
+    options.add_argument("--metrics", nargs="+", choices=METRICS, default=True)
+    options.add_argument("--no-metrics", action="store_true")
+    options.add_argument("--bootstrap", action="store_true")
+    options.add_argument("--cache-dir", help="a folder where thresholds are cached")
+
+    output = parser.add_argument_group("output")
+    output.add_argument(
+        "--output",
+        required=True,
+        help="the folder of the dataset, replaced if it exists",
+    )
+    output.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+    output.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        help="the number of worker processes (0 for one per processor)",
+    )
+    output.add_argument(
+        "--memory",
+        action="store_true",
+        help="also measure the peak memory of each stage, which is slower",
+    )
+    output.add_argument("--quiet", action="store_true")
+    return parser
+
+
+def _prepare_stations(args, hw_index, metric_names, profile):
+    """
+    List the stations and create the function that processes each one.
+
+    Returns
+    -------
+    station_ids : list of str
+    stations : iterable
+        The argument of `worker` for each station.
+    worker : callable
+    """
+    options = dict(
+        hw_index=hw_index,
+        ref_years=tuple(args.ref_years),
+        summer_months=None if args.all_year else tuple(args.summer_months),
+        max_missing_days_pct=args.max_missing_days_pct,
+        metric_names=metric_names,
+        cache_dir=args.cache_dir,
+        bootstrap=args.bootstrap,
+        profile_options=dict(memory=args.memory),
+    )
+
+    if args.long is not None:
+        variables = sorted({component.var for component in _index_components(hw_index)})
+        with profile.stage("import") as record:
+            station_ids, starts, timeseries = _import_long_data(args.long, variables)
+            record["rows"] = len(timeseries)
+        stations = (
+            timeseries.iloc[start:stop] for start, stop in zip(starts[:-1], starts[1:])
+        )
+        worker = partial(_get_station_heatwaves, **options)
+    elif args.store is not None:
+        store = StationStore(args.store)
+        station_ids = args.inputs or store.station_ids
+        unknown = [station_id for station_id in station_ids if station_id not in store]
+        if unknown:
+            raise ValueError(f"Unknown stations: {', '.join(unknown)}.")
+        stations = station_ids
+        worker = partial(
+            _get_station_heatwaves,
+            load=partial(_read_station, store=store if args.jobs == 1 else store.path),
+            **options,
+        )
+    else:
+        filenames = _expand_inputs(args.inputs)
+        station_ids = [
+            os.path.splitext(os.path.basename(filename))[0] for filename in filenames
+        ]
+        if len(set(station_ids)) != len(station_ids):
+            raise ValueError("The names of the station files should be unique.")
+        stations = filenames
+        worker = partial(_get_station_heatwaves, load=_import_data, **options)
+    return list(station_ids), stations, worker
+
+
+def _expand_inputs(inputs):
+    """
+    List the station files of folders, glob patterns and files.
+
+    Parameters
+    ----------
+    inputs : list of str
+
+    Returns
+    -------
+    list of str
+    """
+    filenames = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            filenames.extend(_list_station_files(pattern))
+            continue
+        matches = sorted(glob.glob(pattern))
+        if not matches:
+            raise ValueError(f"No station files match {pattern}.")
+        filenames.extend(
+            filename for filename in matches if not filename.endswith(_EXPORT_SUFFIXES)
+        )
+    return filenames
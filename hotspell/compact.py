@@ -0,0 +1,336 @@
+import numpy as np
+import pandas as pd
+
+_INT_DTYPES = [np.dtype("int16"), np.dtype("int32")]
+
+
+class _CompactFrame:
+    """
+    A DataFrame stored as a struct of compact arrays.
+
+    The columns and the index levels are stored with the smallest dtype that
+    keeps their values: normalized dates as int32 day numbers, integers as
+    int16 or int32 and floats with one decimal (as in the output of hotspell)
+    as float32. The original dtypes are kept, so `to_frame` restores the
+    DataFrame exactly.
+
+    Parameters
+    ----------
+    index_names : list of str
+    index : list of ndarray
+        The compact arrays of the index levels.
+    names : list of str
+        The column names.
+    columns : list of ndarray
+        The compact arrays of the columns.
+    dtypes : list of dtype
+        The original dtypes of the index levels followed by those of the
+        columns.
+    keys : list of str, optional
+        The labels of a first index level (e.g. the station ids), which is
+        stored as integer codes in the first array of `index`.
+    """
+
+    __slots__ = ("index_names", "index", "names", "columns", "dtypes", "keys")
+
+    def __init__(self, index_names, index, names, columns, dtypes, keys=None):
+        self.index_names = index_names
+        self.index = index
+        self.names = names
+        self.columns = columns
+        self.dtypes = dtypes
+        self.keys = keys
+
+    @classmethod
+    def from_frame(cls, df):
+        index = [df.index.get_level_values(i) for i in range(df.index.nlevels)]
+        columns = [df[name] for name in df.columns]
+        compact_columns = [_compact_array(column.to_numpy()) for column in columns]
+
+        # An index level that repeats a column (e.g. the begin dates of the
+        # events) shares its array
+        compact_index = []
+        for level in index:
+            level = _compact_array(level.to_numpy())
+            for column in compact_columns:
+                if column.dtype == level.dtype and np.array_equal(column, level):
+                    level = column
+                    break
+            compact_index.append(level)
+
+        return cls(
+            index_names=list(df.index.names),
+            index=compact_index,
+            names=list(df.columns),
+            columns=compact_columns,
+            dtypes=[array.dtype for array in index + columns],
+        )
+
+    @classmethod
+    def concat(cls, frames, keys, name):
+        """
+        Concatenate frames with the same columns, adding a first index level.
+
+        Parameters
+        ----------
+        frames : list of _CompactFrame
+        keys : list of str
+            The label of each frame in the new index level.
+        name : str
+            The name of the new index level.
+
+        Returns
+        -------
+        _CompactFrame
+        """
+        first = frames[0]
+        if any(frame.names != first.names for frame in frames):
+            raise ValueError("The frames should have the same columns.")
+        lengths = [len(frame) for frame in frames]
+        n_levels = len(first.index)
+
+        columns = [
+            _concat_arrays(
+                [frame.columns[i] for frame in frames],
+                [frame.dtypes[n_levels + i] for frame in frames],
+            )
+            for i in range(len(first.columns))
+        ]
+        index = []
+        for i in range(n_levels):
+            shared = [
+                j
+                for j in range(len(columns))
+                if all(frame.index[i] is frame.columns[j] for frame in frames)
+            ]
+            if shared:
+                index.append(columns[shared[0]])
+            else:
+                index.append(
+                    _concat_arrays(
+                        [frame.index[i] for frame in frames],
+                        [frame.dtypes[i] for frame in frames],
+                    )
+                )
+
+        codes = np.repeat(np.arange(len(frames), dtype="int32"), lengths)
+        return cls(
+            index_names=[name, *first.index_names],
+            index=[codes, *index],
+            names=first.names,
+            columns=columns,
+            dtypes=[codes.dtype, *first.dtypes],
+            keys=list(keys),
+        )
+
+    def __len__(self):
+        return len(self.columns[0]) if self.columns else len(self.index[0])
+
+    @property
+    def nbytes(self):
+        arrays = {id(array): array for array in self.index + self.columns}
+        return sum(array.nbytes for array in arrays.values())
+
+    def to_frame(self):
+        levels = [
+            _restore_array(array, dtype)
+            for array, dtype in zip(self.index, self.dtypes)
+        ]
+        if self.keys is not None:
+            levels[0] = pd.Index(self.keys).take(levels[0])
+
+        if len(levels) == 1:
+            index = pd.Index(levels[0], name=self.index_names[0])
+        else:
+            index = pd.MultiIndex.from_arrays(levels, names=self.index_names)
+
+        dtypes = self.dtypes[len(self.index) :]
+        return pd.DataFrame(
+            {
+                name: _restore_array(array, dtype)
+                for name, array, dtype in zip(self.names, self.columns, dtypes)
+            },
+            index=index,
+        )
+
+
+class _CompactFrameBuffer:
+    """
+    A _CompactFrame that grows by appending DataFrames.
+
+    The compact arrays have spare capacity, which doubles when it runs out,
+    so appending rows takes time proportional to their number. The frames
+    returned by `frame` are views of the rows appended so far, which later
+    appends never modify.
+    """
+
+    __slots__ = ("_template", "_sources", "_layout", "_buffers", "_size")
+
+    def __init__(self):
+        self._template = None
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, df):
+        """
+        Append the rows of a DataFrame.
+
+        Parameters
+        ----------
+        df : DataFrame
+            It should have the same columns and index as the DataFrames
+            appended before.
+        """
+        new = _CompactFrame.from_frame(df)
+        arrays = new.index + new.columns
+        if self._template is None:
+            # The index levels that share the array of a column (e.g. the
+            # begin dates of the events) keep sharing it
+            self._template = new
+            self._sources = []
+            self._layout = []
+            for array in arrays:
+                for source, other in enumerate(self._sources):
+                    if array is arrays[other]:
+                        break
+                else:
+                    source = len(self._sources)
+                    self._sources.append(len(self._layout))
+                self._layout.append(source)
+            self._buffers = [
+                np.empty(max(len(new), 16), arrays[position].dtype)
+                for position in self._sources
+            ]
+        elif new.names != self._template.names:
+            raise ValueError("The frames should have the same columns.")
+
+        size = self._size + len(new)
+        for source, position in enumerate(self._sources):
+            values = arrays[position]
+            buffer = self._buffers[source]
+            if values.dtype != buffer.dtype:
+                dtype = self._template.dtypes[position]
+                buffer = _restore_array(buffer[: self._size], dtype)
+                values = _restore_array(values, dtype)
+            if size > len(buffer) or buffer.base is not None:
+                grown = np.empty(max(2 * len(buffer), size), buffer.dtype)
+                grown[: self._size] = buffer[: self._size]
+                buffer = grown
+            buffer[self._size : size] = values
+            self._buffers[source] = buffer
+        self._size = size
+
+    def frame(self, tail=None):
+        """
+        Get the rows appended so far.
+
+        Parameters
+        ----------
+        tail : DataFrame, optional
+            Rows added at the end of the output, but not to the buffer.
+
+        Returns
+        -------
+        _CompactFrame
+        """
+        arrays = [buffer[: self._size] for buffer in self._buffers]
+        if tail is not None and len(tail) > 0:
+            tail = _CompactFrame.from_frame(tail)
+            tail_arrays = tail.index + tail.columns
+            arrays = [
+                _concat_arrays(
+                    [array, tail_arrays[position]],
+                    [self._template.dtypes[position]] * 2,
+                )
+                for array, position in zip(arrays, self._sources)
+            ]
+        arrays = [arrays[source] for source in self._layout]
+        n_levels = len(self._template.index)
+        return _CompactFrame(
+            index_names=self._template.index_names,
+            index=arrays[:n_levels],
+            names=self._template.names,
+            columns=arrays[n_levels:],
+            dtypes=self._template.dtypes,
+        )
+
+
+def _compact_array(values):
+    """
+    Find the smallest representation of an array that keeps its values.
+
+    Parameters
+    ----------
+    values : ndarray
+
+    Returns
+    -------
+    ndarray
+        Either a compact copy of `values` or `values` itself.
+    """
+    if values.dtype.kind == "M":
+        days = values.astype("datetime64[D]")
+        if not np.isnat(days).any() and np.array_equal(days, values):
+            days = days.view("int64")
+            if _fits(days, np.dtype("int32")):
+                return days.astype("int32")
+    elif values.dtype.kind in "iu":
+        for dtype in _INT_DTYPES:
+            if values.dtype.itemsize > dtype.itemsize and _fits(values, dtype):
+                return values.astype(dtype)
+    elif values.dtype == np.float64:
+        compact = values.astype("float32")
+        if np.array_equal(
+            np.round(compact.astype("float64"), 1), values, equal_nan=True
+        ):
+            return compact
+    return values
+
+
+def _concat_arrays(arrays, dtypes):
+    """
+    Concatenate compact arrays, restoring them first if their dtypes differ.
+
+    Parameters
+    ----------
+    arrays : list of ndarray
+    dtypes : list of dtype
+        The original dtype of each array.
+
+    Returns
+    -------
+    ndarray
+    """
+    if len({array.dtype for array in arrays}) == 1:
+        return np.concatenate(arrays)
+    restored = [_restore_array(array, dtype) for array, dtype in zip(arrays, dtypes)]
+    return _compact_array(np.concatenate(restored))
+
+
+def _restore_array(values, dtype):
+    """
+    Restore an array created by `_compact_array` to its original dtype.
+
+    Parameters
+    ----------
+    values : ndarray
+    dtype : dtype
+
+    Returns
+    -------
+    ndarray
+    """
+    if values.dtype == dtype:
+        return values
+    if dtype.kind == "M":
+        return values.astype("datetime64[D]").astype(dtype)
+    if dtype == np.float64 and values.dtype == np.float32:
+        return np.round(values.astype("float64"), 1)
+    return values.astype(dtype)
+
+
+def _fits(values, dtype):
+    info = np.iinfo(dtype)
+    return len(values) == 0 or (values.min() >= info.min and values.max() <= info.max)
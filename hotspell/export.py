@@ -0,0 +1,258 @@
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+EXPORT_FORMATS = {
+    "csv": ".csv",
+    "parquet": ".parquet",
+    "feather": ".feather",
+    "npz": ".npz",
+}
+DATASET_TABLES = ("events", "metrics")
+# The number of stations written to each file of a dataset
+STATIONS_PER_PART = 256
+
+
+def read_dataset(dataset_dir, table="events"):
+    """
+    Read a dataset written by `get_heatwaves_many`.
+
+    The files of a table are read in the order they were written.
+
+    Parameters
+    ----------
+    dataset_dir : str or path object
+        The folder of the dataset.
+    table : {"events", "metrics"}, default "events"
+        The table to read.
+
+    Returns
+    -------
+    DataFrame
+        The table of all stations, with the station id as the first level of
+        its index, as in the output of `get_heatwaves_many`.
+    """
+    if table not in DATASET_TABLES:
+        raise ValueError(f"table should be one of {', '.join(DATASET_TABLES)}.")
+
+    table_dir = os.path.join(dataset_dir, table)
+    parts = {}
+    for name in os.listdir(table_dir):
+        number = os.path.splitext(name)[0][len("part-") :]
+        if name.startswith("part-") and number.isdigit():
+            parts[int(number)] = name
+
+    if not parts:
+        raise ValueError(f"No parts were found in {table_dir}.")
+    return pd.concat(
+        [
+            _read_table(os.path.join(table_dir, parts[number]), table)
+            for number in sorted(parts)
+        ]
+    )
+
+
+def _check_export_format(export_format):
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"export_format should be one of {', '.join(EXPORT_FORMATS)}.")
+
+
+def _output_prefix(filename, index_name, output_dir=None):
+    """
+    Find the common part of the paths of the output files of a station.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The input file of the station.
+    index_name : str
+    output_dir : str or path object, optional
+        The folder of the output files. By default it is the folder of the
+        input file.
+
+    Returns
+    -------
+    str
+    """
+    filename = os.fspath(filename)
+    if output_dir is None:
+        output_dir = os.path.dirname(filename)
+    station = os.path.splitext(os.path.basename(filename))[0]
+    return os.path.join(output_dir, f"{station}_{index_name}_heatwaves")
+
+
+def _export_heatwaves(
+    heatwaves, filename, index_name, export_format="csv", output_dir=None
+):
+    output_file = _output_prefix(filename, index_name, output_dir) + "_events"
+    _write_table(
+        heatwaves,
+        output_file + EXPORT_FORMATS[export_format],
+        export_format,
+        index=False,
+        date_format="%d/%m/%Y",
+    )
+
+
+def _export_annual_metrics(
+    metrics, filename, index_name, export_format="csv", output_dir=None
+):
+    output_file = _output_prefix(filename, index_name, output_dir) + "_metrics"
+    _write_table(
+        metrics,
+        output_file + EXPORT_FORMATS[export_format],
+        export_format,
+        index=True,
+        date_format="%Y",
+    )
+
+
+def _clear_dataset(dataset_dir):
+    """
+    Remove the tables of a dataset, so that a new one can be written in its
+    folder without mixing in the parts of the old one.
+
+    Other files of the folder are kept.
+
+    Parameters
+    ----------
+    dataset_dir : str or path object
+    """
+    for table in DATASET_TABLES:
+        table_dir = os.path.join(dataset_dir, table)
+        if os.path.isdir(table_dir):
+            shutil.rmtree(table_dir)
+
+
+class _DatasetWriter:
+    """
+    Write the output of many stations to a dataset.
+
+    Each table of the dataset is a folder of files ("part-0.csv",
+    "part-1.csv", ...) with the rows of up to `stations_per_part` stations
+    each and the station id as their first column, so the number of files
+    does not grow with the number of stations. The dataset can also be read
+    with tools that understand datasets of many files, such as pyarrow. The
+    output of the stations is kept in memory until a file is full. An
+    existing dataset in the folder is replaced.
+
+    Parameters
+    ----------
+    dataset_dir : str or path object
+    export_format : str
+    stations_per_part : int, default 256
+    """
+
+    def __init__(self, dataset_dir, export_format, stations_per_part=STATIONS_PER_PART):
+        self.dataset_dir = os.fspath(dataset_dir)
+        self.export_format = export_format
+        self.stations_per_part = stations_per_part
+        self._station_ids = []
+        self._frames = {table: [] for table in DATASET_TABLES}
+        self._parts = 0
+        _clear_dataset(self.dataset_dir)
+
+    def add(self, station_id, events, metrics):
+        """
+        Add the output of a station, writing a file if it is full.
+
+        Parameters
+        ----------
+        station_id : str
+        events : DataFrame
+        metrics : DataFrame or None
+        """
+        self._station_ids.append(station_id)
+        self._frames["events"].append(events)
+        if metrics is not None:
+            self._frames["metrics"].append(metrics)
+        if len(self._station_ids) >= self.stations_per_part:
+            self.flush()
+
+    def flush(self):
+        """Write the stations that were added since the last file."""
+        if not self._station_ids:
+            return
+        for table, frames in self._frames.items():
+            if not frames:
+                continue
+            df = pd.concat(frames, keys=self._station_ids, names=["station"])
+            table_dir = os.path.join(self.dataset_dir, table)
+            os.makedirs(table_dir, exist_ok=True)
+            _write_table(
+                df.reset_index(level="station") if table == "events" else df,
+                os.path.join(
+                    table_dir, f"part-{self._parts}{EXPORT_FORMATS[self.export_format]}"
+                ),
+                self.export_format,
+                index=table == "metrics",
+            )
+            frames.clear()
+        self._station_ids = []
+        self._parts += 1
+
+
+def _write_table(df, path, export_format, index, date_format=None):
+    """
+    Write a DataFrame in one of the export formats.
+
+    The binary formats store the columns with their dtypes, so dates are not
+    formatted as strings. The "npz" format only needs NumPy.
+
+    Parameters
+    ----------
+    df : DataFrame
+    path : str
+    export_format : str
+    index : bool
+        If True, the index is written as the first column.
+    date_format : str, optional
+        The format of dates in csv files.
+    """
+    if export_format == "csv":
+        df.to_csv(path, index=index, date_format=date_format)
+        return
+
+    table = df.reset_index(drop=not index)
+    if export_format == "parquet":
+        table.to_parquet(path, index=False)
+    elif export_format == "feather":
+        table.to_feather(path)
+    elif export_format == "npz":
+        np.savez(path, **{str(name): _to_array(table[name]) for name in table})
+
+
+def _to_array(column):
+    values = column.to_numpy()
+    if values.dtype == object:
+        values = values.astype(str)
+    return values
+
+
+def _read_table(path, table):
+    """Read a table written by `_write_table`, restoring its index."""
+    export_format = os.path.splitext(path)[1][1:]
+    if export_format == "csv":
+        dates = ["begin_date", "end_date"] if table == "events" else False
+        df = pd.read_csv(path, parse_dates=dates, dtype={"station": str})
+    elif export_format == "parquet":
+        df = pd.read_parquet(path)
+    elif export_format == "feather":
+        df = pd.read_feather(path)
+    elif export_format == "npz":
+        with np.load(path) as npz:
+            df = pd.DataFrame({name: npz[name] for name in npz.files})
+    else:
+        raise ValueError(f"Unknown format of {path}.")
+
+    station = [df.pop("station")] if "station" in df else []
+    if table == "events":
+        index = pd.DatetimeIndex(df["begin_date"], name="index")
+    else:
+        # set_index would cast the years to int64
+        name = df.columns[0]
+        index = pd.Index(df.pop(name).values, name=name)
+    df.index = pd.MultiIndex.from_arrays([*station, index]) if station else index
+    return df
@@ -0,0 +1,338 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from .heatwaves import _extend_plus_minus_one_month
+from .indices import _check_single_variable_index
+from .metrics import METRICS, _metric_names
+from .runs import _find_runs, _run_statistics
+from .thresholds import (
+    _compute_percentile_thresholds,
+    _create_daily_windows,
+    _day_of_year,
+    _reference_array,
+    _summer_days_mask,
+)
+from .utils import _percent_of_days_to_days
+
+
+class GridHeatWaves:
+    """
+    Class designed for storing heat wave events of gridded data.
+
+    It is the holder for the output of `get_heatwaves_grid`.
+
+    Parameters
+    ----------
+    events : DataFrame
+        The heat wave events of all grid cells in long format, indexed by the
+        cell number and the begin date of each event. The columns are the same
+        as in the events of a HeatWaves object.
+    metrics : dict of ndarray or None
+        The annual metrics (see HeatWaves), as arrays of shape (number of
+        years, number of cells). Years with no heat waves and too many missing
+        days are set to NaN.
+    years : ndarray of int
+        The years that correspond to the first axis of the metrics.
+    spatial_shape : tuple of int
+        The shape of the grid. Cells are numbered in row-major order, so
+        ``metrics["hwn"].reshape(len(years), *spatial_shape)`` restores the
+        spatial dimensions.
+    """
+
+    def __init__(self, events, metrics, years, spatial_shape):
+        self.events = events
+        self.metrics = metrics
+        self.years = years
+        self.spatial_shape = spatial_shape
+
+
+def get_heatwaves_grid(
+    data,
+    hw_index,
+    dates=None,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+    chunk_size=1000,
+    var_name=None,
+):
+    """
+    Detect heat wave events from gridded data.
+
+    All cells of a chunk are processed together: thresholds, days over the
+    threshold and heat wave events are computed with array operations over
+    the cells. The grid is split into chunks of `chunk_size` cells, so the
+    memory needed is bounded by the size of a chunk (plus the input data).
+
+    Parameters
+    ----------
+    data : ndarray, str or path object
+        An array of shape (time, cells) or (time, lat, lon), or the path of a
+        netCDF file with a "time" dimension. Reading netCDF files requires
+        xarray.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    dates : array-like of datetime, optional
+        The daily dates of the time axis of `data`. Not needed for netCDF
+        files.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics. If a summer period has been
+        defined the percentage corresponds only to this period.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    chunk_size : int, default 1000
+        The number of cells processed together.
+    var_name : str, optional
+        The name of the variable in the netCDF file. By default it is the
+        variable of the index, i.e. "tmin" or "tmax".
+
+    Returns
+    -------
+    GridHeatWaves object
+    """
+    _check_single_variable_index(hw_index, "get_heatwaves_grid")
+    if isinstance(data, (str, os.PathLike)):
+        data, dates = _import_netcdf(data, var_name or hw_index.var)
+    elif dates is None:
+        raise ValueError("The dates of the time axis of the data are required.")
+
+    data = np.asanyarray(data)
+    spatial_shape = data.shape[1:]
+    data = data.reshape(len(data), -1)
+    n_cells = data.shape[1]
+
+    dates = pd.DatetimeIndex(dates).normalize()
+    if len(dates) != len(data):
+        raise ValueError("The dates do not match the time axis of the data.")
+    if not dates.is_monotonic_increasing or not dates.is_unique:
+        raise ValueError("The dates should be unique and in increasing order.")
+
+    all_dates = pd.date_range(dates[0], dates[-1], freq="D")
+    rows = all_dates.get_indexer(dates)
+    years = np.arange(all_dates.year[0], all_dates.year[-1] + 1)
+
+    metric_names = _metric_names(metrics)
+    events = []
+    if metric_names is not None:
+        annual_metrics = {
+            name: np.full((len(years), n_cells), np.nan) for name in metric_names
+        }
+    else:
+        annual_metrics = None
+
+    for start in range(0, n_cells, chunk_size):
+        stop = min(start + chunk_size, n_cells)
+        values = np.full((len(all_dates), stop - start), np.nan)
+        values[rows] = data[:, start:stop]
+
+        chunk_events = _find_grid_heatwaves(
+            values, all_dates, hw_index, ref_years, summer_months
+        )
+        if metric_names is not None:
+            _compute_grid_annual_metrics(
+                out=annual_metrics,
+                cells=slice(start, stop),
+                heatwaves=chunk_events,
+                values=values,
+                dates=all_dates,
+                years=years,
+                ref_years=ref_years,
+                max_missing_days_pct=max_missing_days_pct,
+                summer_months=summer_months,
+                var=hw_index.var,
+            )
+        chunk_events["cell"] += start
+        events.append(chunk_events)
+
+    events = pd.concat(events).set_index(["cell", "begin_date"], drop=False)
+    events = events.drop(columns="cell").rename_axis(["cell", "index"])
+
+    output = GridHeatWaves(events, annual_metrics, years, spatial_shape)
+    return output
+
+
+def _import_netcdf(filename, var_name):
+    try:
+        import xarray as xr
+    except ImportError as err:
+        raise ImportError("Reading netCDF files requires xarray.") from err
+
+    with xr.open_dataset(filename) as ds:
+        data_array = ds[var_name].transpose("time", ...)
+        return data_array.values, data_array["time"].values
+
+
+def _find_grid_heatwaves(values, dates, hw_index, ref_years, summer_months):
+    """
+    Find the heat wave events of a chunk of grid cells.
+
+    Parameters
+    ----------
+    values : ndarray
+        An array of shape (days, cells) with a row for every day of `dates`.
+    dates : DatetimeIndex
+        Consecutive days.
+    hw_index : HeatWaveIndex object
+    ref_years : tuple of str
+    summer_months : tuple of int
+
+    Returns
+    -------
+    DataFrame
+        The events in long format, with the cell of each event (counted from
+        the first cell of the chunk) in the "cell" column.
+    """
+    days_mask = _summer_days_mask(_extend_plus_minus_one_month(summer_months))
+    if hw_index.pct is not None:
+        ref_period = dates.slice_indexer(ref_years[0], ref_years[-1])
+        thresholds = _compute_percentile_thresholds(
+            ref_matrix=_reference_array(dates[ref_period], values[ref_period]),
+            window_indices=_create_daily_windows(hw_index.window_length),
+            pct=hw_index.pct,
+            days_mask=days_mask,
+        )
+    else:
+        thresholds = np.where(days_mask, hw_index.fixed_thres, np.nan)[:, np.newaxis]
+
+    if summer_months:
+        summer = dates.month.isin(_extend_plus_minus_one_month(summer_months))
+        dates, values = dates[summer], values[summer]
+
+    # Append a day that is never over the threshold to each cell, so that the
+    # runs of the flattened cells do not continue from one cell to the next
+    n_days, n_cells = values.shape
+    over = np.zeros((n_cells, n_days + 1), dtype=bool)
+    over[:, :-1] = (values > thresholds[_day_of_year(dates)]).T
+    padded_values = np.full((n_cells, n_days + 1), np.nan)
+    padded_values[:, :-1] = values.T
+
+    begins, durations = _find_runs(over.ravel())
+    keep = durations >= hw_index.min_duration
+    begins, durations = begins[keep], durations[keep]
+    avg, std, maximum = _run_statistics(padded_values.ravel(), begins, durations)
+
+    cells, positions = np.divmod(begins, n_days + 1)
+    var = hw_index.var
+    heatwaves = pd.DataFrame(
+        {
+            "cell": cells,
+            "begin_date": dates[positions],
+            "end_date": dates[positions + durations - 1],
+            "duration": durations.astype("int64"),
+            f"avg_{var}": np.round(avg, 1),
+            f"std_{var}": np.round(std, 1),
+            f"max_{var}": np.round(maximum, 1),
+        }
+    )
+    if summer_months:
+        heatwaves = heatwaves[heatwaves["begin_date"].dt.month.isin(summer_months)]
+    return heatwaves
+
+
+def _compute_grid_annual_metrics(
+    out,
+    cells,
+    heatwaves,
+    values,
+    dates,
+    years,
+    ref_years,
+    max_missing_days_pct,
+    summer_months,
+    var,
+):
+    """
+    Compute the annual metrics of a chunk of grid cells.
+
+    Parameters
+    ----------
+    out : dict of ndarray
+        The arrays of the selected metrics of the whole grid, which are filled
+        in place.
+    cells : slice
+        The cells of the chunk.
+    heatwaves : DataFrame
+        The output of `_find_grid_heatwaves`.
+    values : ndarray
+        An array of shape (days, cells).
+    dates : DatetimeIndex
+    years : ndarray of int
+    ref_years : tuple of str
+    max_missing_days_pct : int
+    summer_months : tuple of int
+    var : str
+    """
+    if summer_months:
+        summer = dates.month.isin(summer_months)
+        dates, values = dates[summer], values[summer]
+
+    ref_period = dates.slice_indexer(ref_years[0], ref_years[-1])
+    ref_period_mean = _nanmean_of_cells(values[ref_period])
+
+    grouped = heatwaves.groupby(["cell", heatwaves["begin_date"].dt.year])
+    annual_metrics = grouped.agg(
+        hwn=("duration", "count"),
+        hwf=("duration", "sum"),
+        hwd=("duration", "max"),
+        hwdm=("duration", "mean"),
+        hwma=(f"avg_{var}", "mean"),
+        hwaa=(f"max_{var}", "max"),
+    )
+    chunk_cells = annual_metrics.index.get_level_values(0).values
+    rows = annual_metrics.index.get_level_values(1).values - years[0]
+    columns = chunk_cells + cells.start
+    mean = ref_period_mean[chunk_cells]
+
+    annual_metrics["hwdm"] = annual_metrics["hwdm"].round(1)
+    annual_metrics["hwma"] = annual_metrics["hwma"].round(1)
+    annual_metrics["hwm"] = np.round(annual_metrics["hwma"] - mean, 1)
+    annual_metrics["hwa"] = np.round(annual_metrics["hwaa"] - mean, 1)
+    for name in METRICS:
+        if name in out:
+            out[name][rows, columns] = annual_metrics[name].values
+
+    year_starts = np.flatnonzero(np.diff(dates.year.values, prepend=-1))
+    missing_days = np.add.reduceat(np.isnan(values), year_starts, axis=0, dtype="int64")
+    valid = missing_days < _percent_of_days_to_days(max_missing_days_pct, summer_months)
+    rows = dates.year.values[year_starts] - years[0]
+    for name in ["hwn", "hwf"]:
+        if name not in out:
+            continue
+        chunk = out[name][rows, cells]
+        chunk[valid & np.isnan(chunk)] = 0
+        out[name][rows, cells] = chunk
+
+
+def _nanmean_of_cells(values):
+    """
+    Compute the mean of each cell (column), ignoring NaNs.
+
+    Each cell is summed as a contiguous array with the NaNs set to zero, as
+    pandas does, so that the results match the station-based metrics.
+
+    Parameters
+    ----------
+    values : ndarray
+        An array of shape (days, cells).
+
+    Returns
+    -------
+    ndarray
+        The means rounded to one decimal.
+    """
+    values = np.ascontiguousarray(values.T)
+    valid = ~np.isnan(values)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(valid, values, 0).sum(axis=1) / valid.sum(axis=1)
+    return np.round(mean, 1)
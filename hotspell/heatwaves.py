@@ -1,20 +1,48 @@
-import datetime
+import collections
+import itertools
+import math
 import os
-from operator import add, sub
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 
 import numpy as np
 import pandas as pd
-import pkg_resources
 
-from .metrics import _get_annual_metrics
+from .cache import _get_cache
+from .compact import _CompactFrame
+from .export import (
+    _check_export_format,
+    _DatasetWriter,
+    _export_annual_metrics,
+    _export_heatwaves,
+)
+from .indices import _index_components
+from .metrics import _get_annual_metrics, _metric_names
+from .profiling import _NULL_PROFILE, Profile, _get_profile
+from .quantiles import _build_quantile_indices
+from .runs import _find_runs, _run_statistics
+from .thresholds import (
+    _compute_bootstrap_thresholds,
+    _compute_percentile_thresholds,
+    _create_daily_windows,
+    _day_of_year,
+    _reference_array,
+    _reference_matrix,
+    _summer_days_mask,
+)
 from .utils import _import_data, _keep_only_summer
 
+_EXPORT_SUFFIXES = ("_heatwaves_events.csv", "_heatwaves_metrics.csv")
+
 
 class HeatWaves:
     """
     Class designed for storing heat wave events.
 
-    It is the holder for the output of `get_heatwaves`.
+    It is the holder for the output of `get_heatwaves`. The events and metrics
+    are stored as compact arrays (dates as day numbers, small integers and
+    single precision floats) and the DataFrames are created when they are
+    first accessed, so that the output of many stations can be kept in memory.
 
     Parameters
     ----------
@@ -25,6 +53,8 @@ class HeatWaves:
         It contains the summary of heat waves per year via standard metrics.
         Years with no heat waves are distinguished from years with missing
         data.
+    profile : Profile object, optional
+        The time and memory used by each stage, if profiling was enabled.
 
     Notes
     -----
@@ -49,9 +79,85 @@ class HeatWaves:
         The hottest day of hottest event per year
     """
 
-    def __init__(self, events, metrics):
+    __slots__ = ("_events", "_metrics", "_events_frame", "_metrics_frame", "profile")
+
+    def __init__(self, events, metrics, profile=None):
         self.events = events
         self.metrics = metrics
+        self.profile = profile
+
+    @property
+    def events(self):
+        if self._events_frame is None and self._events is not None:
+            self._events_frame = self._events.to_frame()
+        return self._events_frame
+
+    @events.setter
+    def events(self, events):
+        self._events = None if events is None else _CompactFrame.from_frame(events)
+        self._events_frame = None
+
+    @property
+    def metrics(self):
+        if self._metrics_frame is None and self._metrics is not None:
+            self._metrics_frame = self._metrics.to_frame()
+        return self._metrics_frame
+
+    @metrics.setter
+    def metrics(self, metrics):
+        self._metrics = None if metrics is None else _CompactFrame.from_frame(metrics)
+        self._metrics_frame = None
+
+    @property
+    def nbytes(self):
+        """The memory used by the compact arrays of events and metrics."""
+        compact = [self._events, self._metrics]
+        return sum(frame.nbytes for frame in compact if frame is not None)
+
+    @classmethod
+    def concat(cls, results, keys, name="station"):
+        """
+        Concatenate the output of multiple stations.
+
+        The compact arrays are concatenated without creating DataFrames.
+
+        Parameters
+        ----------
+        results : list of HeatWaves objects
+        keys : list of str
+            The id of each station.
+        name : str, default "station"
+            The name of the first level of the index of the output, which
+            holds the `keys`.
+
+        Returns
+        -------
+        HeatWaves object
+        """
+        output = cls(None, None)
+        output._events = _CompactFrame.concat(
+            [result._events for result in results], keys, name
+        )
+        if all(result._metrics is not None for result in results):
+            output._metrics = _CompactFrame.concat(
+                [result._metrics for result in results], keys, name
+            )
+        return output
+
+    def _to_frames(self):
+        """Create the DataFrames of events and metrics without keeping them."""
+        return tuple(
+            None if frame is None else frame.to_frame()
+            for frame in [self._events, self._metrics]
+        )
+
+    def __getstate__(self):
+        return self._events, self._metrics, self.profile
+
+    def __setstate__(self, state):
+        self._events, self._metrics, self.profile = state
+        self._events_frame = None
+        self._metrics_frame = None
 
 
 def get_heatwaves(
@@ -62,6 +168,11 @@ def get_heatwaves(
     max_missing_days_pct=10,
     export=True,
     metrics=True,
+    cache_dir=None,
+    export_format="csv",
+    output_dir=None,
+    profile=False,
+    bootstrap=False,
 ):
     """
     Detect heat wave events from weather station data.
@@ -84,112 +195,654 @@ def get_heatwaves(
         valid and be included in the metrics. If a summer period has been
         defined the percentage corresponds only to this period.
     export : bool, default True
-        If True, output is exported as csv files in the same folder as the
-        input data.
-    metrics : bool, default True
+        If True, output is exported as files named after the input file, in
+        the same folder as the input data unless `output_dir` is set.
+    metrics : bool or list of str, default True
         If True, annual metrics are computed and are exported if `export=True`.
+        A list of metric names (e.g. ["hwn", "hwf"]) computes only these
+        metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where the daily thresholds of percentile-based indices are
+        cached, so that they are not computed again for the same reference
+        period data. A ThresholdCache object can be given instead to set a
+        different size limit for the cache. If None, no cache is used.
+    export_format : {"csv", "parquet", "feather", "npz"}, default "csv"
+        The format of the exported files. Parquet and Feather files require
+        pyarrow, while npz files (one array per column) only require NumPy.
+    output_dir : str or path object, optional
+        The folder of the exported files.
+    profile : bool, callable or Profile, default False
+        If True, the wall time, the rows processed and the peak memory of each
+        stage are recorded in the `profile` attribute of the output (see
+        Profile). A callable is called with the record of each stage. A
+        Profile object accumulates the records of all the calls it is passed
+        to. If False, nothing is measured.
+    bootstrap : bool, default False
+        If True, the percentile-based thresholds of the years of the reference
+        period are computed by bootstrap resampling (Zhang et al., 2005), so
+        that heat waves are not underestimated within the reference period
+        compared to the years outside of it. Each year of the reference
+        period has its own thresholds, which are the mean of the thresholds
+        of the n - 1 reference periods where the year is replaced by one of
+        the other years.
 
     Returns
     -------
     HeatWaves object
     """
-    timeseries = _import_data(filename=filename, var=hw_index.var)
-    timeseries_ref_period = timeseries.loc[ref_years[0] : ref_years[-1]]
+    output = get_heatwaves_indices(
+        filename=filename,
+        hw_indices=[hw_index],
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        export=export,
+        metrics=metrics,
+        cache_dir=cache_dir,
+        export_format=export_format,
+        output_dir=output_dir,
+        profile=profile,
+        bootstrap=bootstrap,
+    )
+    return output[hw_index.name]
 
-    daily_windows = _create_daily_windows(hw_index.window_length)
 
-    daily_thresholds = _compute_daily_thresholds(
-        daily_windows=daily_windows,
-        timeseries_ref_period=timeseries_ref_period,
-        hw_index=hw_index,
-        summer_months=_extend_plus_minus_one_month(summer_months),
-    )
+def get_heatwaves_indices(
+    filename,
+    hw_indices,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    export=True,
+    metrics=True,
+    cache_dir=None,
+    export_format="csv",
+    output_dir=None,
+    profile=False,
+    bootstrap=False,
+):
+    """
+    Detect heat wave events from weather station data for multiple indices.
 
-    timeseries = _add_threshold_to_timeseries(timeseries, daily_thresholds)
+    The weather data are imported only once and indices that share the same
+    threshold definition (variable, percentile or absolute threshold and
+    window length) also share a single computation of the daily thresholds.
+    Compound indices over both temperature variables use the same imported
+    data.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The path of the csv file that contains the weather data. It requires
+        specific columns to be included in the csv file in a specific order.
+    hw_indices : list of HeatWaveIndex
+        HeatWaveIndex objects created using the `index` function. Their names
+        should be unique.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics. If a summer period has been
+        defined the percentage corresponds only to this period.
+    export : bool, default True
+        If True, output is exported as files named after the input file, in
+        the same folder as the input data unless `output_dir` is set.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed and are exported if `export=True`.
+        A list of metric names (e.g. ["hwn", "hwf"]) computes only these
+        metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where the daily thresholds of percentile-based indices are
+        cached, so that they are not computed again for the same reference
+        period data. A ThresholdCache object can be given instead to set a
+        different size limit for the cache. If None, no cache is used.
+    export_format : {"csv", "parquet", "feather", "npz"}, default "csv"
+        The format of the exported files (see `get_heatwaves`).
+    output_dir : str or path object, optional
+        The folder of the exported files.
+    profile : bool, callable or Profile, default False
+        Records the time and memory used by each stage (see `get_heatwaves`).
+        The same Profile object is attached to the output of all indices.
+    bootstrap : bool, default False
+        If True, the percentile-based thresholds of the years of the reference
+        period are computed by bootstrap resampling (see `get_heatwaves`).
 
-    heatwaves = _find_heatwaves(
-        timeseries=timeseries, hw_index=hw_index, summer_months=summer_months
+    Returns
+    -------
+    dict of HeatWaves objects
+        The output of each index, using the index names as keys.
+    """
+    names = [hw_index.name for hw_index in hw_indices]
+    if len(set(names)) != len(names):
+        raise ValueError("The names of the heat wave indices should be unique.")
+
+    metric_names = _metric_names(metrics)
+    _check_export_format(export_format)
+    profile = _get_profile(profile)
+    variables = sorted(
+        {
+            component.var
+            for hw_index in hw_indices
+            for component in _index_components(hw_index)
+        }
     )
+    with profile.stage("import") as record:
+        data = _import_data(filename=filename, var=variables)
+        record["rows"] = len(data)
+
+    output = _get_heatwaves_from_data(
+        data,
+        hw_indices,
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metric_names=metric_names,
+        cache=_get_cache(cache_dir),
+        profile=profile,
+        export_filename=filename if export is True else None,
+        export_format=export_format,
+        output_dir=output_dir,
+        bootstrap=bootstrap,
+    )
+    return output
+
 
-    if metrics is True:
-        annual_metrics = _get_annual_metrics(
-            heatwaves,
-            timeseries_ref_period,
-            timeseries,
-            max_missing_days_pct,
-            summer_months,
-            hw_index.var,
+def _get_heatwaves_from_data(
+    data,
+    hw_indices,
+    ref_years,
+    summer_months,
+    max_missing_days_pct,
+    metric_names,
+    cache=None,
+    profile=_NULL_PROFILE,
+    export_filename=None,
+    export_format="csv",
+    output_dir=None,
+    bootstrap=False,
+):
+    """
+    Detect the heat waves of weather data that have already been imported.
+
+    Parameters
+    ----------
+    data : DataFrame
+        The output of `_import_data`, with a column for each variable.
+    hw_indices : list of HeatWaveIndex objects
+    ref_years : tuple of str
+    summer_months : tuple of int or None
+    max_missing_days_pct : int
+    metric_names : list of str or None
+        The output of `_metric_names`.
+    cache : ThresholdCache, optional
+    profile : Profile, optional
+    export_filename : str or path object, optional
+        If set, the output is exported to files named after it.
+    export_format : str, default "csv"
+    output_dir : str or path object, optional
+    bootstrap : bool, default False
+
+    Returns
+    -------
+    dict of HeatWaves objects
+    """
+    shared = {}
+    quantile_indices = {}
+    output = {}
+    for hw_index in hw_indices:
+        components = _index_components(hw_index)
+        missing = {
+            _threshold_key(component): component
+            for component in components
+            if _threshold_key(component) not in shared
+        }
+        if missing:
+            data_ref_period = data.loc[ref_years[0] : ref_years[-1]]
+
+            with profile.stage("thresholds", hw_index.name) as record:
+                all_thresholds = _compute_daily_thresholds_many(
+                    timeseries_ref_period=data_ref_period,
+                    hw_indices=list(missing.values()),
+                    summer_months=_extend_plus_minus_one_month(summer_months),
+                    cache=cache,
+                    bootstrap=bootstrap,
+                    quantile_indices=quantile_indices,
+                )
+                record["rows"] = len(data_ref_period)
+
+            with profile.stage("add_thresholds", hw_index.name) as record:
+                for (key, component), daily_thresholds in zip(
+                    missing.items(), all_thresholds
+                ):
+                    timeseries = data[[component.var]].rename(
+                        columns={component.var: "var"}
+                    )
+                    shared[key] = (
+                        _add_threshold_to_timeseries(
+                            timeseries,
+                            daily_thresholds,
+                            first_year=data_ref_period.index.year.min(),
+                        ),
+                        timeseries.loc[ref_years[0] : ref_years[-1]],
+                    )
+                record["rows"] = len(data)
+
+        with profile.stage("find_heatwaves", hw_index.name) as record:
+            if hw_index.components is None:
+                timeseries, timeseries_ref_period = shared[_threshold_key(hw_index)]
+                heatwaves = _find_heatwaves(
+                    timeseries=timeseries,
+                    hw_index=hw_index,
+                    summer_months=summer_months,
+                )
+            else:
+                all_timeseries = [
+                    shared[_threshold_key(component)][0] for component in components
+                ]
+                timeseries_ref_period = shared[_threshold_key(components[0])][1]
+                heatwaves = _find_compound_heatwaves(
+                    all_timeseries, hw_index=hw_index, summer_months=summer_months
+                )
+                timeseries = _compound_timeseries(all_timeseries)
+            record["rows"] = len(timeseries)
+
+        if metric_names is not None:
+            with profile.stage("metrics", hw_index.name) as record:
+                annual_metrics = _get_annual_metrics(
+                    heatwaves,
+                    timeseries_ref_period,
+                    timeseries,
+                    max_missing_days_pct,
+                    summer_months,
+                    hw_index.var,
+                    metric_names,
+                )
+                record["rows"] = len(heatwaves)
+        else:
+            annual_metrics = None
+
+        if export_filename is not None:
+            with profile.stage("export", hw_index.name) as record:
+                if output_dir is not None:
+                    os.makedirs(output_dir, exist_ok=True)
+                export_options = dict(
+                    export_format=export_format, output_dir=output_dir
+                )
+                _export_heatwaves(
+                    heatwaves, export_filename, hw_index.name, **export_options
+                )
+                if metric_names is not None:
+                    _export_annual_metrics(
+                        annual_metrics, export_filename, hw_index.name, **export_options
+                    )
+                record["rows"] = len(heatwaves)
+
+        output[hw_index.name] = _create_output_object(
+            heatwaves, annual_metrics, profile if profile.enabled else None
         )
+    return output
+
+
+def _threshold_key(hw_index):
+    """
+    Identify the indices whose daily thresholds are identical.
+
+    Parameters
+    ----------
+    hw_index : HeatWaveIndex object
+
+    Returns
+    -------
+    tuple
+    """
+    if hw_index.pct is not None:
+        return (hw_index.var, "pct", hw_index.pct, hw_index.window_length)
     else:
-        annual_metrics = None
+        return (hw_index.var, "fixed_thres", hw_index.fixed_thres)
 
-    if export is True:
-        _export_heatwaves(heatwaves, filename, hw_index.name)
-        if metrics is True:
-            _export_annual_metrics(annual_metrics, filename, hw_index.name)
 
-    output = _create_output_object(heatwaves, annual_metrics)
+def get_heatwaves_many(
+    filenames,
+    hw_index,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    export=False,
+    metrics=True,
+    cache_dir=None,
+    n_jobs=1,
+    chunksize=None,
+    export_format="csv",
+    output_dir=None,
+    dataset_dir=None,
+    profile=False,
+    bootstrap=False,
+):
+    """
+    Detect heat wave events from the data of multiple weather stations.
+
+    Stations are processed in parallel using a pool of worker processes and
+    their results are collected into a single HeatWaves object.
+
+    Parameters
+    ----------
+    filenames : str, path object or list of them
+        Either a folder that contains one csv file per station or a list of
+        csv files. Each file has the same format as in `get_heatwaves`. The
+        station id is the name of the file without its extension.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics.
+    export : bool, default False
+        If True, the output of each station is exported as separate files, as
+        in `get_heatwaves`.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where the daily thresholds of percentile-based indices are
+        cached, so that they are not computed again for the same reference
+        period data. A ThresholdCache object can be given instead to set a
+        different size limit for the cache. If None, no cache is used.
+    n_jobs : int or None, default 1
+        The number of worker processes. If 1, stations are processed in the
+        current process. If None, it is set to the number of processors.
+    chunksize : int or None, default None
+        The number of stations sent to a worker process at once. If None, the
+        stations are split into about four chunks per worker.
+    export_format : {"csv", "parquet", "feather", "npz"}, default "csv"
+        The format of the exported files and of the dataset (see
+        `get_heatwaves`).
+    output_dir : str or path object, optional
+        The folder of the files exported when `export=True`.
+    dataset_dir : str or path object, optional
+        If set, the output of all stations is written to a single dataset in
+        this folder as the results of the stations arrive, with the rows of
+        a few hundred stations in each file. It can be read with
+        `read_dataset`. A dataset that already exists in the folder is
+        replaced.
+    profile : bool, callable or Profile, default False
+        Records the time and memory used by each stage of each station (see
+        `get_heatwaves`), along with the station id. Use `Profile.summary` to
+        aggregate the records over all stations.
+    bootstrap : bool, default False
+        If True, the percentile-based thresholds of the years of the reference
+        period are computed by bootstrap resampling (see `get_heatwaves`).
+
+    Returns
+    -------
+    HeatWaves object
+        The events and metrics of all stations, with the station id as the
+        first level of their index.
+    """
+    metric_names = _metric_names(metrics)
+    _check_export_format(export_format)
+    profile = _get_profile(profile)
+    filenames = _list_station_files(filenames)
+    station_ids = [
+        os.path.splitext(os.path.basename(filename))[0] for filename in filenames
+    ]
+
+    if profile.enabled:
+        profile_options = dict(callback=profile.callback, memory=profile.memory)
+    else:
+        profile_options = None
+
+    get_station_heatwaves = partial(
+        _get_station_heatwaves,
+        hw_index=hw_index,
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metric_names=metric_names,
+        cache_dir=cache_dir,
+        bootstrap=bootstrap,
+        profile_options=profile_options,
+        load=_import_data,
+        export=export,
+        export_format=export_format,
+        output_dir=output_dir,
+    )
+
+    results = _write_to_dataset(
+        _map_stations(
+            get_station_heatwaves, filenames, len(filenames), n_jobs, chunksize
+        ),
+        station_ids,
+        dataset_dir,
+        export_format,
+    )
+
+    output = HeatWaves.concat(results, station_ids)
+    if profile.enabled:
+        profile.extend([result.profile for result in results], station_ids)
+        output.profile = profile
     return output
 
 
-def _create_daily_windows(window_length):
+def _map_stations(function, stations, n_stations, n_jobs, chunksize):
+    """
+    Apply a function to each station, possibly in worker processes.
+
+    The results are yielded in the order of the stations, as soon as they are
+    available, so they can be written to disk without waiting for the other
+    stations. The stations are read from `stations` as the work progresses,
+    and at most two chunks of stations per worker process are in flight, so
+    the memory used depends on `chunksize` but not on the number of stations.
+
+    Parameters
+    ----------
+    function : callable
+        It should be picklable if multiple processes are used.
+    stations : iterable
+        The argument of `function` for each station.
+    n_stations : int
+    n_jobs : int or None
+        The number of worker processes. If 1, stations are processed in the
+        current process. If None, it is set to the number of processors.
+    chunksize : int or None
+        The number of stations sent to a worker process at once. If None, the
+        stations are split into about four chunks per worker.
+
+    Yields
+    ------
+    The output of `function` for each station.
+    """
+    if n_jobs == 1:
+        yield from map(function, stations)
+        return
+
+    n_jobs = n_jobs or os.cpu_count()
+    if chunksize is None:
+        chunksize = max(1, math.ceil(n_stations / (4 * n_jobs)))
+    stations = iter(stations)
+    chunks = iter(lambda: list(itertools.islice(stations, chunksize)), [])
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        pending = collections.deque()
+        for chunk in chunks:
+            if len(pending) == 2 * n_jobs:
+                yield from pending.popleft().result()
+            pending.append(executor.submit(_map_chunk, function, chunk))
+        while pending:
+            yield from pending.popleft().result()
+
+
+def _map_chunk(function, chunk):
+    """Apply a function to a chunk of stations in a worker process."""
+    return [function(station) for station in chunk]
+
+
+def _get_station_heatwaves(
+    station,
+    hw_index,
+    ref_years,
+    summer_months,
+    max_missing_days_pct,
+    metric_names,
+    cache_dir,
+    bootstrap,
+    profile_options,
+    load=None,
+    export=False,
+    export_format="csv",
+    output_dir=None,
+):
     """
-    Add to each day  of the year a list of days within a window around this
-    day.
+    Detect the heat waves of one station of a batch.
+
+    It is the function that `_map_stations` applies to each station, for all
+    the sources of station data. Each source only provides a `load` function
+    for its stations.
 
     Parameters
     ----------
-    window_length : int
-        The length in days of the moving window, centered around a given day.
+    station : object
+        The weather data of the station, as returned by `_import_data`, or
+        the argument of `load` that identifies the station (e.g. the path of
+        its csv file).
+    hw_index : HeatWaveIndex
+    ref_years : tuple of str
+    summer_months : tuple of int or None
+    max_missing_days_pct : int
+    metric_names : list of str or None
+    cache_dir : str, path object, ThresholdCache or None
+    bootstrap : bool
+    profile_options : dict or None
+        The arguments of a new Profile for the station, which is attached to
+        the output, or None if profiling is disabled.
+    load : callable, optional
+        A function that loads the weather data of `station`, given the
+        variables of the index. Its time is recorded in the "import" stage.
+    export : bool, default False
+        If True, the output is exported to files named after `station`, which
+        should be the path of a file (see `get_heatwaves`).
+    export_format : str, default "csv"
+    output_dir : str or path object, optional
 
     Returns
     -------
-    Dataframe
+    HeatWaves object
     """
-    # PRECOMPUTED = [3, 15]
-    PRECOMPUTED = []
-    if window_length in PRECOMPUTED:
-        df = _import_precomputed_daily_windows(window_length)
-        return df
+    if profile_options is None:
+        profile = _NULL_PROFILE
     else:
-        day_of_year = pd.date_range("1972-01-01", freq="D", periods=366)
-        df = pd.DataFrame(index=day_of_year)
+        profile = Profile(**profile_options)
 
-        days = np.floor(window_length / 2)
-        df["after"] = _add_or_subtract_days(df.index, days, add)
-        df["before"] = _add_or_subtract_days(df.index, days, sub)
+    if load is None:
+        data = station
+    else:
+        variables = sorted({component.var for component in _index_components(hw_index)})
+        with profile.stage("import") as record:
+            data = load(station, variables)
+            record["rows"] = len(data)
+
+    output = _get_heatwaves_from_data(
+        data,
+        [hw_index],
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metric_names=metric_names,
+        cache=_get_cache(cache_dir),
+        profile=profile,
+        export_filename=station if export is True else None,
+        export_format=export_format,
+        output_dir=output_dir,
+        bootstrap=bootstrap,
+    )
+    return output[hw_index.name]
 
-        df["window"] = [
-            pd.date_range(x, y).strftime("%m-%d").tolist()
-            for x, y in zip(df["before"], df["after"])
-        ]
-        return df[["window"]]
 
+def _list_station_files(filenames):
+    """
+    List the csv files of a folder or validate a list of files.
+
+    Files exported by hotspell itself are ignored when listing a folder.
 
-def _import_precomputed_daily_windows(window_length):
-    input_file = pkg_resources.resource_filename(
-        "hotspell",
-        os.path.join("datasets", f"daily_windows_with_length_{window_length}.pickle"),
-    )
-    df = pd.read_pickle(input_file)
-    return df
+    Parameters
+    ----------
+    filenames : str, path object or list of them
+
+    Returns
+    -------
+    list
+    """
+    if isinstance(filenames, (str, os.PathLike)):
+        if not os.path.isdir(filenames):
+            raise ValueError(f"{filenames} is not a folder.")
+        filenames = [
+            os.path.join(filenames, name)
+            for name in sorted(os.listdir(filenames))
+            if name.endswith(".csv") and not name.endswith(_EXPORT_SUFFIXES)
+        ]
+    else:
+        filenames = list(filenames)
 
+    if not filenames:
+        raise ValueError("No station files were found.")
+    return filenames
 
-def _add_or_subtract_days(ser, days, op):
+
+def _write_to_dataset(
+    results,
+    station_ids,
+    dataset_dir,
+    export_format,
+    profile=_NULL_PROFILE,
+    collect=True,
+):
     """
-    Add or subtract a number of days.
+    Collect the results of the stations, writing each one to the dataset as
+    soon as it is available.
 
     Parameters
     ----------
-    ser : Series or Index
-    days : int or float
-    op : operator object, one of `add` or `sub`
+    results : iterable of HeatWaves objects
+    station_ids : list of str
+    dataset_dir : str, path object or None
+        If None, the results are only collected.
+    export_format : str
+    profile : Profile, optional
+        If enabled, the profile of each station and the time spent writing
+        it to the dataset are added to it as the results arrive.
+    collect : bool, default True
+        If False, the results are discarded once they are written, so the
+        memory needed does not grow with the number of stations.
 
     Returns
     -------
-    Series
+    list of HeatWaves objects
+        It is empty if `collect` is False.
     """
-    return op(ser, datetime.timedelta(days))
+    writer = None
+    if dataset_dir is not None:
+        writer = _DatasetWriter(dataset_dir, export_format)
+    collected = []
+    for station_id, result in zip(station_ids, results):
+        if profile.enabled:
+            profile.extend([result.profile], [station_id])
+        if writer is not None:
+            with profile.stage("export") as record:
+                events, metrics = result._to_frames()
+                writer.add(station_id, events, metrics)
+                record["rows"] = len(events)
+        if collect:
+            collected.append(result)
+    if writer is not None:
+        writer.flush()
+    return collected
 
 
 def _extend_plus_minus_one_month(months):
@@ -218,65 +871,193 @@ def _extend_plus_minus_one_month(months):
 
 
 def _compute_daily_thresholds(
-    daily_windows, timeseries_ref_period, hw_index, summer_months
+    daily_windows,
+    timeseries_ref_period,
+    hw_index,
+    summer_months,
+    cache=None,
+    bootstrap=False,
 ):
     """
     Compute per day a percentile-based threshold or set an absolute threshold.
 
     Parameters
     ----------
-    daily_windows : DataFrame
+    daily_windows : ndarray
         The output of `_create_daily_windows`.
     timeseries_ref_period : DataFrame
         The weather data for the reference period; they are used to calculated
         the percentile.
     hw_index : HeatWaveIndex object
     summer_months : tuple of int
+    cache : ThresholdCache, optional
+        If set, percentile-based thresholds are loaded from the cache or are
+        stored there after being computed.
+    bootstrap : bool, default False
+        If True, percentile-based thresholds are also computed for each year
+        of the reference period by bootstrap resampling.
 
     Returns
     -------
-    DataFrame
+    ndarray
+        The threshold of each day of a leap year, NaN outside the summer
+        period. With `bootstrap=True`, an array of shape (1 + years, 366),
+        whose first row holds the thresholds of the years outside of the
+        reference period, followed by the thresholds of each year of the
+        reference period.
     """
-    if summer_months:
-        daily_thresholds = _keep_only_summer(daily_windows.copy(), summer_months)
-    else:
-        daily_thresholds = daily_windows.copy()
+    days_mask = _summer_days_mask(summer_months)
 
     if hw_index.pct is not None:
-        timeseries_ref_period = timeseries_ref_period.set_index(
-            timeseries_ref_period.index.strftime("%m-%d")
-        )
-        pct_values = []
-        for window in daily_thresholds["window"]:
-            pct_values.append(
-                np.nanpercentile(
-                    timeseries_ref_period.loc[
-                        timeseries_ref_period.index.isin(window), "var"
-                    ].values,
-                    hw_index.pct,
-                )
+        thresholds = None
+        if cache is not None:
+            key = cache.key(timeseries_ref_period, hw_index, summer_months, bootstrap)
+            thresholds = cache.load(key)
+
+        if thresholds is None:
+            ref_matrix = _reference_matrix(timeseries_ref_period)
+            thresholds = _compute_percentile_thresholds(
+                ref_matrix=ref_matrix,
+                window_indices=daily_windows,
+                pct=hw_index.pct,
+                days_mask=days_mask,
             )
-        daily_thresholds["threshold"] = pct_values
+            if bootstrap:
+                in_base_thresholds = _compute_bootstrap_thresholds(
+                    ref_matrix=ref_matrix,
+                    window_indices=daily_windows,
+                    pct=hw_index.pct,
+                    days_mask=days_mask,
+                )
+                thresholds = np.vstack([thresholds, in_base_thresholds])
+            if cache is not None:
+                cache.save(key, thresholds)
     else:
-        daily_thresholds["threshold"] = hw_index.fixed_thres
+        thresholds = np.where(days_mask, hw_index.fixed_thres, np.nan)
+
+    return thresholds
 
-    daily_thresholds = daily_windows.join(daily_thresholds.drop("window", axis=1))
-    return daily_thresholds
 
+def _compute_daily_thresholds_many(
+    timeseries_ref_period,
+    hw_indices,
+    summer_months,
+    cache=None,
+    bootstrap=False,
+    quantile_indices=None,
+):
+    """
+    Compute the daily thresholds of multiple indices over one or two variables.
+
+    The percentile-based thresholds are computed from the quantile index of
+    each variable and window length, which is built in a single pass over a
+    reference array with a column per variable, and is reused by all the
+    indices with the same variable and window length, whatever their
+    percentile.
+
+    Parameters
+    ----------
+    timeseries_ref_period : DataFrame
+        The weather data for the reference period, with a column for each
+        variable.
+    hw_indices : list of HeatWaveIndex objects
+        Indices over a single variable, whose thresholds differ.
+    summer_months : tuple of int
+    cache : ThresholdCache, optional
+    bootstrap : bool, default False
+        If True, the thresholds of each index are computed separately (see
+        `_compute_daily_thresholds`).
+    quantile_indices : dict, optional
+        The quantile indices already built for the reference period, by
+        variable and window length. New quantile indices are added to it.
 
-def _add_threshold_to_timeseries(timeseries, daily_thresholds):
-    """Concatinate the station data and the computed daily thresholds."""
-    timeseries = timeseries.asfreq("D")
-    df = timeseries.assign(
-        date=timeseries.index.strftime("%m-%d"),
-        fulldate=timeseries.index.strftime("%Y-%m-%d"),
-    ).merge(
-        daily_thresholds.assign(
-            date=daily_thresholds.index.strftime("%m-%d"), on="date"
+    Returns
+    -------
+    list of ndarray
+        The output of `_compute_daily_thresholds` for each index.
+    """
+    if quantile_indices is None:
+        quantile_indices = {}
+    all_thresholds = [None] * len(hw_indices)
+    pending = []
+    for position, hw_index in enumerate(hw_indices):
+        timeseries = timeseries_ref_period[[hw_index.var]].rename(
+            columns={hw_index.var: "var"}
         )
-    )
-    df = df.sort_values("fulldate").drop(["date", "fulldate", "window"], axis=1)
-    df.index = timeseries.index
+        if hw_index.pct is None or bootstrap:
+            all_thresholds[position] = _compute_daily_thresholds(
+                daily_windows=_create_daily_windows(hw_index.window_length),
+                timeseries_ref_period=timeseries,
+                hw_index=hw_index,
+                summer_months=summer_months,
+                cache=cache,
+                bootstrap=bootstrap,
+            )
+            continue
+
+        key = None
+        if cache is not None:
+            key = cache.key(timeseries, hw_index, summer_months)
+            all_thresholds[position] = cache.load(key)
+        if all_thresholds[position] is None:
+            pending.append((position, hw_index, key))
+
+    missing = {}
+    for _, hw_index, _ in pending:
+        if (hw_index.var, hw_index.window_length) not in quantile_indices:
+            variables = missing.setdefault(hw_index.window_length, [])
+            if hw_index.var not in variables:
+                variables.append(hw_index.var)
+
+    for window_length, variables in missing.items():
+        built = _build_quantile_indices(
+            ref_array=_reference_array(
+                timeseries_ref_period.index, timeseries_ref_period[variables].values
+            ),
+            window_indices=_create_daily_windows(window_length),
+            days_mask=_summer_days_mask(summer_months),
+        )
+        for var, quantile_index in zip(variables, built):
+            quantile_indices[(var, window_length)] = quantile_index
+
+    for position, hw_index, key in pending:
+        quantile_index = quantile_indices[(hw_index.var, hw_index.window_length)]
+        all_thresholds[position] = quantile_index.thresholds(hw_index.pct)
+        if key is not None:
+            cache.save(key, all_thresholds[position])
+
+    return all_thresholds
+
+
+def _add_threshold_to_timeseries(timeseries, daily_thresholds, first_year=None):
+    """
+    Add the daily thresholds to the station data.
+
+    Missing days are added to the data, so that the output has a row for
+    every day. The threshold of each day is looked up by its day of year, and
+    by its year for the thresholds of the years of the reference period.
+
+    Parameters
+    ----------
+    timeseries : DataFrame
+    daily_thresholds : ndarray
+        The output of `_compute_daily_thresholds`.
+    first_year : int, optional
+        The first year of the reference period. Only needed if there are
+        thresholds for each year of the reference period.
+
+    Returns
+    -------
+    DataFrame
+    """
+    df = timeseries.asfreq("D")
+    days = _day_of_year(df.index)
+    if daily_thresholds.ndim == 1:
+        df["threshold"] = daily_thresholds[days]
+    else:
+        rows = df.index.year.values - first_year + 1
+        rows[(rows < 1) | (rows >= len(daily_thresholds))] = 0
+        df["threshold"] = daily_thresholds[rows, days]
     return df
 
 
@@ -295,70 +1076,172 @@ def _find_heatwaves(timeseries, hw_index, summer_months):
     -------
     DataFrame
     """
-    timeseries["over"] = np.where(
-        timeseries["var"] > timeseries["threshold"], 1, np.nan
+    if summer_months:
+        timeseries = timeseries.loc[
+            timeseries.index.month.isin(_extend_plus_minus_one_month(summer_months))
+        ]
+
+    values = timeseries["var"].values
+    heatwaves = _find_heatwaves_from_exceedances(
+        dates=timeseries.index,
+        exceedances=values > timeseries["threshold"].values,
+        values={hw_index.var: values},
+        min_duration=hw_index.min_duration,
+        summer_months=summer_months,
     )
+    return heatwaves
 
+
+def _find_compound_heatwaves(all_timeseries, hw_index, summer_months):
+    """
+    Find the heat wave dates of a compound index.
+
+    A day is part of a heat wave if the thresholds of all the components of
+    the index are exceeded. The events contain the statistics of each
+    variable.
+
+    Parameters
+    ----------
+    all_timeseries : list of DataFrame
+        The weather data of each component of the index, including a column
+        with a daily threshold value. They should have the same index.
+    hw_index : HeatWaveIndex object
+    summer_months : tuple of int
+
+    Returns
+    -------
+    DataFrame
+    """
+    dates = all_timeseries[0].index
     if summer_months:
-        timeseries = _keep_only_summer(
-            timeseries, _extend_plus_minus_one_month(summer_months)
-        )
+        summer = dates.month.isin(_extend_plus_minus_one_month(summer_months))
+    else:
+        summer = np.ones(len(dates), dtype=bool)
+
+    exceedances = np.logical_and.reduce(
+        [
+            timeseries["var"].values[summer] > timeseries["threshold"].values[summer]
+            for timeseries in all_timeseries
+        ]
+    )
+    values = {
+        component.var: timeseries["var"].values[summer]
+        for component, timeseries in zip(hw_index.components, all_timeseries)
+    }
+    heatwaves = _find_heatwaves_from_exceedances(
+        dates=dates[summer],
+        exceedances=exceedances,
+        values=values,
+        min_duration=hw_index.min_duration,
+        summer_months=summer_months,
+    )
+    return heatwaves
 
-    heatwave_days = timeseries.copy()
 
-    heatwaves = _group_heatwave_days(heatwave_days)
+def _find_heatwaves_from_exceedances(
+    dates, exceedances, values, min_duration, summer_months
+):
+    """
+    Create the heat wave events from the days on which thresholds are exceeded.
+
+    Parameters
+    ----------
+    dates : DatetimeIndex
+    exceedances : ndarray of bool
+    values : dict of ndarray
+        The values of each variable, whose statistics are added to the events.
+    min_duration : int
+    summer_months : tuple of int
+
+    Returns
+    -------
+    DataFrame
+    """
+    begins, durations = _find_runs(exceedances)
+    begins, durations = _filter_with_min_duration(begins, durations, min_duration)
+
+    (var, var_values), *others = values.items()
     heatwaves = _compute_heatwave_properties(
-        heatwaves=heatwaves,
-        var=hw_index.var,
-        min_duration=hw_index.min_duration,
+        dates=dates,
+        values=var_values,
+        begins=begins,
+        durations=durations,
+        var=var,
     )
-    heatwaves = _filter_with_min_duration(heatwaves, hw_index.min_duration)
+    for var, var_values in others:
+        _add_heatwave_statistics(heatwaves, var_values, begins, durations, var)
     if summer_months:
         heatwaves = _keep_only_summer(heatwaves, summer_months)
 
     return heatwaves
 
 
-def _group_heatwave_days(heatwaves_days):
-    heatwaves_days["group"] = (heatwaves_days.over.diff(1) != 0).astype("int").cumsum()
-    return heatwaves_days
+def _compound_timeseries(all_timeseries):
+    """
+    Create the weather data used for the metrics of a compound index.
 
+    It contains the variable of the first component, which is missing on the
+    days that any variable is missing.
 
-def _compute_heatwave_properties(heatwaves, var, min_duration):
-    if min_duration == 1:
-        heatwaves = heatwaves[heatwaves["over"].notna()]
-    heatwaves["date"] = heatwaves.index
-    heatwaves_with_properties = pd.DataFrame(
-        {
-            "begin_date": heatwaves.groupby("group").date.first(),
-            "end_date": heatwaves.groupby("group").date.last(),
-            "duration": heatwaves.groupby("group").size(),
-            f"avg_{var}": heatwaves.groupby("group")["var"].mean().round(1),
-            f"std_{var}": heatwaves.groupby("group")["var"].std().round(1),
-            f"max_{var}": heatwaves.groupby("group")["var"].max().round(1),
-        }
-    ).reset_index(drop=True)
-    heatwaves_with_properties.index = pd.DatetimeIndex(
-        heatwaves_with_properties.begin_date
+    Parameters
+    ----------
+    all_timeseries : list of DataFrame
+
+    Returns
+    -------
+    DataFrame
+    """
+    values = [timeseries["var"].values for timeseries in all_timeseries]
+    missing = np.logical_or.reduce([np.isnan(var_values) for var_values in values])
+    return pd.DataFrame(
+        {"var": np.where(missing, np.nan, values[0])}, index=all_timeseries[0].index
     )
-    heatwaves_with_properties.index.names = ["index"]
-    return heatwaves_with_properties
 
 
-def _filter_with_min_duration(heatwaves, min_duration):
-    return heatwaves[heatwaves.duration >= min_duration]
+def _filter_with_min_duration(begins, durations, min_duration):
+    keep = durations >= min_duration
+    return begins[keep], durations[keep]
+
 
+def _compute_heatwave_properties(dates, values, begins, durations, var):
+    """
+    Create the heat wave events from the runs of days over the threshold.
 
-def _export_heatwaves(heatwaves, filename, index_name):
-    output_file = f"{os.path.splitext(filename)[0]}_{index_name}_heatwaves_events.csv"
-    heatwaves.to_csv(output_file, index=False, date_format="%d/%m/%Y")
+    Parameters
+    ----------
+    dates : DatetimeIndex
+    values : ndarray
+    begins : ndarray of int
+        The position of the first day of each heat wave.
+    durations : ndarray of int
+        The number of days of each heat wave.
+    var : str, one of "tmin" or "tmax"
+
+    Returns
+    -------
+    DataFrame
+    """
+    begin_dates = dates[begins]
+    heatwaves_with_properties = pd.DataFrame(
+        {
+            "begin_date": begin_dates,
+            "end_date": dates[begins + durations - 1],
+            "duration": durations.astype("int64"),
+        },
+        index=pd.DatetimeIndex(begin_dates, name="index"),
+    )
+    _add_heatwave_statistics(heatwaves_with_properties, values, begins, durations, var)
+    return heatwaves_with_properties
 
 
-def _export_annual_metrics(metrics, filename, index_name):
-    output_file = f"{os.path.splitext(filename)[0]}_{index_name}_heatwaves_metrics.csv"
-    metrics.to_csv(output_file, index=True, date_format="%Y")
+def _add_heatwave_statistics(heatwaves, values, begins, durations, var):
+    """Add the mean, standard deviation and maximum of a variable to events."""
+    avg, std, maximum = _run_statistics(values, begins, durations)
+    heatwaves[f"avg_{var}"] = np.round(avg, 1)
+    heatwaves[f"std_{var}"] = np.round(std, 1)
+    heatwaves[f"max_{var}"] = np.round(maximum, 1)
 
 
-def _create_output_object(heatwaves, annual_metrics):
-    output = HeatWaves(events=heatwaves, metrics=annual_metrics)
+def _create_output_object(heatwaves, annual_metrics, profile=None):
+    output = HeatWaves(events=heatwaves, metrics=annual_metrics, profile=profile)
     return output
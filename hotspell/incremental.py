@@ -0,0 +1,402 @@
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import _get_cache
+from .compact import _CompactFrameBuffer
+from .heatwaves import (
+    HeatWaves,
+    _compute_daily_thresholds,
+    _compute_heatwave_properties,
+    _extend_plus_minus_one_month,
+    _filter_with_min_duration,
+)
+from .indices import _check_single_variable_index
+from .metrics import (
+    _add_valid_years_with_no_heatwaves,
+    _count_missing_days,
+    _metric_names,
+)
+from .runs import _find_runs
+from .thresholds import _create_daily_windows, _day_of_year
+from .utils import _compute_overall_mean, _import_data
+
+
+class HeatWaveMonitor:
+    """
+    Class designed for keeping heat wave events up to date as new data arrive.
+
+    It is created by `monitor_heatwaves` and updated with `update`. Its state
+    is compact: the daily thresholds, the events found so far as compact
+    arrays, the days of a heat wave that may still be ongoing at the end of
+    the data, and a row of metric accumulators and the number of missing days
+    for each year. An update processes only the new days: the events that
+    end are appended to the others and only the accumulators of their years
+    change. Its output is identical to running `get_heatwaves` on the whole
+    record.
+
+    Parameters
+    ----------
+    hw_index : HeatWaveIndex
+    thresholds : ndarray
+        The threshold of each day of a leap year.
+    ref_period_mean : float
+        The mean of the reference period, used for the hwm and hwa metrics.
+    ref_end : Timestamp or None
+        The last day of the reference period. New data should come after it,
+        since they would otherwise change the thresholds. If None, data of
+        any period are accepted, which is only correct if the thresholds were
+        computed from the whole reference period beforehand.
+    summer_months : tuple of int or None
+    max_missing_days_pct : int
+    metrics : list of str or None
+        The metrics to compute, or None if no metrics are computed.
+
+    Attributes
+    ----------
+    heatwaves : HeatWaves object or None
+        The output of the last update.
+    last_date : Timestamp or None
+        The last day of the data processed so far.
+    """
+
+    def __init__(
+        self,
+        hw_index,
+        thresholds,
+        ref_period_mean,
+        ref_end,
+        summer_months,
+        max_missing_days_pct,
+        metrics,
+    ):
+        _check_single_variable_index(hw_index, "HeatWaveMonitor")
+        self.hw_index = hw_index
+        self.thresholds = thresholds
+        self.ref_period_mean = ref_period_mean
+        self.ref_end = ref_end
+        self.summer_months = summer_months
+        self.max_missing_days_pct = max_missing_days_pct
+        self.metrics = metrics
+        self.heatwaves = None
+        self.last_date = None
+
+        self._events = _CompactFrameBuffer()
+        self._annual = {}
+        self._missing_days = {}
+        self._open_dates = None
+        self._open_values = None
+
+    def update(self, data):
+        """
+        Process newly arrived data.
+
+        Parameters
+        ----------
+        data : str, path object, Series or DataFrame
+            The new days, which should all come after `last_date`. Either the
+            path of a csv file in the format of `get_heatwaves`, or the daily
+            values of the variable of the index, indexed by date. A DataFrame
+            should have a column named after the variable (e.g. "tmax").
+            Days that are skipped between updates are treated as missing.
+            If it has no days, the output of the last update is returned.
+
+        Returns
+        -------
+        HeatWaves object
+            The heat waves of the whole record.
+        """
+        timeseries = self._to_daily_timeseries(data)
+        if timeseries is None:
+            return self.heatwaves
+        self._process(timeseries)
+        self.heatwaves = self._create_output()
+        return self.heatwaves
+
+    def _process(self, timeseries):
+        """Find the heat waves of new days, without creating the output."""
+        if self.metrics is not None:
+            self._count_missing_days(timeseries)
+
+        if self.summer_months:
+            timeseries = timeseries.loc[
+                timeseries.index.month.isin(
+                    _extend_plus_minus_one_month(self.summer_months)
+                )
+            ]
+
+        # The days of an ongoing heat wave are processed again along with the
+        # new days, so that it can be extended
+        dates = self._open_dates.append(timeseries.index)
+        values = np.concatenate([self._open_values, timeseries["var"].values])
+        over = np.concatenate(
+            [
+                np.ones(len(self._open_values), dtype=bool),
+                values[len(self._open_values) :]
+                > self.thresholds[_day_of_year(timeseries.index)],
+            ]
+        )
+
+        begins, durations = _find_runs(over)
+        if len(begins) > 0 and begins[-1] + durations[-1] == len(over):
+            self._open_dates = dates[begins[-1] :]
+            self._open_values = values[begins[-1] :]
+            begins, durations = begins[:-1], durations[:-1]
+        else:
+            self._open_dates = dates[:0]
+            self._open_values = values[:0]
+
+        heatwaves = self._heatwaves(dates, values, begins, durations)
+        self._events.append(heatwaves)
+        if self.metrics is not None:
+            _accumulate_annual_metrics(self._annual, heatwaves, self.hw_index.var)
+
+    def _to_daily_timeseries(self, data):
+        if isinstance(data, (str, os.PathLike)):
+            data = _import_data(filename=data, var=self.hw_index.var)
+        if isinstance(data, pd.DataFrame):
+            var = self.hw_index.var if self.hw_index.var in data else "var"
+            data = data[var]
+        data = data.sort_index()
+        if data.empty:
+            return None
+
+        if self.last_date is None:
+            start = data.index[0]
+        else:
+            if data.index[0] <= self.last_date:
+                raise ValueError(f"New data should come after {self.last_date}.")
+            if self.ref_end is not None and data.index[0] <= self.ref_end:
+                raise ValueError("New data should not be in the reference period.")
+            start = self.last_date + pd.Timedelta(days=1)
+
+        dates = pd.date_range(start, data.index[-1], freq="D", unit=data.index.unit)
+        timeseries = data.reindex(dates).to_frame("var")
+        timeseries.index.name = "index"
+
+        if self.last_date is None:
+            self._open_dates = timeseries.index[:0]
+            self._open_values = timeseries["var"].values[:0]
+        self.last_date = timeseries.index[-1]
+        return timeseries
+
+    def _count_missing_days(self, timeseries):
+        missing_days = _count_missing_days(timeseries, self.summer_months)
+        for year, count in missing_days.items():
+            self._missing_days[year] = self._missing_days.get(year, 0) + count
+
+    def _heatwaves(self, dates, values, begins, durations):
+        begins, durations = _filter_with_min_duration(
+            begins, durations, self.hw_index.min_duration
+        )
+        heatwaves = _compute_heatwave_properties(
+            dates=dates,
+            values=values,
+            begins=begins,
+            durations=durations,
+            var=self.hw_index.var,
+        )
+        if self.summer_months:
+            heatwaves = heatwaves[heatwaves.index.month.isin(self.summer_months)]
+        return heatwaves
+
+    def _create_output(self):
+        """
+        Create the output from the accumulated state.
+
+        An ongoing heat wave is added to the output, but not to the state,
+        since it may still be extended by the next update. It takes time
+        proportional to the number of years, not of days.
+        """
+        ongoing = self._heatwaves(
+            self._open_dates,
+            self._open_values,
+            *_find_runs(np.ones(len(self._open_values), dtype=bool)),
+        )
+
+        if self.metrics is not None:
+            annual = self._annual
+            if len(ongoing) > 0:
+                annual = dict(annual)
+                for year in set(ongoing.index.year):
+                    if year in annual:
+                        annual[year] = list(annual[year])
+                _accumulate_annual_metrics(annual, ongoing, self.hw_index.var)
+            year_dtype = self._open_dates.year.dtype
+            annual_metrics = _annual_metrics_from_accumulators(
+                annual, self.ref_period_mean, self.metrics, year_dtype
+            )
+            missing_days = pd.Series(
+                list(self._missing_days.values()),
+                index=pd.Index(list(self._missing_days), dtype=year_dtype),
+                dtype="int64",
+            )
+            annual_metrics = _add_valid_years_with_no_heatwaves(
+                annual_metrics,
+                missing_days,
+                self.max_missing_days_pct,
+                self.summer_months,
+            )
+        else:
+            annual_metrics = None
+
+        output = HeatWaves(events=None, metrics=annual_metrics)
+        output._events = self._events.frame(tail=ongoing)
+        return output
+
+
+def _accumulate_annual_metrics(annual, heatwaves, var):
+    """
+    Add heat wave events to the metric accumulators of their years.
+
+    Each accumulator is a list with the number of events, the sum and the
+    maximum of their durations, the sum, its compensation and the count of
+    the average temperatures, and the maximum temperature. The sum of the
+    averages is compensated (Kahan summation) as in the mean of a pandas
+    groupby, so the metrics are identical to those of
+    `_compute_annual_metrics`, provided that events are added in order.
+
+    Parameters
+    ----------
+    annual : dict of list
+        The accumulators by year, which are updated in place.
+    heatwaves : DataFrame
+    var : str
+    """
+    for year, duration, average, maximum in zip(
+        heatwaves.index.year,
+        heatwaves["duration"].values,
+        heatwaves[f"avg_{var}"].values,
+        heatwaves[f"max_{var}"].values,
+    ):
+        row = annual.get(year)
+        if row is None:
+            row = annual[year] = [0, 0, 0, 0.0, 0.0, 0, math.nan]
+        row[0] += 1
+        row[1] += int(duration)
+        row[2] = max(row[2], int(duration))
+        if not math.isnan(average):
+            y = average - row[4]
+            t = row[3] + y
+            row[4] = t - row[3] - y
+            row[3] = t
+            row[5] += 1
+        if not math.isnan(maximum) and not maximum <= row[6]:
+            row[6] = float(maximum)
+
+
+def _annual_metrics_from_accumulators(annual, ref_period_mean, names, year_dtype):
+    """
+    Compute the metrics of the years with heat waves from their accumulators.
+
+    Parameters
+    ----------
+    annual : dict of list
+        The accumulators by year (see `_accumulate_annual_metrics`).
+    ref_period_mean : float or None
+    names : list of str
+    year_dtype : dtype
+
+    Returns
+    -------
+    DataFrame
+        The same output as `_compute_annual_metrics`.
+    """
+    years = sorted(annual)
+    rows = [annual[year] for year in years]
+    hwn = np.array([row[0] for row in rows], dtype="int64")
+    hwf = np.array([row[1] for row in rows], dtype="int64")
+    sums = np.array([row[3] for row in rows], dtype="float64")
+    counts = np.array([row[5] for row in rows], dtype="float64")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hwma = np.round(np.where(counts > 0, sums / counts, np.nan), 1)
+        hwdm = np.round(hwf / hwn, 1)
+    hwaa = np.array([row[6] for row in rows], dtype="float64")
+
+    columns = {
+        "hwn": hwn,
+        "hwf": hwf,
+        "hwd": np.array([row[2] for row in rows], dtype="int64"),
+        "hwdm": hwdm,
+        "hwma": hwma,
+        "hwaa": hwaa,
+    }
+    if "hwm" in names:
+        columns["hwm"] = np.round(hwma - ref_period_mean, 1)
+    if "hwa" in names:
+        columns["hwa"] = np.round(hwaa - ref_period_mean, 1)
+    return pd.DataFrame(
+        {name: columns[name] for name in names},
+        index=pd.Index(np.array(years, dtype=year_dtype), name="year"),
+    )
+
+
+def monitor_heatwaves(
+    filename,
+    hw_index,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+    cache_dir=None,
+):
+    """
+    Detect heat wave events and keep them up to date as new data arrive.
+
+    The historical data are processed once; afterwards new days are added with
+    the `update` method of the returned object, which costs time proportional
+    to the number of new days instead of the length of the record.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The path of the csv file that contains the historical weather data, in
+        the format of `get_heatwaves`.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics. If a summer period has been
+        defined the percentage corresponds only to this period.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where daily thresholds are cached (see `get_heatwaves`).
+
+    Returns
+    -------
+    HeatWaveMonitor object
+        The output for the historical data is stored in its `heatwaves`
+        attribute.
+    """
+    timeseries = _import_data(filename=filename, var=hw_index.var)
+    timeseries_ref_period = timeseries.loc[ref_years[0] : ref_years[-1]]
+
+    daily_thresholds = _compute_daily_thresholds(
+        daily_windows=_create_daily_windows(hw_index.window_length),
+        timeseries_ref_period=timeseries_ref_period,
+        hw_index=hw_index,
+        summer_months=_extend_plus_minus_one_month(summer_months),
+        cache=_get_cache(cache_dir),
+    )
+
+    monitor = HeatWaveMonitor(
+        hw_index=hw_index,
+        thresholds=daily_thresholds,
+        ref_period_mean=_compute_overall_mean(timeseries_ref_period, summer_months),
+        ref_end=pd.Timestamp(ref_years[-1]),
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metrics=_metric_names(metrics),
+    )
+    monitor.update(timeseries)
+    return monitor
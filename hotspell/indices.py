@@ -20,10 +20,24 @@ class HeatWaveIndex:
     window_length : int
         The total number of days that a moving window has when computing the
         percentile value for each day.
+    components : tuple of HeatWaveIndex or None
+        The indices combined by a compound index, whose conditions should all
+        be met on the same calendar day (e.g. a hot day and a hot night, as
+        measured by the maximum and the minimum temperature of the day). Their
+        own minimum duration is ignored. The variable of a compound index is
+        the variable of its first component, which is used for the metrics.
+        It is None for indices over a single variable.
     """
 
     def __init__(
-        self, name, var, pct, fixed_thres, min_duration, window_length
+        self,
+        name,
+        var,
+        pct,
+        fixed_thres,
+        min_duration,
+        window_length,
+        components=None,
     ):
         self.name = name
         self.var = var
@@ -31,6 +45,7 @@ class HeatWaveIndex:
         self.fixed_thres = fixed_thres
         self.min_duration = min_duration
         self.window_length = window_length
+        self.components = components
 
 
 def index(
@@ -40,9 +55,10 @@ def index(
     fixed_thres=None,
     min_duration=None,
     window_length=None,
+    components=None,
 ):
     """
-    Create a predefined or custom HeatWaveIndex object.
+    Create a predefined, custom or compound HeatWaveIndex object.
 
     Parameters
     ----------
@@ -62,6 +78,11 @@ def index(
     window_length : int
         The total number of days that a moving window has when computing the
         percentile value for each day.
+    components : list of HeatWaveIndex or str, optional
+        If set, a compound index is created, whose heat waves are the runs of
+        at least `min_duration` days on which the conditions of all components
+        are met. Predefined indices can be given by their name. The variable,
+        threshold and window length arguments are ignored.
 
     Returns
     -------
@@ -175,6 +196,19 @@ def index(
             min_duration=6,
             window_length=5,
         )
+    elif name == "compound90pct":
+        hw_index = HeatWaveIndex(
+            name=name,
+            var="tmax",
+            pct=None,
+            fixed_thres=None,
+            min_duration=3,
+            window_length=None,
+            components=(
+                index(var="tmax", pct=90, window_length=15),
+                index(var="tmin", pct=90, window_length=15),
+            ),
+        )
     elif name == "test_index":
         hw_index = HeatWaveIndex(
             name=name,
@@ -184,6 +218,24 @@ def index(
             min_duration=3,
             window_length=3,
         )
+    elif components is not None:
+        components = tuple(
+            index(component) if isinstance(component, str) else component
+            for component in components
+        )
+        if len(components) < 2:
+            raise ValueError("A compound index requires at least two components.")
+        if any(component.components is not None for component in components):
+            raise ValueError("The components of a compound index cannot be compound.")
+        hw_index = HeatWaveIndex(
+            name=name,
+            var=components[0].var,
+            pct=None,
+            fixed_thres=None,
+            min_duration=min_duration,
+            window_length=None,
+            components=components,
+        )
     else:
         hw_index = HeatWaveIndex(
             name=name,
@@ -201,3 +253,64 @@ def index(
         hw_index.window_length = 1
 
     return hw_index
+
+
+def _index_components(hw_index):
+    """
+    List the indices over a single variable that define an index.
+
+    Parameters
+    ----------
+    hw_index : HeatWaveIndex object
+
+    Returns
+    -------
+    tuple of HeatWaveIndex objects
+        The components of a compound index, or the index itself.
+    """
+    if hw_index.components is None:
+        return (hw_index,)
+    return hw_index.components
+
+
+def _check_single_variable_index(hw_index, function):
+    """Raise an error for compound indices, which `function` does not support."""
+    if hw_index.components is not None:
+        raise ValueError(f"Compound indices are not supported by {function}.")
+
+
+def _index_from_parameters(name, **parameters):
+    """
+    Create a predefined index, or a custom index from its parameters.
+
+    It is used by the interfaces that receive the index as text, such as the
+    command line and the server, so the parameters are validated.
+
+    Parameters
+    ----------
+    name : str
+        The name of a predefined index, or the name of the custom index.
+    **parameters
+        The arguments of `index` for a custom index. Those that are None are
+        ignored, and none can be set for a predefined index.
+
+    Returns
+    -------
+    HeatWaveIndex object
+    """
+    parameters = {
+        parameter: value for parameter, value in parameters.items() if value is not None
+    }
+    if parameters and index(name=name).var is not None:
+        raise ValueError(f"The parameters of the predefined index {name} are fixed.")
+    hw_index = index(name=name, **parameters)
+    if parameters:
+        if hw_index.var not in ("tmin", "tmax"):
+            raise ValueError("The variable should be one of tmin or tmax.")
+        if hw_index.pct is None and hw_index.fixed_thres is None:
+            raise ValueError("Either pct or fixed_thres is required.")
+        if hw_index.min_duration is None:
+            raise ValueError("The minimum duration is required.")
+    elif hw_index.var is None:
+        raise ValueError(f"Unknown index {name}.")
+    return hw_index
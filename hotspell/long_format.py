@@ -0,0 +1,114 @@
+from functools import partial
+
+from .export import _check_export_format
+from .heatwaves import (
+    HeatWaves,
+    _get_station_heatwaves,
+    _map_stations,
+    _write_to_dataset,
+)
+from .indices import _index_components
+from .metrics import _metric_names
+from .utils import _import_long_data
+
+
+def get_heatwaves_long(
+    data,
+    hw_index,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+    cache_dir=None,
+    n_jobs=1,
+    chunksize=None,
+    export_format="csv",
+    dataset_dir=None,
+    bootstrap=False,
+):
+    """
+    Detect heat wave events from a single table with the data of many stations.
+
+    The table is read once. Its rows are grouped by station with a single
+    sort, and each station is then processed as in `get_heatwaves`.
+    Stations can be processed in parallel using a pool of worker processes.
+
+    Parameters
+    ----------
+    data : str, path object or DataFrame
+        The path of a csv file without a header, whose columns are the station
+        id, the year, the month, the day, the minimum and the maximum
+        temperature, in this order. Alternatively, a DataFrame with the
+        columns "station", "year", "month", "day" and "tmin" or "tmax". Rows
+        can be in any order, but the days of each station should be in
+        chronological order.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where daily thresholds are cached (see `get_heatwaves`).
+    n_jobs : int or None, default 1
+        The number of worker processes. If 1, stations are processed in the
+        current process. If None, it is set to the number of processors.
+    chunksize : int or None, default None
+        The number of stations sent to a worker process at once. If None, the
+        stations are split into about four chunks per worker.
+    export_format : {"csv", "parquet", "feather", "npz"}, default "csv"
+        The format of the dataset (see `get_heatwaves_many`).
+    dataset_dir : str or path object, optional
+        If set, the output of all stations is written to a dataset in this
+        folder, replacing any existing dataset (see `get_heatwaves_many`).
+    bootstrap : bool, default False
+        If True, the percentile-based thresholds of the years of the reference
+        period are computed by bootstrap resampling (see `get_heatwaves`).
+
+    Returns
+    -------
+    HeatWaves object
+        The events and metrics of all stations, with the station id as the
+        first level of their index. Stations are in order of first
+        appearance.
+    """
+    metric_names = _metric_names(metrics)
+    _check_export_format(export_format)
+    station_ids, starts, timeseries = _import_long_data(
+        data, sorted({component.var for component in _index_components(hw_index)})
+    )
+    stations = (
+        timeseries.iloc[start:stop] for start, stop in zip(starts[:-1], starts[1:])
+    )
+
+    get_station_heatwaves = partial(
+        _get_station_heatwaves,
+        hw_index=hw_index,
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metric_names=metric_names,
+        cache_dir=cache_dir,
+        bootstrap=bootstrap,
+        profile_options=None,
+    )
+
+    results = _write_to_dataset(
+        _map_stations(
+            get_station_heatwaves, stations, len(station_ids), n_jobs, chunksize
+        ),
+        station_ids,
+        dataset_dir,
+        export_format,
+    )
+
+    output = HeatWaves.concat(results, station_ids)
+    return output
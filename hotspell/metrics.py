@@ -1,12 +1,9 @@
 import numpy as np
 import pandas as pd
 
-from .utils import (
-    _compute_overall_mean,
-    _keep_only_summer,
-    _keep_or_drop_year,
-    _percent_of_days_to_days,
-)
+from .utils import _compute_overall_mean, _percent_of_days_to_days
+
+METRICS = ["hwn", "hwf", "hwd", "hwdm", "hwm", "hwma", "hwa", "hwaa"]
 
 
 def _get_annual_metrics(
@@ -16,6 +13,7 @@ def _get_annual_metrics(
     max_missing_days_pct,
     summer_months,
     var,
+    names=METRICS,
 ):
     """
     Calculate the annual heat wave metrics attribute of a HeatWave object.
@@ -27,96 +25,162 @@ def _get_annual_metrics(
     timeseries : DataFrame
     max_missing_days_pct : int
     summer_months : tuple of int
+    var : str
+    names : list of str, default METRICS
+        The metrics to compute.
 
     Returns
     -------
     HeatWave object
     """
-    ref_period_mean = _compute_overall_mean(timeseries_ref_period, summer_months)
+    if {"hwm", "hwa"} & set(names):
+        ref_period_mean = _compute_overall_mean(timeseries_ref_period, summer_months)
+    else:
+        ref_period_mean = None
 
-    annual_metrics = _compute_annual_metrics(heatwaves, ref_period_mean, var)
+    annual_metrics = _compute_annual_metrics(heatwaves, ref_period_mean, var, names)
     annual_metrics = _add_valid_years_with_no_heatwaves(
-        annual_metrics, timeseries, max_missing_days_pct, summer_months
+        annual_metrics,
+        _count_missing_days(timeseries, summer_months),
+        max_missing_days_pct,
+        summer_months,
     )
     return annual_metrics
 
 
-def _compute_annual_metrics(df, ref_period_mean, var):
-    hwn = (
-        df.groupby([df.index.year], as_index=True)["duration"]
-        .count()
-        .to_frame(name="hwn")
-    )
+def _metric_names(metrics):
+    """
+    Find the metrics selected by the `metrics` argument.
 
-    hwf = (
-        df.groupby([df.index.year], as_index=True)["duration"]
-        .sum()
-        .to_frame(name="hwf")
-    )
+    Parameters
+    ----------
+    metrics : bool or list of str
 
-    hwd = (
-        df.groupby([df.index.year], as_index=True)["duration"]
-        .max()
-        .to_frame(name="hwd")
-    )
+    Returns
+    -------
+    list of str or None
+        None if no metrics are selected.
+    """
+    if metrics is True:
+        return METRICS
+    if metrics is False or metrics is None:
+        return None
 
-    hwdm = (
-        df.groupby([df.index.year], as_index=True)["duration"]
-        .mean()
-        .to_frame(name="hwdm")
-        .round(1)
-    )
+    unknown = set(metrics) - set(METRICS)
+    if unknown:
+        raise ValueError(f"Unknown metrics: {', '.join(sorted(unknown))}.")
+    return [name for name in METRICS if name in metrics]
 
-    hwm = (
-        df.groupby([df.index.year], as_index=True)[f"avg_{var}"]
-        .mean()
-        .to_frame(name="hwm")
-        .round(1)
-    )
-    hwm["hwm"] = np.round(hwm["hwm"] - ref_period_mean, 1)
 
-    hwma = (
-        df.groupby([df.index.year], as_index=True)[f"avg_{var}"]
-        .mean()
-        .to_frame(name="hwma")
-        .round(1)
-    )
+def _compute_annual_metrics(df, ref_period_mean, var, names=METRICS, groups=None):
+    """
+    Summarize the heat wave events of each year.
 
-    hwa = (
-        df.groupby([df.index.year], as_index=True)[f"max_{var}"]
-        .max()
-        .to_frame(name="hwa")
-    )
-    hwa["hwa"] = np.round(hwa["hwa"] - ref_period_mean, 1)
+    All metrics are computed in a single groupby pass. The magnitude and
+    amplitude anomalies (hwm, hwa) are derived from their absolute values
+    (hwma, hwaa).
 
-    hwaa = (
-        df.groupby([df.index.year], as_index=True)[f"max_{var}"]
-        .max()
-        .to_frame(name="hwaa")
-    )
+    Parameters
+    ----------
+    df : DataFrame
+        The heat wave events.
+    ref_period_mean : float or None
+        The mean of the reference period. Only needed for hwm and hwa.
+    var : str
+    names : list of str, default METRICS
+        The metrics to compute.
+    groups : ndarray, optional
+        The group of each event (e.g. the parameters that detected it). If
+        set, the events are summarized per group and year, and the group is
+        the first level of the index of the output.
 
-    annual_metrics = pd.concat([hwn, hwf, hwd, hwdm, hwm, hwma, hwa, hwaa], axis=1)
-    annual_metrics.index.rename("year", inplace=True)
+    Returns
+    -------
+    DataFrame
+    """
+    aggregations = {
+        "hwn": ("duration", "count"),
+        "hwf": ("duration", "sum"),
+        "hwd": ("duration", "max"),
+        "hwdm": ("duration", "mean"),
+        "hwma": (f"avg_{var}", "mean"),
+        "hwaa": (f"max_{var}", "max"),
+    }
+    needed = set(names)
+    if "hwm" in names:
+        needed.add("hwma")
+    if "hwa" in names:
+        needed.add("hwaa")
+
+    by = df.index.year if groups is None else [groups, df.index.year]
+    annual_metrics = df.groupby(by).agg(
+        **{name: aggregations[name] for name in aggregations if name in needed}
+    )
+    for name in ["hwdm", "hwma"]:
+        if name in needed:
+            annual_metrics[name] = annual_metrics[name].round(1)
+    if "hwm" in names:
+        annual_metrics["hwm"] = np.round(annual_metrics["hwma"] - ref_period_mean, 1)
+    if "hwa" in names:
+        annual_metrics["hwa"] = np.round(annual_metrics["hwaa"] - ref_period_mean, 1)
+
+    annual_metrics = annual_metrics[names]
+    if groups is None:
+        annual_metrics.index.rename("year", inplace=True)
+    else:
+        annual_metrics.index = annual_metrics.index.set_names("year", level=-1)
 
     return annual_metrics
 
 
+def _count_missing_days(timeseries, summer_months):
+    """
+    Count the missing days of each year.
+
+    Parameters
+    ----------
+    timeseries : DataFrame
+        The weather data with a daily frequency.
+    summer_months : tuple of int
+        If set, only the days of the summer period are counted.
+
+    Returns
+    -------
+    Series
+        The number of missing days, indexed by year.
+    """
+    years = timeseries.index.year.values
+    missing = np.isnan(timeseries["var"].values)
+    if summer_months:
+        summer = timeseries.index.month.isin(summer_months)
+        years, missing = years[summer], missing[summer]
+    if len(years) == 0:
+        return pd.Series([], index=pd.Index(years), dtype="int64")
+
+    first_year = years.min()
+    days = np.bincount(years - first_year)
+    missing_days = np.bincount(years - first_year, weights=missing)
+    present = np.flatnonzero(days)
+    return pd.Series(
+        missing_days[present].astype("int64"),
+        index=pd.Index(present.astype(years.dtype) + first_year),
+    )
+
+
 def _add_valid_years_with_no_heatwaves(
-    metrics, timeseries, max_missing_days_pct, summer_months
+    metrics, missing_days, max_missing_days_pct, summer_months
 ):
     max_missing_days_per_year = _percent_of_days_to_days(
         max_missing_days_pct, summer_months
     )
 
-    timeseries = timeseries.drop(columns=["threshold", "on", "over"])
-    if summer_months:
-        timeseries = _keep_only_summer(timeseries, summer_months)
-    timeseries = _keep_or_drop_year(timeseries, max_missing_days_per_year)
-    timeseries.index.name = "year"
-    timeseries.rename(columns={"missing_days": "hwf"}, inplace=True)
-    timeseries["hwf"] = 0
-    timeseries["hwn"] = timeseries["hwf"]
-    timeseries = timeseries.loc[~timeseries.index.isin(metrics.index)]
-
-    metrics = pd.concat([metrics, timeseries]).sort_index(axis=0)
+    valid_years = missing_days.index[missing_days < max_missing_days_per_year]
+    valid_years = valid_years[~valid_years.isin(metrics.index)]
+    no_heatwaves = pd.DataFrame(
+        {name: 0 for name in ["hwf", "hwn"] if name in metrics},
+        index=valid_years,
+    )
+    no_heatwaves.index.name = "year"
+
+    metrics = pd.concat([metrics, no_heatwaves]).sort_index(axis=0)
     return metrics
@@ -0,0 +1,178 @@
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+import pandas as pd
+
+
+class Profile:
+    """
+    Class designed for recording how long each stage of hotspell takes.
+
+    A Profile is attached to the output of `get_heatwaves` when it is called
+    with `profile=True`. It records a row for each stage that was run: import,
+    thresholds, add_thresholds, find_heatwaves, metrics and export. A Profile
+    object can also be passed as the `profile` argument, in which case the
+    records of all the calls that share it are accumulated.
+
+    Parameters
+    ----------
+    callback : callable, optional
+        A function called with the record of each stage (a dict) as soon as
+        the stage ends. With `get_heatwaves_many` and multiple processes it is
+        called in the worker processes, so it should be picklable.
+    memory : bool, default True
+        If True, the peak memory allocated during each stage is measured with
+        tracemalloc, which makes the stages slower. Set it to False for more
+        accurate timings.
+
+    Attributes
+    ----------
+    records : list of dict
+        The stage, the heat wave index (None for the stages shared by all
+        indices), the number of rows processed, the wall time in seconds and
+        the peak memory in bytes of each stage. The records of
+        `get_heatwaves_many` also contain the station id.
+    """
+
+    enabled = True
+
+    def __init__(self, callback=None, memory=True):
+        self.callback = callback
+        self.memory = memory
+        self.records = []
+
+    @contextmanager
+    def stage(self, name, index=None):
+        """
+        Measure a stage.
+
+        It is used as a context manager that gives the record of the stage,
+        where the number of rows processed should be stored.
+
+        Parameters
+        ----------
+        name : str
+        index : str, optional
+            The name of the heat wave index.
+        """
+        record = {"stage": name, "index": index, "rows": None}
+        if self.memory:
+            started_tracing = not tracemalloc.is_tracing()
+            if started_tracing:
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            memory_before = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            if self.memory:
+                record["peak_memory"] = (
+                    tracemalloc.get_traced_memory()[1] - memory_before
+                )
+                if started_tracing:
+                    tracemalloc.stop()
+            else:
+                record["peak_memory"] = None
+            self.records.append(record)
+            if self.callback is not None:
+                self.callback(record)
+
+    def extend(self, profiles, keys, name="station"):
+        """
+        Add the records of other profiles, labelled by a key.
+
+        Parameters
+        ----------
+        profiles : list of Profile objects
+        keys : list of str
+            The label of each profile (e.g. the station id).
+        name : str, default "station"
+            The field of the records that holds the label.
+        """
+        for key, profile in zip(keys, profiles):
+            for record in profile.records:
+                self.records.append({name: key, **record})
+
+    def to_frame(self):
+        """
+        Create a DataFrame with a row for each record.
+
+        Returns
+        -------
+        DataFrame
+        """
+        return pd.DataFrame(self.records)
+
+    def summary(self):
+        """
+        Summarize the records of each stage, e.g. over many stations.
+
+        Returns
+        -------
+        DataFrame
+            The number of times each stage was run, the total and maximum
+            rows processed, the total, mean and maximum wall time and the
+            maximum peak memory, indexed by stage.
+        """
+        df = self.to_frame()
+        if df.empty:
+            return df
+        summary = df.groupby("stage", sort=False).agg(
+            count=("seconds", "count"),
+            rows=("rows", "sum"),
+            max_rows=("rows", "max"),
+            seconds=("seconds", "sum"),
+            mean_seconds=("seconds", "mean"),
+            max_seconds=("seconds", "max"),
+            peak_memory=("peak_memory", "max"),
+        )
+        return summary
+
+
+class _NullStage:
+    """A stage that measures nothing, used when profiling is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return {}
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _NullProfile:
+    __slots__ = ()
+
+    enabled = False
+    _stage = _NullStage()
+
+    def stage(self, name, index=None):
+        return self._stage
+
+
+_NULL_PROFILE = _NullProfile()
+
+
+def _get_profile(profile):
+    """
+    Get the Profile that corresponds to the `profile` argument.
+
+    Parameters
+    ----------
+    profile : bool, callable or Profile
+
+    Returns
+    -------
+    Profile or _NullProfile
+    """
+    if isinstance(profile, Profile):
+        return profile
+    if profile is True:
+        return Profile()
+    if callable(profile):
+        return Profile(callback=profile)
+    return _NULL_PROFILE
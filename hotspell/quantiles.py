@@ -0,0 +1,224 @@
+import numpy as np
+
+from .thresholds import (
+    DAYS_IN_LEAP_YEAR,
+    MAX_BATCH_VALUES,
+    _create_daily_windows,
+    _reference_array,
+    _summer_days_mask,
+)
+
+
+class QuantileIndex:
+    """
+    Class designed for computing percentile thresholds at any level.
+
+    It holds, for each day of a leap year, the sorted values of the reference
+    period within the window around the day. The values of all days are
+    stored in a single array, in single precision if the values have a single
+    decimal digit (as temperatures usually do), along with the offset of the
+    values of each day. Once it is built, the daily thresholds of any
+    percentile are computed by interpolation between two values per day,
+    without gathering and sorting the reference period again. The thresholds
+    are identical to those computed by `get_heatwaves`.
+
+    Parameters
+    ----------
+    values : ndarray of float32 or float64
+        The sorted values of all days, one day after the other.
+    offsets : ndarray of int
+        An array of length 367, whose elements `offsets[day]` and
+        `offsets[day + 1]` delimit the values of each day.
+    decimals : int or None, default None
+        If set, the values are rounded to this number of decimals when they
+        are converted to double precision.
+
+    Examples
+    --------
+    >>> quantiles = QuantileIndex.from_file("station.csv", "tmax")
+    >>> thresholds = {pct: quantiles.thresholds(pct) for pct in [90, 95, 99]}
+    """
+
+    __slots__ = ("values", "offsets", "decimals")
+
+    def __init__(self, values, offsets, decimals=None):
+        self.values = values
+        self.offsets = offsets
+        self.decimals = decimals
+
+    @classmethod
+    def from_file(
+        cls,
+        filename,
+        var,
+        ref_years=("1961-01-01", "1990-12-31"),
+        window_length=15,
+        summer_months=(6, 7, 8),
+    ):
+        """
+        Build the quantile index of the reference period of a station.
+
+        Parameters
+        ----------
+        filename : str or path object
+            The path of the csv file that contains the weather data, in the
+            format of `get_heatwaves`.
+        var : str, one of "tmin" or "tmax"
+        ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+            The first and the last year of the reference period. It should be
+            set using the "YYYY-MM-DD" format.
+        window_length : int, default 15
+            The total number of days of the window around each day.
+        summer_months : tuple of int or None, default (6, 7, 8)
+            The months of the summer period. As in `get_heatwaves`, the values
+            of one more month before and after the summer period are kept. If
+            None, the values of all days are kept.
+
+        Returns
+        -------
+        QuantileIndex object
+        """
+        from .heatwaves import _extend_plus_minus_one_month
+        from .utils import _import_data
+
+        timeseries = _import_data(filename=filename, var=var)
+        timeseries_ref_period = timeseries.loc[ref_years[0] : ref_years[-1]]
+        return _build_quantile_indices(
+            ref_array=_reference_array(
+                timeseries_ref_period.index,
+                timeseries_ref_period[["var"]].values,
+            ),
+            window_indices=_create_daily_windows(window_length),
+            days_mask=_summer_days_mask(_extend_plus_minus_one_month(summer_months)),
+        )[0]
+
+    @property
+    def counts(self):
+        """The number of values of each day."""
+        return np.diff(self.offsets)
+
+    @property
+    def nbytes(self):
+        """The memory used by the values and the offsets."""
+        return self.values.nbytes + self.offsets.nbytes
+
+    def thresholds(self, pct):
+        """
+        Compute the threshold of each day for a percentile.
+
+        The percentile is interpolated linearly between the two closest
+        values, as in `np.percentile`.
+
+        Parameters
+        ----------
+        pct : int or float
+            The percentile, between 0 and 100.
+
+        Returns
+        -------
+        ndarray
+            The threshold of each day of a leap year, NaN for days without
+            values.
+        """
+        if not 0 <= pct <= 100:
+            raise ValueError("The percentile should be between 0 and 100.")
+        counts = self.counts
+        has_values = counts > 0
+        counts = counts[has_values]
+        starts = self.offsets[:-1][has_values]
+
+        # The linear method of np.percentile
+        positions = (counts - 1) * (pct / 100)
+        lower = np.floor(positions)
+        gamma = positions - lower
+        lower = np.minimum(lower.astype(np.intp), counts - 1)
+        upper = np.minimum(lower + 1, counts - 1)
+        lower_values = self._take(starts + lower)
+        upper_values = self._take(starts + upper)
+
+        difference = upper_values - lower_values
+        interpolated = np.where(
+            gamma >= 0.5,
+            upper_values - difference * (1 - gamma),
+            lower_values + difference * gamma,
+        )
+        thresholds = np.full(DAYS_IN_LEAP_YEAR, np.nan)
+        thresholds[has_values] = interpolated
+        return thresholds
+
+    def _take(self, positions):
+        """Get values in double precision."""
+        values = self.values[positions].astype(np.float64)
+        if self.decimals is not None:
+            values = np.round(values, self.decimals)
+        return values
+
+
+def _build_quantile_indices(ref_array, window_indices, days_mask):
+    """
+    Build the quantile indices of multiple variables in a single pass.
+
+    The values within the window of each day are gathered and sorted for all
+    variables together, in batches of days as in
+    `_compute_percentile_thresholds`.
+
+    Parameters
+    ----------
+    ref_array : ndarray
+        The output of `_reference_array`, of shape (years, 366, variables).
+    window_indices : ndarray of int
+        The output of `_create_daily_windows`.
+    days_mask : ndarray of bool
+        The days of the year whose values are kept.
+
+    Returns
+    -------
+    list of QuantileIndex objects
+        The quantile index of each variable.
+    """
+    n_years, _, n_variables = ref_array.shape
+    days = np.flatnonzero(days_mask)
+    n_values = n_years * window_indices.shape[1] * n_variables
+    batch_size = max(1, MAX_BATCH_VALUES // max(1, n_values))
+
+    counts = np.zeros((n_variables, DAYS_IN_LEAP_YEAR), dtype=np.int64)
+    batches = [[] for _ in range(n_variables)]
+    for start in range(0, len(days), batch_size):
+        batch = days[start : start + batch_size]
+        # (years, days, window, variables) -> (variables, days, years * window)
+        values = ref_array[:, window_indices[batch]].transpose(3, 1, 0, 2)
+        values = np.sort(values.reshape(n_variables, len(batch), -1), axis=2)
+        valid = ~np.isnan(values)
+        counts[:, batch] = valid.sum(axis=2)
+        for variable in range(n_variables):
+            batches[variable].append(values[variable][valid[variable]])
+
+    quantile_indices = []
+    for variable in range(n_variables):
+        values = np.concatenate(batches[variable]) if batches[variable] else []
+        values, decimals = _compact_values(np.asarray(values, dtype=np.float64))
+        offsets = np.concatenate([[0], np.cumsum(counts[variable])])
+        quantile_indices.append(QuantileIndex(values, offsets, decimals))
+    return quantile_indices
+
+
+def _compact_values(values, decimals=1):
+    """
+    Store values in single precision if no information is lost.
+
+    Parameters
+    ----------
+    values : ndarray of float64
+    decimals : int, default 1
+
+    Returns
+    -------
+    values : ndarray of float32 or float64
+    decimals : int or None
+        The decimals that restore the values, or None if they are not
+        converted.
+    """
+    compact = values.astype(np.float32)
+    if np.array_equal(np.round(compact.astype(np.float64), decimals), values):
+        return compact, decimals
+    return values, None
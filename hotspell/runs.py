@@ -0,0 +1,75 @@
+import numpy as np
+
+
+def _find_runs(mask):
+    """
+    Find the runs of consecutive True values of a boolean array.
+
+    Parameters
+    ----------
+    mask : ndarray of bool
+        A 1-D array.
+
+    Returns
+    -------
+    begins : ndarray of int
+        The position of the first day of each run.
+    durations : ndarray of int
+        The length of each run.
+    """
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    begins = edges[::2]
+    durations = edges[1::2] - begins
+    return begins, durations
+
+
+def _run_statistics(values, begins, durations):
+    """
+    Compute the mean, standard deviation and maximum of the values of runs.
+
+    The runs are processed together, one day of the runs at a time. The mean
+    uses compensated (Kahan) summation and the variance uses Welford's
+    algorithm, as the groupby reductions of pandas do, so the results are
+    identical to those of `groupby().mean()` and `groupby().std()`.
+
+    Parameters
+    ----------
+    values : ndarray
+        A 1-D array without NaNs within the runs.
+    begins : ndarray of int
+    durations : ndarray of int
+
+    Returns
+    -------
+    mean, std, max : ndarray
+        The standard deviation uses one degree of freedom and is NaN for runs
+        of a single day.
+    """
+    n_runs = len(begins)
+    total = np.zeros(n_runs)
+    compensation = np.zeros(n_runs)
+    mean = np.zeros(n_runs)
+    sum_of_squares = np.zeros(n_runs)
+    maximum = np.full(n_runs, -np.inf)
+
+    for day in range(durations.max(initial=0)):
+        active = np.flatnonzero(durations > day)
+        value = values[begins[active] + day]
+
+        y = value - compensation[active]
+        t = total[active] + y
+        difference = t - total[active] - y
+        compensation[active] = np.where(np.isnan(difference), 0, difference)
+        total[active] = t
+
+        old_mean = mean[active]
+        mean[active] = old_mean + (value - old_mean) / (day + 1)
+        sum_of_squares[active] += (value - mean[active]) * (value - old_mean)
+
+        maximum[active] = np.maximum(maximum[active], value)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = total / durations
+        std = np.where(durations > 1, np.sqrt(sum_of_squares / (durations - 1)), np.nan)
+    return mean, std, maximum
@@ -0,0 +1,183 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from .heatwaves import _compute_heatwave_properties, _extend_plus_minus_one_month
+from .metrics import (
+    _add_valid_years_with_no_heatwaves,
+    _compute_annual_metrics,
+    _count_missing_days,
+    _metric_names,
+)
+from .quantiles import _build_quantile_indices
+from .runs import _find_runs
+from .thresholds import (
+    _create_daily_windows,
+    _day_of_year,
+    _reference_array,
+    _summer_days_mask,
+)
+from .utils import _compute_overall_mean, _import_data, _keep_only_summer
+
+_PARAMETERS = ["pct", "window_length", "min_duration"]
+
+
+def get_heatwaves_sensitivity(
+    filename,
+    var="tmax",
+    pct=(90,),
+    min_duration=(3,),
+    window_length=(15,),
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+):
+    """
+    Compute the annual heat wave metrics of a station for a grid of parameters.
+
+    The metrics of every combination of percentile, minimum duration and
+    window length are identical to those of `get_heatwaves` with the
+    corresponding custom index, but the work is shared across the grid: the
+    data are read once, the quantile index of the reference period is built
+    once per window length (see `QuantileIndex`), the days over the threshold
+    and their runs are found once per percentile and window length, and the
+    events of each minimum duration are the runs that last long enough.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The path of the csv file that contains the weather data, in the
+        format of `get_heatwaves`.
+    var : str, one of "tmin" or "tmax", default "tmax"
+        The meteorological variable.
+    pct : int, float or list of them, default (90,)
+        The percentiles used as thresholds.
+    min_duration : int or list of int, default (3,)
+        The minimum durations of a heat wave.
+    window_length : int or list of int, default (15,)
+        The window lengths used to compute the percentiles.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics.
+    metrics : bool or list of str, default True
+        If True, all annual metrics are computed. A list of metric names (e.g.
+        ["hwn", "hwf"]) computes only these metrics.
+
+    Returns
+    -------
+    DataFrame
+        A row per combination of parameters and year, with the columns "pct",
+        "window_length", "min_duration" and "year", followed by the metrics.
+
+    Examples
+    --------
+    >>> sweep = get_heatwaves_sensitivity(
+    ...     "station.csv", "tmax", pct=range(85, 100), min_duration=range(2, 7)
+    ... )
+    >>> sweep.groupby(["pct", "min_duration"])["hwn"].mean()
+    """
+    metric_names = _metric_names(metrics)
+    if metric_names is None:
+        raise ValueError("At least one metric is required.")
+    pct, min_duration, window_length = (
+        _as_list(values) for values in [pct, min_duration, window_length]
+    )
+
+    timeseries = _import_data(filename=filename, var=var)
+    timeseries_ref_period = timeseries.loc[ref_years[0] : ref_years[-1]]
+    extended_months = _extend_plus_minus_one_month(summer_months)
+
+    daily = timeseries.asfreq("D")
+    missing_days = _count_missing_days(daily, summer_months)
+    if {"hwm", "hwa"} & set(metric_names):
+        ref_period_mean = _compute_overall_mean(timeseries_ref_period, summer_months)
+    else:
+        ref_period_mean = None
+    if summer_months:
+        daily = daily.loc[daily.index.month.isin(extended_months)]
+    dates = daily.index
+    days = _day_of_year(dates)
+    values = daily["var"].values
+
+    ref_array = _reference_array(
+        timeseries_ref_period.index, timeseries_ref_period[["var"]].values
+    )
+    days_mask = _summer_days_mask(extended_months)
+
+    keys = []
+    events = []
+    for window in window_length:
+        (quantile_index,) = _build_quantile_indices(
+            ref_array, _create_daily_windows(window), days_mask
+        )
+        for percentile in pct:
+            exceedances = values > quantile_index.thresholds(percentile)[days]
+            begins, durations = _find_runs(exceedances)
+            keep = durations >= min(min_duration)
+            heatwaves = _compute_heatwave_properties(
+                dates=dates,
+                values=values,
+                begins=begins[keep],
+                durations=durations[keep],
+                var=var,
+            )
+            if summer_months:
+                heatwaves = _keep_only_summer(heatwaves, summer_months)
+
+            for duration in min_duration:
+                keys.append((percentile, window, duration))
+                events.append(heatwaves.loc[heatwaves["duration"].values >= duration])
+
+    # The events of all combinations are summarized in a single groupby
+    all_annual_metrics = _compute_annual_metrics(
+        pd.concat(events),
+        ref_period_mean,
+        var,
+        metric_names,
+        groups=np.repeat(np.arange(len(keys)), [len(df) for df in events]),
+    )
+    by_group = dict(list(all_annual_metrics.groupby(level=0)))
+    no_events = all_annual_metrics.iloc[:0]
+
+    output = {}
+    for group, key in enumerate(keys):
+        output[key] = _add_valid_years_with_no_heatwaves(
+            by_group.get(group, no_events).droplevel(0),
+            missing_days,
+            max_missing_days_pct,
+            summer_months,
+        )
+
+    order = list(itertools.product(pct, window_length, min_duration))
+    sweep = pd.concat(
+        [output[key] for key in order], keys=order, names=[*_PARAMETERS, "year"]
+    )
+    return sweep.reset_index()
+
+
+def _as_list(values):
+    """
+    Convert a parameter of the sweep to a list of unique values.
+
+    Parameters
+    ----------
+    values : int, float or iterable of them
+
+    Returns
+    -------
+    list
+    """
+    if np.ndim(values) == 0:
+        values = [values]
+    values = list(dict.fromkeys(values))
+    if not values:
+        raise ValueError("Each parameter of the sweep requires at least one value.")
+    return values
@@ -0,0 +1,489 @@
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+
+from .cache import DEFAULT_MAX_SIZE, MemoryThresholdCache
+from .heatwaves import _get_heatwaves_from_data, _list_station_files
+from .indices import _index_components, _index_from_parameters
+from .metrics import METRICS
+from .utils import _import_data
+
+VARIABLES = ["tmin", "tmax"]
+_CUSTOM_PARAMETERS = {
+    "var": str,
+    "pct": float,
+    "fixed_thres": float,
+    "min_duration": int,
+    "window_length": int,
+}
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    500: "Internal Server Error",
+}
+
+
+class HeatWaveServer:
+    """
+    Class designed for serving heat waves to local clients.
+
+    It is a long-running HTTP server, over TCP or a Unix socket, that answers
+    queries for the events and the annual metrics of a station, an index and
+    a date range. The imported station data, the daily thresholds and the
+    detected heat waves are kept in memory, in bounded least recently used
+    caches, so repeated queries do not read the files or compute thresholds
+    again. Detection runs in a pool of worker threads, so that the event loop
+    keeps answering other queries meanwhile, and simultaneous queries for the
+    same station and index share a single detection. A station is imported
+    again if its file is modified. The folder is listed once, and again only
+    when a query names a station that is not known or whose file is gone.
+
+    The following queries are answered with JSON:
+
+    GET /stations
+        The ids of the stations.
+    GET /events?station=id&index=name[&start=YYYY-MM-DD][&end=YYYY-MM-DD]
+        The heat wave events that overlap with the date range.
+    GET /metrics?station=id&index=name[&start=YYYY-MM-DD][&end=YYYY-MM-DD]
+        The annual metrics of the years of the date range.
+    GET /stats
+        The number of entries and the hits and misses of the caches.
+
+    The index is either the name of a predefined index or the name of a
+    custom index followed by its parameters (e.g.
+    ``index=hw95&var=tmax&pct=95&min_duration=3&window_length=15``). Errors
+    are answered with a status code and a JSON object with an "error" key.
+
+    Parameters
+    ----------
+    station_dir : str or path object
+        A folder with a csv file per station, in the format of
+        `get_heatwaves`. The station id is the name of the file without its
+        extension.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period.
+    summer_months : tuple of int or None, default (6, 7, 8)
+    max_missing_days_pct : int, default 10
+    max_stations : int, default 64
+        The maximum number of stations whose data are kept in memory.
+    max_results : int, default 256
+        The maximum number of detected heat waves (station and index) that
+        are kept in memory.
+    max_thresholds_size : int, default 268435456
+        The maximum total size of the thresholds kept in memory, in bytes.
+    n_workers : int or None, default None
+        The number of worker threads. If None, it is set to the number of
+        processors.
+
+    Examples
+    --------
+    >>> server = HeatWaveServer("stations")
+    >>> asyncio.run(server.serve_forever(port=8000))
+
+    Then, from another process:
+
+    >>> urlopen("http://127.0.0.1:8000/events?station=athens&index=ctx90pct")
+    """
+
+    def __init__(
+        self,
+        station_dir,
+        ref_years=("1961-01-01", "1990-12-31"),
+        summer_months=(6, 7, 8),
+        max_missing_days_pct=10,
+        max_stations=64,
+        max_results=256,
+        max_thresholds_size=DEFAULT_MAX_SIZE,
+        n_workers=None,
+    ):
+        self.station_dir = os.fspath(station_dir)
+        self.ref_years = ref_years
+        self.summer_months = summer_months
+        self.max_missing_days_pct = max_missing_days_pct
+        self.thresholds = MemoryThresholdCache(max_thresholds_size)
+        self._station_files = None
+        self._stations = _LRUCache(max_stations)
+        self._results = _LRUCache(max_results)
+        self._pending = {}
+        self._executor = ThreadPoolExecutor(max_workers=n_workers)
+        self._server = None
+
+    @property
+    def stations(self):
+        """The ids of the stations, mapped to their files."""
+        if self._station_files is None:
+            self.refresh_stations()
+        return dict(self._station_files)
+
+    def refresh_stations(self):
+        """List the station files of the folder again."""
+        self._station_files = {
+            os.path.splitext(os.path.basename(filename))[0]: filename
+            for filename in _list_station_files(self.station_dir)
+        }
+
+    async def start(self, host="127.0.0.1", port=0, path=None):
+        """
+        Start listening for queries.
+
+        Parameters
+        ----------
+        host : str, default "127.0.0.1"
+        port : int, default 0
+            If 0, a free port is chosen (see `address`).
+        path : str or path object, optional
+            If set, the server listens on a Unix socket at this path instead.
+
+        Returns
+        -------
+        str or tuple
+            The address of the server, i.e. the path of the socket or the host
+            and the port.
+        """
+        if path is not None:
+            self._server = await asyncio.start_unix_server(
+                self._handle_connection, path=os.fspath(path)
+            )
+        else:
+            self._server = await asyncio.start_server(
+                self._handle_connection, host=host, port=port
+            )
+        return self.address
+
+    @property
+    def address(self):
+        """The address that the server listens on."""
+        address = self._server.sockets[0].getsockname()
+        return address if isinstance(address, str) else address[:2]
+
+    async def serve_forever(self, host="127.0.0.1", port=0, path=None):
+        """Start the server (see `start`) and answer queries until cancelled."""
+        await self.start(host=host, port=port, path=path)
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self):
+        """Stop listening and shut the worker threads down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        self._executor.shutdown(wait=False)
+
+    async def heatwaves(self, station, hw_index):
+        """
+        Get the heat waves of a station, detecting them if they are not cached.
+
+        Parameters
+        ----------
+        station : str
+            The id of the station.
+        hw_index : HeatWaveIndex object
+
+        Returns
+        -------
+        HeatWaves object
+        """
+        filename, mtime = self._find_station(station)
+        key = (station, mtime, _index_key(hw_index))
+
+        heatwaves = self._results.get(key)
+        if heatwaves is not None:
+            return heatwaves
+        # Simultaneous queries wait for the same detection
+        if key not in self._pending:
+            self._pending[key] = asyncio.get_running_loop().run_in_executor(
+                self._executor, self._detect, filename, key, hw_index
+            )
+        try:
+            heatwaves = await asyncio.shield(self._pending[key])
+        finally:
+            self._pending.pop(key, None)
+        return heatwaves
+
+    def _find_station(self, station):
+        """
+        Find the file of a station and its modification time.
+
+        Raises
+        ------
+        KeyError
+            If the station is not found, even after listing the folder again.
+        """
+        for refresh in [self._station_files is None, True]:
+            if refresh:
+                self.refresh_stations()
+            filename = self._station_files.get(station)
+            if filename is not None:
+                try:
+                    return filename, os.stat(filename).st_mtime_ns
+                except FileNotFoundError:
+                    pass
+        raise _UnknownStationError(f"Unknown station {station}.")
+
+    def stats(self):
+        """The number of entries and the hits and misses of the caches."""
+        return {
+            "stations": self._stations.stats(),
+            "results": self._results.stats(),
+            "thresholds": {
+                "entries": len(self.thresholds),
+                "nbytes": self.thresholds.nbytes,
+            },
+        }
+
+    def _detect(self, filename, key, hw_index):
+        """Detect the heat waves of a station in a worker thread."""
+        station, mtime, _ = key
+        data = self._stations.get((station, mtime))
+        if data is None:
+            data = _import_data(filename=filename, var=VARIABLES)
+            self._stations.put((station, mtime), data)
+
+        output = _get_heatwaves_from_data(
+            data,
+            [hw_index],
+            ref_years=self.ref_years,
+            summer_months=self.summer_months,
+            max_missing_days_pct=self.max_missing_days_pct,
+            metric_names=METRICS,
+            cache=self.thresholds,
+        )
+        heatwaves = output[hw_index.name]
+        self._results.put(key, heatwaves)
+        return heatwaves
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            request_line = await reader.readline()
+            # Skip the headers, since queries have no body
+            while (await reader.readline()).strip():
+                pass
+        except ValueError:
+            # The line is longer than the limit of the reader
+            request_line = b""
+        except ConnectionError:
+            writer.close()
+            return
+        try:
+            status, body = await self._respond(request_line)
+        except Exception as error:
+            status, body = 500, {"error": repr(error)}
+
+        content = json.dumps(body).encode()
+        writer.write(
+            (
+                f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+                "Content-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\n"
+                "Connection: close\r\n\r\n"
+            ).encode()
+            + content
+        )
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, request_line):
+        """
+        Answer a query.
+
+        Parameters
+        ----------
+        request_line : bytes
+            The first line of the HTTP request.
+
+        Returns
+        -------
+        status : int
+        body : dict or list
+        """
+        try:
+            method, target, _ = request_line.decode("latin-1").split()
+        except ValueError:
+            return 400, {"error": "Malformed request."}
+        if method != "GET":
+            return 405, {"error": "Only GET requests are supported."}
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/stations":
+                return 200, sorted(self.stations)
+            if url.path == "/stats":
+                return 200, self.stats()
+            if url.path in ("/events", "/metrics"):
+                if "station" not in query:
+                    raise ValueError("The station is required.")
+                hw_index = _parse_index(query)
+                start, end = _parse_date_range(query)
+                heatwaves = await self.heatwaves(query["station"], hw_index)
+                if url.path == "/events":
+                    return 200, _events_records(heatwaves.events, start, end)
+                return 200, _metrics_records(heatwaves.metrics, start, end)
+        except _UnknownStationError as error:
+            return 404, {"error": error.args[0]}
+        except ValueError as error:
+            return 400, {"error": str(error)}
+        return 404, {"error": f"Unknown path {url.path}."}
+
+
+class _UnknownStationError(KeyError):
+    """Raised for stations that are not in the folder of the server."""
+
+
+class _LRUCache:
+    """
+    A thread-safe mapping that keeps its most recently used entries.
+
+    Parameters
+    ----------
+    max_entries : int
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        return {"entries": len(self), "hits": self.hits, "misses": self.misses}
+
+
+def serve(station_dir, host="127.0.0.1", port=8000, path=None, **kwargs):
+    """
+    Run a HeatWaveServer until it is interrupted.
+
+    Parameters
+    ----------
+    station_dir : str or path object
+    host : str, default "127.0.0.1"
+    port : int, default 8000
+    path : str or path object, optional
+        If set, the server listens on a Unix socket at this path instead.
+    **kwargs
+        The other arguments of `HeatWaveServer`.
+    """
+    server = HeatWaveServer(station_dir, **kwargs)
+    try:
+        asyncio.run(server.serve_forever(host=host, port=port, path=path))
+    except KeyboardInterrupt:
+        pass
+
+
+def _parse_index(query):
+    """
+    Create the index of a query.
+
+    Parameters
+    ----------
+    query : dict of str
+
+    Returns
+    -------
+    HeatWaveIndex object
+    """
+    name = query.get("index")
+    if name is None:
+        raise ValueError("The index is required.")
+    parameters = {}
+    for parameter, convert in _CUSTOM_PARAMETERS.items():
+        if parameter in query:
+            try:
+                parameters[parameter] = convert(query[parameter])
+            except ValueError:
+                raise ValueError(f"Invalid {parameter}: {query[parameter]}.") from None
+
+    return _index_from_parameters(name, **parameters)
+
+
+def _parse_date_range(query):
+    """
+    Read the start and the end of the date range of a query.
+
+    Returns
+    -------
+    start, end : Timestamp or None
+    """
+    dates = []
+    for name in ["start", "end"]:
+        try:
+            dates.append(pd.Timestamp(query[name]) if name in query else None)
+        except ValueError:
+            raise ValueError(f"Invalid {name} date: {query[name]}.") from None
+    return tuple(dates)
+
+
+def _index_key(hw_index):
+    """The parameters that identify the heat waves of an index."""
+    return (
+        hw_index.name,
+        hw_index.var,
+        hw_index.pct,
+        hw_index.fixed_thres,
+        hw_index.min_duration,
+        hw_index.window_length,
+        tuple(
+            _index_key(component)
+            for component in _index_components(hw_index)
+            if component is not hw_index
+        ),
+    )
+
+
+def _events_records(events, start, end):
+    """Convert the events that overlap with a date range to JSON records."""
+    if start is not None:
+        events = events.loc[events["end_date"] >= start]
+    if end is not None:
+        events = events.loc[events["begin_date"] <= end]
+    events = events.reset_index(drop=True)
+    for column in ["begin_date", "end_date"]:
+        events[column] = events[column].dt.strftime("%Y-%m-%d")
+    return json.loads(events.to_json(orient="records"))
+
+
+def _metrics_records(metrics, start, end):
+    """Convert the metrics of the years of a date range to JSON records."""
+    years = metrics.index
+    if start is not None:
+        metrics = metrics.loc[years >= start.year]
+        years = metrics.index
+    if end is not None:
+        metrics = metrics.loc[years <= end.year]
+    return json.loads(metrics.reset_index().to_json(orient="records"))
@@ -0,0 +1,359 @@
+import json
+import os
+import struct
+from functools import lru_cache, partial
+
+import numpy as np
+import pandas as pd
+
+from .compact import _compact_array, _restore_array
+from .export import _check_export_format
+from .heatwaves import (
+    HeatWaves,
+    _get_station_heatwaves,
+    _list_station_files,
+    _map_stations,
+    _write_to_dataset,
+)
+from .metrics import _metric_names
+from .profiling import _get_profile
+from .utils import _datetime_unit, _import_data, _import_long_data
+
+MAGIC = b"HOTSPELL"
+STORE_VERSION = 1
+VARIABLES = ["tmin", "tmax"]
+# The magic bytes, the version, and the offset and length of the index
+_PREAMBLE = struct.Struct("<8sIQQ")
+_ALIGNMENT = 64
+
+
+class StationStore:
+    """
+    Class designed for reading the weather data of many stations quickly.
+
+    A store is a single binary file, created by `create_store`, that holds
+    the days of each station as int32 day numbers and the minimum and maximum
+    temperatures in single precision (when they have a single decimal digit,
+    as temperatures usually do, and in double precision otherwise). The
+    arrays of each station are contiguous and an index at the end of the file
+    holds their offsets. The file is memory-mapped, so the data of a station
+    are read without parsing and without copying, and worker processes that
+    read the same store share its pages through the cache of the operating
+    system.
+
+    Parameters
+    ----------
+    path : str or path object
+        The path of the store.
+
+    Examples
+    --------
+    >>> create_store("stations.hss", "stations/")
+    >>> store = StationStore("stations.hss")
+    >>> data = store.read("athens", "tmax")
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        self._buffer = np.memmap(self.path, dtype=np.uint8, mode="r")
+        if len(self._buffer) < _PREAMBLE.size:
+            raise ValueError(f"{self.path} is not a hotspell store.")
+        magic, version, index_offset, index_length = _PREAMBLE.unpack_from(self._buffer)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} is not a hotspell store.")
+        if version != STORE_VERSION:
+            raise ValueError(f"Unsupported store version {version}.")
+        index = json.loads(
+            self._buffer[index_offset : index_offset + index_length].tobytes()
+        )
+        self._stations = {station["id"]: station for station in index["stations"]}
+
+    def __len__(self):
+        return len(self._stations)
+
+    def __contains__(self, station_id):
+        return station_id in self._stations
+
+    @property
+    def station_ids(self):
+        """The ids of the stations, in the order they were stored."""
+        return list(self._stations)
+
+    @property
+    def nbytes(self):
+        """The size of the store."""
+        return len(self._buffer)
+
+    def arrays(self, station_id):
+        """
+        Get the stored arrays of a station, without copying them.
+
+        Parameters
+        ----------
+        station_id : str
+
+        Returns
+        -------
+        dict of ndarray
+            The read-only arrays "days" (days since 1970-01-01), "tmin" and
+            "tmax".
+        """
+        try:
+            station = self._stations[station_id]
+        except KeyError:
+            raise KeyError(f"Unknown station {station_id}.") from None
+        return {
+            name: np.frombuffer(
+                self._buffer,
+                dtype=np.dtype(column["dtype"]),
+                count=station["rows"],
+                offset=column["offset"],
+            )
+            for name, column in station["columns"].items()
+        }
+
+    def read(self, station_id, var=VARIABLES):
+        """
+        Read the weather data of a station.
+
+        Parameters
+        ----------
+        station_id : str
+        var : str, one of "tmin", "tmax", or list of str, default ["tmin", "tmax"]
+            The variables to read. As in `get_heatwaves`, a single variable
+            is stored in the column "var".
+
+        Returns
+        -------
+        DataFrame
+            The same DataFrame as if the csv file of the station was read.
+        """
+        arrays = self.arrays(station_id)
+        dates = _restore_array(
+            arrays["days"], np.dtype(f"datetime64[{_datetime_unit()}]")
+        )
+        variables = [var] if isinstance(var, str) else list(var)
+        columns = {
+            "var" if isinstance(var, str) else variable: _restore_array(
+                arrays[variable], np.dtype("float64")
+            )
+            for variable in variables
+        }
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(dates, name="index"))
+
+
+def create_store(path, filenames=None, long_data=None):
+    """
+    Convert the csv files of weather stations to a store.
+
+    The stations are read and written one at a time, so the memory needed
+    does not depend on the number of stations. The file is written under a
+    temporary name and renamed at the end, so readers never see a partially
+    written store.
+
+    Parameters
+    ----------
+    path : str or path object
+        The path of the store.
+    filenames : str, path object or list of them, optional
+        Either a folder that contains one csv file per station or a list of
+        csv files, as in `get_heatwaves_many`. The station id is the name of
+        the file without its extension.
+    long_data : str, path object or DataFrame, optional
+        The data of all stations in a single table, as in
+        `get_heatwaves_long`, instead of `filenames`.
+
+    Returns
+    -------
+    StationStore object
+    """
+    if (filenames is None) == (long_data is None):
+        raise ValueError("Either filenames or long_data is required.")
+    if filenames is not None:
+        filenames = _list_station_files(filenames)
+        station_ids = [
+            os.path.splitext(os.path.basename(filename))[0] for filename in filenames
+        ]
+        stations = (
+            _import_data(filename=filename, var=VARIABLES) for filename in filenames
+        )
+    else:
+        station_ids, starts, timeseries = _import_long_data(long_data, VARIABLES)
+        stations = (
+            timeseries.iloc[start:stop] for start, stop in zip(starts[:-1], starts[1:])
+        )
+    if len(set(station_ids)) != len(station_ids):
+        raise ValueError("The station ids should be unique.")
+
+    path = os.fspath(path)
+    tmp_path = f"{path}.tmp"
+    index = []
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(bytes(_PREAMBLE.size))
+            for station_id, data in zip(station_ids, stations):
+                arrays = {
+                    "days": _compact_array(data.index.values),
+                    **{
+                        variable: _compact_array(data[variable].values)
+                        for variable in VARIABLES
+                    },
+                }
+                columns = {}
+                for name, values in arrays.items():
+                    f.write(bytes(-f.tell() % _ALIGNMENT))
+                    columns[name] = {"dtype": values.dtype.str, "offset": f.tell()}
+                    f.write(np.ascontiguousarray(values).tobytes())
+                index.append({"id": station_id, "rows": len(data), "columns": columns})
+
+            index_offset = f.tell()
+            encoded_index = json.dumps({"stations": index}).encode()
+            f.write(encoded_index)
+            f.seek(0)
+            f.write(
+                _PREAMBLE.pack(MAGIC, STORE_VERSION, index_offset, len(encoded_index))
+            )
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return StationStore(path)
+
+
+def get_heatwaves_store(
+    store,
+    hw_index,
+    stations=None,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+    cache_dir=None,
+    n_jobs=1,
+    chunksize=None,
+    export_format="csv",
+    dataset_dir=None,
+    profile=False,
+    bootstrap=False,
+):
+    """
+    Detect heat wave events from the stations of a store.
+
+    Each station is read from the store, without parsing, and is then
+    processed as in `get_heatwaves`. Stations can be processed in parallel
+    using a pool of worker processes, which open the store once and share
+    its pages.
+
+    Parameters
+    ----------
+    store : str, path object or StationStore
+        The store created by `create_store`.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    stations : list of str, optional
+        The ids of the stations to process. If None, all the stations of the
+        store are processed.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where daily thresholds are cached (see `get_heatwaves`).
+    n_jobs : int or None, default 1
+        The number of worker processes. If 1, stations are processed in the
+        current process. If None, it is set to the number of processors.
+    chunksize : int or None, default None
+        The number of stations sent to a worker process at once. If None, the
+        stations are split into about four chunks per worker.
+    export_format : {"csv", "parquet", "feather", "npz"}, default "csv"
+        The format of the dataset (see `get_heatwaves_many`).
+    dataset_dir : str or path object, optional
+        If set, the output of all stations is written to a dataset in this
+        folder, replacing any existing dataset (see `get_heatwaves_many`).
+    profile : bool, callable or Profile, default False
+        Records the time and memory used by each stage of each station (see
+        `get_heatwaves_many`).
+    bootstrap : bool, default False
+        If True, the percentile-based thresholds of the years of the reference
+        period are computed by bootstrap resampling (see `get_heatwaves`).
+
+    Returns
+    -------
+    HeatWaves object
+        The events and metrics of all stations, with the station id as the
+        first level of their index.
+    """
+    metric_names = _metric_names(metrics)
+    _check_export_format(export_format)
+    if not isinstance(store, StationStore):
+        store = StationStore(store)
+    station_ids = store.station_ids if stations is None else list(stations)
+    unknown = [station_id for station_id in station_ids if station_id not in store]
+    if unknown:
+        raise KeyError(f"Unknown stations: {', '.join(unknown)}.")
+
+    profile = _get_profile(profile)
+    if profile.enabled:
+        profile_options = dict(callback=profile.callback, memory=profile.memory)
+    else:
+        profile_options = None
+
+    get_station_heatwaves = partial(
+        _get_station_heatwaves,
+        hw_index=hw_index,
+        ref_years=ref_years,
+        summer_months=summer_months,
+        max_missing_days_pct=max_missing_days_pct,
+        metric_names=metric_names,
+        cache_dir=cache_dir,
+        bootstrap=bootstrap,
+        profile_options=profile_options,
+        load=partial(_read_station, store=store if n_jobs == 1 else store.path),
+    )
+    results = _write_to_dataset(
+        _map_stations(
+            get_station_heatwaves, station_ids, len(station_ids), n_jobs, chunksize
+        ),
+        station_ids,
+        dataset_dir,
+        export_format,
+    )
+
+    output = HeatWaves.concat(results, station_ids)
+    if profile.enabled:
+        profile.extend([result.profile for result in results], station_ids)
+        output.profile = profile
+    return output
+
+
+def _read_station(station_id, variables, store):
+    """
+    Read the weather data of a station of a store.
+
+    It is the `load` function of `_get_station_heatwaves`. The store is
+    either a StationStore object or its path, which is opened once per
+    process.
+    """
+    if not isinstance(store, StationStore):
+        store = _open_store(store)
+    return store.read(station_id, variables)
+
+
+def _open_store(path):
+    """Return a single StationStore object per file version and process."""
+    stat = os.stat(path)
+    return _open_store_version(os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=16)
+def _open_store_version(path, mtime_ns, size):
+    return StationStore(path)
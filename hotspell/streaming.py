@@ -0,0 +1,150 @@
+from itertools import groupby
+from operator import itemgetter
+
+import pandas as pd
+
+from .cache import _get_cache
+from .heatwaves import (
+    HeatWaves,
+    _compute_daily_thresholds,
+    _extend_plus_minus_one_month,
+)
+from .incremental import HeatWaveMonitor
+from .indices import _check_single_variable_index
+from .metrics import _metric_names
+from .thresholds import _create_daily_windows
+from .utils import LAYOUTS, _compute_overall_mean, _iter_station_data
+
+
+def get_heatwaves_streaming(
+    filename,
+    hw_index,
+    ref_years=("1961-01-01", "1990-12-31"),
+    summer_months=(6, 7, 8),
+    max_missing_days_pct=10,
+    metrics=True,
+    cache_dir=None,
+    chunk_years=10,
+    layout="station",
+):
+    """
+    Detect heat wave events from a station file that is read in chunks.
+
+    The file is read twice, a few years at a time. The first pass keeps only
+    the reference period, from which the daily thresholds are computed. The
+    second pass detects the heat waves of each chunk, carrying a heat wave
+    that is ongoing at the end of a chunk over to the next one, and updates
+    the annual metrics. The memory needed is bounded by the size of a chunk
+    and of the reference period instead of the length of the record. The
+    output is identical to that of `get_heatwaves`.
+
+    A file may also hold many stations, one after another, such as an
+    archive of concatenated station files. The stations are then processed
+    one at a time, and only their daily thresholds are kept between the two
+    passes, so the memory needed does not grow with the size of the file.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The path of the csv file that contains the weather data, in the
+        format of `get_heatwaves`. The years of each station should be in
+        increasing order.
+    hw_index : HeatWaveIndex
+        An HeatWaveIndex object created using the `index` function.
+    ref_years : tuple of str, default ("1961-01-01", "1990-12-31")
+        The first and the last year of the reference period. It should be set
+        using the "YYYY-MM-DD" format.
+    summer_months : tuple of int or None, default (6, 7, 8)
+        A tuple with all months of the summer period. For the southern
+        hemisphere it should be set as (12, 1, 2) or similar variants.
+    max_missing_days_pct : int, default 10
+        The percentage of maximum missing days for a year to be considered
+        valid and be included in the metrics. If a summer period has been
+        defined the percentage corresponds only to this period.
+    metrics : bool or list of str, default True
+        If True, annual metrics are computed. A list of metric names computes
+        only these metrics.
+    cache_dir : str, path object or ThresholdCache, default None
+        A folder where daily thresholds are cached (see `get_heatwaves`).
+    chunk_years : int, default 10
+        The number of years of each chunk.
+    layout : {"station", "long", "concatenated"}, default "station"
+        The layout of the file. "station" is the file of a single station.
+        "long" is the long format of `get_heatwaves_long`, whose first column
+        is the station id, with the rows of each station next to each other.
+        "concatenated" is a file of many stations without ids, where a new
+        station starts whenever the dates start again; the stations are
+        numbered from 0 in order of appearance.
+
+    Returns
+    -------
+    HeatWaves object
+        For "long" and "concatenated" files, the events and metrics of all
+        stations, with the station id as the first level of their index.
+    """
+    _check_single_variable_index(hw_index, "get_heatwaves_streaming")
+    if layout not in LAYOUTS:
+        raise ValueError(f"layout should be one of {', '.join(LAYOUTS)}.")
+    ref_start, ref_end = pd.Timestamp(ref_years[0]), pd.Timestamp(ref_years[-1])
+    daily_windows = _create_daily_windows(hw_index.window_length)
+    cache = _get_cache(cache_dir)
+    metric_names = _metric_names(metrics)
+
+    # The thresholds of each station, from the chunks of its reference period
+    references = {}
+    for station, chunks in groupby(
+        _iter_station_data(
+            filename,
+            hw_index.var,
+            chunk_years,
+            years=(ref_start.year, ref_end.year),
+            layout=layout,
+        ),
+        key=itemgetter(0),
+    ):
+        timeseries_ref_period = pd.concat(
+            [chunk.loc[ref_start:ref_end] for _, chunk in chunks]
+        ).sort_index()
+        daily_thresholds = _compute_daily_thresholds(
+            daily_windows=daily_windows,
+            timeseries_ref_period=timeseries_ref_period,
+            hw_index=hw_index,
+            summer_months=_extend_plus_minus_one_month(summer_months),
+            cache=cache,
+        )
+        references[station] = (
+            daily_thresholds,
+            _compute_overall_mean(timeseries_ref_period, summer_months),
+        )
+    if not references:
+        raise ValueError("There are no data in the reference period.")
+
+    station_ids = []
+    results = []
+    for station, chunks in groupby(
+        _iter_station_data(filename, hw_index.var, chunk_years, layout=layout),
+        key=itemgetter(0),
+    ):
+        if station not in references:
+            raise ValueError(
+                f"There are no data in the reference period of station {station}."
+            )
+        daily_thresholds, ref_period_mean = references.pop(station)
+        monitor = HeatWaveMonitor(
+            hw_index=hw_index,
+            thresholds=daily_thresholds,
+            ref_period_mean=ref_period_mean,
+            ref_end=None,
+            summer_months=summer_months,
+            max_missing_days_pct=max_missing_days_pct,
+            metrics=metric_names,
+        )
+        for _, chunk in chunks:
+            monitor._process(monitor._to_daily_timeseries(chunk))
+        station_ids.append(station)
+        results.append(monitor._create_output())
+
+    if layout == "station":
+        return results[0]
+    output = HeatWaves.concat(results, station_ids)
+    return output
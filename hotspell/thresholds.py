@@ -0,0 +1,333 @@
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+DAYS_IN_LEAP_YEAR = 366
+MAX_BATCH_VALUES = 2**23
+
+# First day (0-based) of each month in a leap year, e.g. March starts at 60
+_MONTH_STARTS = np.array([0, 31, 60, 91, 121, 152, 182, 213, 244, 274, 305, 335])
+
+
+def _day_of_year(index):
+    """
+    Map dates to their day of the year in a leap year calendar.
+
+    The 29th of February is always day 59, so that a given calendar day has
+    the same position in every year.
+
+    Parameters
+    ----------
+    index : DatetimeIndex
+
+    Returns
+    -------
+    ndarray of int
+        Values between 0 and 365.
+    """
+    return _MONTH_STARTS[index.month.values - 1] + index.day.values - 1
+
+
+def _summer_days_mask(summer_months):
+    """
+    Flag the days of a leap year that fall within the summer months.
+
+    Parameters
+    ----------
+    summer_months : tuple of int or None
+        If None, all days are flagged.
+
+    Returns
+    -------
+    ndarray of bool
+        An array of length 366.
+    """
+    if not summer_months:
+        return np.ones(DAYS_IN_LEAP_YEAR, dtype=bool)
+    months = np.searchsorted(_MONTH_STARTS, np.arange(DAYS_IN_LEAP_YEAR), "right")
+    return np.isin(months, summer_months)
+
+
+def _reference_matrix(timeseries_ref_period):
+    """
+    Reshape the reference period into a (year x day of year) matrix.
+
+    Days that are missing from the data, including the 29th of February of
+    non-leap years, are set to NaN.
+
+    Parameters
+    ----------
+    timeseries_ref_period : DataFrame
+        The weather data for the reference period, with a DateTime Index and a
+        "var" column.
+
+    Returns
+    -------
+    ndarray
+        An array of shape (number of years, 366).
+    """
+    return _reference_array(
+        timeseries_ref_period.index, timeseries_ref_period["var"].values
+    )
+
+
+def _reference_array(dates, values):
+    """
+    Reshape daily values into a (year x day of year) array.
+
+    Parameters
+    ----------
+    dates : DatetimeIndex
+    values : ndarray
+        An array whose first axis corresponds to `dates`. Any other axes (e.g.
+        grid cells) are kept as trailing axes.
+
+    Returns
+    -------
+    ndarray
+        An array of shape (number of years, 366, *values.shape[1:]).
+    """
+    years = dates.year.values
+    if len(years) == 0:
+        return np.full((0, DAYS_IN_LEAP_YEAR, *values.shape[1:]), np.nan)
+    rows = years - years.min()
+    array = np.full((rows.max() + 1, DAYS_IN_LEAP_YEAR, *values.shape[1:]), np.nan)
+    array[rows, _day_of_year(dates)] = values
+    return array
+
+
+@lru_cache(maxsize=32)
+def _create_daily_windows(window_length):
+    """
+    List for each day of the year the days within a window around this day.
+
+    The windows are computed once per window length and are shared between
+    calls, so the returned array is read-only.
+
+    Parameters
+    ----------
+    window_length : int
+        The length in days of the moving window, centered around a given day.
+
+    Returns
+    -------
+    ndarray of int16
+        An array of shape (366, 2 * (window_length // 2) + 1), whose rows hold
+        the days of the year (0-365) within the window of each day of a leap
+        year.
+    """
+    days = window_length // 2
+    dates = np.arange("1972-01-01", "1973-01-01", dtype="datetime64[D]")
+    windows = (dates[:, np.newaxis] + np.arange(-days, days + 1)).ravel()
+    daily_windows = (
+        _day_of_year(pd.DatetimeIndex(windows))
+        .astype("int16")
+        .reshape(DAYS_IN_LEAP_YEAR, -1)
+    )
+    daily_windows.flags.writeable = False
+    return daily_windows
+
+
+def _compute_percentile_thresholds(ref_matrix, window_indices, pct, days_mask):
+    """
+    Compute the percentile of the values within each daily window.
+
+    Days are processed in batches, so that the gathered window values never
+    exceed `MAX_BATCH_VALUES` elements.
+
+    Parameters
+    ----------
+    ref_matrix : ndarray
+        The output of `_reference_matrix` or `_reference_array`.
+    window_indices : ndarray of int
+        The output of `_create_daily_windows`.
+    pct : int or float
+    days_mask : ndarray of bool
+        The days of the year for which a threshold is computed.
+
+    Returns
+    -------
+    ndarray
+        An array of shape (366, *ref_matrix.shape[2:]). Days outside
+        `days_mask` are set to NaN.
+    """
+    n_years, _, *cells = ref_matrix.shape
+    thresholds = np.full((DAYS_IN_LEAP_YEAR, *cells), np.nan)
+    days = np.flatnonzero(days_mask)
+    n_values = n_years * window_indices.shape[1] * int(np.prod(cells))
+    batch_size = max(1, MAX_BATCH_VALUES // max(1, n_values))
+
+    for start in range(0, len(days), batch_size):
+        batch = days[start : start + batch_size]
+        values = ref_matrix[:, window_indices[batch]]
+        # (years, days, window, *cells) -> (days * cells, years * window)
+        values = np.moveaxis(values, (0, 2), (-2, -1)).reshape(
+            -1, n_years * window_indices.shape[1]
+        )
+        thresholds[batch] = _nanpercentile_rows(values, pct).reshape(len(batch), *cells)
+    return thresholds
+
+
+def _compute_bootstrap_thresholds(ref_matrix, window_indices, pct, days_mask):
+    """
+    Compute the thresholds of the years of the reference period by bootstrap.
+
+    The thresholds of a year of the reference period (in-base) are biased,
+    because the year's own values are part of the sample of the percentile.
+    Following Zhang et al. (2005), the year is removed from the reference
+    period and replaced in turn by each of the other years, and a percentile
+    is computed from each of these n - 1 resampled periods. The threshold of
+    the year is the mean of these percentiles.
+
+    Each resampled period differs from the whole reference period by at most
+    one year of values, so its order statistics are found among a few ranks of
+    the sorted values of the whole period. Instead of sorting each resampled
+    period, the values of each day are sorted once and the order statistics
+    of all resampled periods are looked up together, from the number of
+    values of each year up to every rank. Days are processed in batches, as
+    in `_compute_percentile_thresholds`.
+
+    Parameters
+    ----------
+    ref_matrix : ndarray
+        The output of `_reference_matrix`, of shape (years, 366).
+    window_indices : ndarray of int
+        The output of `_create_daily_windows`.
+    pct : int or float
+    days_mask : ndarray of bool
+        The days of the year for which a threshold is computed.
+
+    Returns
+    -------
+    ndarray
+        An array of shape (years, 366) with the thresholds of each year of the
+        reference period. Days outside `days_mask` are set to NaN.
+    """
+    n_years = ref_matrix.shape[0]
+    if n_years < 2:
+        raise ValueError("The bootstrap requires a reference period of two years.")
+
+    window = window_indices.shape[1]
+    offsets = np.arange(-window, window + 1)
+    thresholds = np.full((n_years, DAYS_IN_LEAP_YEAR), np.nan)
+    days = np.flatnonzero(days_mask)
+    # Several arrays of the size of the candidate ranks are alive at once
+    batch_size = max(1, MAX_BATCH_VALUES // 4 // (n_years**2 * len(offsets)))
+
+    for start in range(0, len(days), batch_size):
+        batch = days[start : start + batch_size]
+        # (years, days, window) -> (days, years * window)
+        values = np.moveaxis(ref_matrix[:, window_indices[batch]], 0, 1)
+        year_counts = np.count_nonzero(~np.isnan(values), axis=2)
+        values = values.reshape(len(batch), -1)
+        order = np.argsort(values, axis=1, kind="stable")
+        sorted_values = np.take_along_axis(values, order, axis=1)
+
+        # The number of values of each year up to each rank; NaNs are last
+        cumulative = np.cumsum(
+            order[:, np.newaxis, :] // window == np.arange(n_years)[:, np.newaxis],
+            axis=2,
+            dtype=np.int32,
+        )
+        # The size of the period without year j (axis 1) and with year k twice
+        # (axis 2)
+        total = year_counts.sum(axis=1)
+        sizes = (
+            total[:, np.newaxis, np.newaxis]
+            - year_counts[:, :, np.newaxis]
+            + year_counts[:, np.newaxis, :]
+        )
+        positions = (sizes - 1) * (pct / 100)
+        lower = np.floor(positions).astype(np.int32)
+        upper = np.minimum(lower + 1, sizes - 1)
+
+        lower_values, upper_values = (
+            _resampled_order_statistic(ranks, cumulative, sorted_values, total, offsets)
+            for ranks in (lower, upper)
+        )
+        percentiles = lower_values + (upper_values - lower_values) * (positions - lower)
+        percentiles[(sizes == 0) | np.eye(n_years, dtype=bool)] = np.nan
+
+        valid = ~np.isnan(percentiles)
+        counts = valid.sum(axis=2)
+        with np.errstate(invalid="ignore"):
+            mean = np.where(valid, percentiles, 0).sum(axis=2) / counts
+        thresholds[:, batch] = mean.T
+    return thresholds
+
+
+def _resampled_order_statistic(ranks, cumulative, sorted_values, total, offsets):
+    """
+    Find the order statistics of resampled periods among the sorted values.
+
+    The resampled period (j, k) contains the values of all years except year
+    j, and the values of year k twice. Its number of values up to a rank r of
+    the sorted values of all years is r + 1 - cumulative[j, r] +
+    cumulative[k, r]. The order statistic of rank q is the value of the first
+    rank for which this number exceeds q, which is within `offsets` of q.
+
+    Parameters
+    ----------
+    ranks : ndarray of int
+        The rank of the order statistic of each resampled period, of shape
+        (days, years, years).
+    cumulative : ndarray of int
+        The number of values of each year up to each rank, of shape (days,
+        years, values).
+    sorted_values : ndarray
+        The sorted values of each day, of shape (days, values).
+    total : ndarray of int
+        The number of values (excluding NaNs) of each day.
+    offsets : ndarray of int
+
+    Returns
+    -------
+    ndarray
+        An array of the shape of `ranks`.
+    """
+    n_days, n_years = cumulative.shape[:2]
+    day = np.arange(n_days)[:, np.newaxis, np.newaxis, np.newaxis]
+    removed = np.arange(n_years)[:, np.newaxis, np.newaxis]
+    added = np.arange(n_years)[:, np.newaxis]
+
+    candidates = np.clip(
+        ranks[..., np.newaxis] + offsets,
+        0,
+        np.maximum(total - 1, 0)[:, np.newaxis, np.newaxis, np.newaxis],
+    )
+    counts = (
+        candidates
+        + 1
+        - cumulative[day, removed, candidates]
+        + cumulative[day, added, candidates]
+    )
+    first = np.argmax(counts > ranks[..., np.newaxis], axis=-1)
+    found = np.take_along_axis(candidates, first[..., np.newaxis], axis=-1)[..., 0]
+    return sorted_values[day[..., 0], found]
+
+
+def _nanpercentile_rows(values, pct):
+    """
+    Compute the percentile of each row, ignoring NaNs.
+
+    Equivalent to `np.nanpercentile(values, pct, axis=1)`, but rows with the
+    same number of valid values are computed together instead of one by one.
+
+    Parameters
+    ----------
+    values : ndarray
+        A 2-D array.
+    pct : int or float
+
+    Returns
+    -------
+    ndarray
+    """
+    values = np.sort(values, axis=1)
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    result = np.full(len(values), np.nan)
+    for count in np.unique(counts[counts > 0]):
+        rows = counts == count
+        result[rows] = np.percentile(values[rows, :count], pct, axis=1)
+    return result
@@ -1,20 +1,23 @@
 from calendar import monthrange
 from datetime import date
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
 
+COLUMNS = ["year", "month", "day", "tmin", "tmax"]
+LONG_COLUMNS = ["station", *COLUMNS]
+# The layouts of the files that are read by `get_heatwaves_streaming`
+LAYOUTS = ("station", "long", "concatenated")
+DATE_DTYPES = {"year": "int16", "month": "int8", "day": "int8"}
+DAYS_IN_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
 
 def _compute_overall_mean(timeseries, summer_months):
     if summer_months is None:
-        mean = timeseries.mean().round(1)[0]
+        mean = timeseries.mean().round(1).iloc[0]
     else:
-        mean = (
-            _keep_only_summer(timeseries, summer_months)
-            .mean()
-            .round(1)
-            .iloc[0]
-        )
+        mean = _keep_only_summer(timeseries, summer_months).mean().round(1).iloc[0]
     return mean
 
 
@@ -30,20 +33,280 @@ def _import_data(filename, var, years=None):
     filename : str or path object
         The path of the csv file that contains the weather data. It requires
         specific columns to be included in the csv file in a specific order.
-    var : str, one of 'tmin', 'tmax'
-        The meteorological variable to keep.
+    var : str, one of 'tmin', 'tmax', or list of str
+        The meteorological variable to keep. If a single variable is given it
+        is stored in the column "var", otherwise each variable is stored in a
+        column with its own name.
     years : tuple(int, int)
 
     Returns
     -------
     DataFrame
     """
-    df = pd.read_csv(filename, header=None, index_col=None)
+    variables = [var] if isinstance(var, str) else list(var)
+    df = pd.read_csv(
+        filename,
+        header=None,
+        index_col=None,
+        names=COLUMNS,
+        usecols=[*COLUMNS[:3], *variables],
+        dtype={**DATE_DTYPES, **{variable: "float64" for variable in variables}},
+    )
     df = _preprocess_data(df, var, years)
 
     return df
 
 
+def _import_long_data(data, var):
+    """
+    Read the weather data of multiple stations in long format.
+
+    The rows of each station are made contiguous (if they are not already)
+    with a single stable sort, so the data of a station can be taken as a
+    slice of the output without copying it.
+
+    Parameters
+    ----------
+    data : str, path object or DataFrame
+        The path of a csv file without a header, whose columns are the station
+        id followed by the columns of `_import_data`, or a DataFrame with the
+        columns "station", "year", "month", "day" and `var`.
+    var : str, one of 'tmin', 'tmax', or list of str
+
+    Returns
+    -------
+    station_ids : list
+        The station ids, in order of first appearance.
+    starts : ndarray of int
+        The first row of each station in `timeseries`, followed by the number
+        of rows.
+    timeseries : DataFrame
+        The data of all stations, as in the output of `_import_data`.
+    """
+    variables = [var] if isinstance(var, str) else list(var)
+    if isinstance(data, pd.DataFrame):
+        df = data[["station", *COLUMNS[:3], *variables]]
+    else:
+        df = pd.read_csv(
+            data,
+            header=None,
+            index_col=None,
+            names=LONG_COLUMNS,
+            usecols=LONG_COLUMNS[:4] + variables,
+            dtype={
+                "station": str,
+                **DATE_DTYPES,
+                **{variable: "float64" for variable in variables},
+            },
+        )
+    if len(df) == 0:
+        raise ValueError("No station data were found.")
+
+    codes, station_ids = pd.factorize(df["station"])
+    changes = np.flatnonzero(codes[1:] != codes[:-1]) + 1
+    if len(changes) + 1 != len(station_ids):
+        order = np.argsort(codes, kind="stable")
+        df = df.take(order)
+        changes = np.flatnonzero(np.diff(codes[order])) + 1
+
+    starts = np.concatenate([[0], changes, [len(df)]])
+    timeseries = _preprocess_data(df, var, None)
+    return list(station_ids), starts, timeseries
+
+
+def _iter_data(filename, var, chunk_years, years=None, chunk_rows=2**16):
+    """
+    Read the weather data from a csv file in chunks of whole years.
+
+    The file is read `chunk_rows` lines at a time, so the memory needed is
+    bounded by the size of a chunk instead of the size of the file. The years
+    of the file should be in increasing order.
+
+    Parameters
+    ----------
+    filename : str or path object
+        The path of the csv file, in the format of `_import_data`.
+    var : str, one of 'tmin', 'tmax', or list of str
+    chunk_years : int
+        The number of years of each chunk.
+    years : tuple(int, int), optional
+        The first and the last year to read. Chunks outside these years are
+        skipped and reading stops after the last year.
+    chunk_rows : int, default 65536
+        The number of lines read at a time.
+
+    Yields
+    ------
+    DataFrame
+        The data of `chunk_years` years, as in the output of `_import_data`.
+    """
+    for _, chunk in _iter_station_data(
+        filename, var, chunk_years, years=years, chunk_rows=chunk_rows
+    ):
+        yield chunk
+
+
+def _iter_station_data(
+    filename, var, chunk_years, years=None, chunk_rows=2**16, layout="station"
+):
+    """
+    Read the weather data of one or more stations from a csv file in chunks of
+    whole years.
+
+    The stations of the file are read one after another, so the memory needed
+    is bounded by the size of a chunk, whatever the number of stations. The
+    years of each station should be in increasing order.
+
+    Parameters
+    ----------
+    filename : str or path object
+    var : str, one of 'tmin', 'tmax', or list of str
+    chunk_years : int
+        The number of years of each chunk.
+    years : tuple(int, int), optional
+        The first and the last year to read. Chunks outside these years are
+        skipped.
+    chunk_rows : int, default 65536
+        The number of lines read at a time.
+    layout : {"station", "long", "concatenated"}, default "station"
+        The layout of the file (see `LAYOUTS`). A new station starts where
+        the station id changes, for "long", or where the dates start again,
+        for "concatenated".
+
+    Yields
+    ------
+    station : int or str
+        The station id for "long", otherwise the number of the station in the
+        file, starting from 0.
+    chunk : DataFrame
+        The data of `chunk_years` years of the station, as in the output of
+        `_import_data`.
+    """
+    variables = [var] if isinstance(var, str) else list(var)
+    columns = LONG_COLUMNS if layout == "long" else COLUMNS
+    dtype = {**DATE_DTYPES, **{variable: "float64" for variable in variables}}
+    if layout == "long":
+        dtype["station"] = str
+    reader = pd.read_csv(
+        filename,
+        header=None,
+        index_col=None,
+        names=columns,
+        usecols=[*columns[:-2], *variables],
+        dtype=dtype,
+        chunksize=chunk_rows,
+    )
+
+    stations = []
+    buffer = None
+    last_year = None
+    previous = None
+    # Whether the rest of the current station is after the last year
+    skip = False
+    with reader:
+        for chunk in reader:
+            starts = _station_starts(chunk, layout, previous)
+            previous = chunk.iloc[-1:]
+            positions = np.unique([0, *starts, len(chunk)])
+            for begin, end in zip(positions[:-1], positions[1:]):
+                rows = chunk.iloc[begin:end]
+                if begin in starts:
+                    if buffer is not None and not skip:
+                        last_chunk = _last_chunk(buffer, var, years)
+                        if last_chunk is not None:
+                            yield stations[-1], last_chunk
+                    station = (
+                        rows["station"].iloc[0] if layout == "long" else len(stations)
+                    )
+                    if station in stations:
+                        raise ValueError(
+                            f"The rows of station {station} should be contiguous."
+                        )
+                    stations.append(station)
+                    buffer = None
+                    last_year = None
+                    skip = False
+                elif skip:
+                    continue
+
+                if buffer is None:
+                    buffer = rows
+                else:
+                    buffer = pd.concat([buffer, rows], ignore_index=True)
+                buffer_years = buffer["year"].values
+                if (np.diff(buffer_years) < 0).any() or (
+                    last_year is not None and buffer_years[0] <= last_year
+                ):
+                    raise ValueError("The years of the data should be in order.")
+
+                while buffer_years[-1] >= buffer_years[0] + chunk_years:
+                    if years is not None and buffer_years[0] > years[-1]:
+                        if layout == "station":
+                            return
+                        skip = True
+                        break
+                    split = np.searchsorted(buffer_years, buffer_years[0] + chunk_years)
+                    last_year = buffer_years[split - 1]
+                    if years is None or last_year >= years[0]:
+                        yield stations[-1], _preprocess_data(
+                            buffer.iloc[:split], var, None
+                        )
+                    buffer = buffer.iloc[split:]
+                    buffer_years = buffer_years[split:]
+
+    if buffer is not None and not skip:
+        last_chunk = _last_chunk(buffer, var, years)
+        if last_chunk is not None:
+            yield stations[-1], last_chunk
+
+
+def _station_starts(chunk, layout, previous):
+    """
+    Find the rows of a chunk of a file where a new station starts.
+
+    Parameters
+    ----------
+    chunk : DataFrame
+        The rows of the file, as read by `_iter_station_data`.
+    layout : {"station", "long", "concatenated"}
+    previous : DataFrame or None
+        The last row of the previous chunk, or None for the first chunk.
+
+    Returns
+    -------
+    ndarray of int
+    """
+    if layout == "long":
+        ids = chunk["station"].values
+        new = ids[1:] != ids[:-1]
+        first = previous is None or ids[0] != previous["station"].iloc[0]
+    elif layout == "concatenated":
+        keys = _date_keys(chunk)
+        new = keys[1:] <= keys[:-1]
+        first = previous is None or keys[0] <= _date_keys(previous)[0]
+    else:
+        new = np.zeros(len(chunk) - 1, dtype=bool)
+        first = previous is None
+    return np.flatnonzero(np.concatenate([[first], new]))
+
+
+def _date_keys(df):
+    """The dates of the rows as integers, in the YYYYMMDD form."""
+    return (
+        df["year"].values.astype("int64") * 10000
+        + df["month"].values.astype("int64") * 100
+        + df["day"].values
+    )
+
+
+def _last_chunk(buffer, var, years):
+    """The rest of the data of a station, if it overlaps with `years`."""
+    buffer_years = buffer["year"].values
+    if years is None or (buffer_years[-1] >= years[0] and buffer_years[0] <= years[-1]):
+        return _preprocess_data(buffer, var, None)
+    return None
+
+
 def _keep_only_summer(df, summer_months):
     """
     Keep only the summer period.
@@ -61,15 +324,6 @@ def _keep_only_summer(df, summer_months):
     return df.loc[df.index.month.isin(summer_months)].copy()
 
 
-def _keep_or_drop_year(df, max_missing_days_per_year):
-    df_missing = df.isna().groupby(df.index.year).sum()
-    df_missing.columns = ["missing_days"]
-    df_keep = df_missing.iloc[
-        np.where(df_missing["missing_days"] < max_missing_days_per_year)
-    ]
-    return df_keep
-
-
 def _percent_of_days_to_days(days_percent, summer_months):
     if summer_months:
         months = list(summer_months)
@@ -86,20 +340,15 @@ def _percent_of_days_to_days(days_percent, summer_months):
 
 
 def _preprocess_data(df, var, years):
-    if var == "tmax":
-        df = df.drop(columns=[3])
-    elif var == "tmin":
-        df = df.drop(columns=[4])
-    df.columns = ["year", "month", "day", "var"]
-
-    df["date"] = (
-        df["year"].astype(str)
-        + df["month"].astype(str).str.zfill(2)
-        + df["day"].astype(str).str.zfill(2)
+    if isinstance(var, str):
+        df = df.rename(columns={var: "var"})
+        variables = ["var"]
+    else:
+        variables = list(var)
+
+    df = df[variables].set_index(
+        _dates_from_components(df["year"], df["month"], df["day"])
     )
-    df = df[["date", "var"]]
-    df["date"] = pd.to_datetime(df["date"], format="%Y%m%d")
-    df.set_index("date", inplace=True)
 
     df.index.names = ["index"]
 
@@ -107,3 +356,51 @@ def _preprocess_data(df, var, years):
         df = df.loc[years[0] : years[-1]]
 
     return df
+
+
+def _dates_from_components(year, month, day):
+    """
+    Build dates from their year, month and day without parsing strings.
+
+    Parameters
+    ----------
+    year, month, day : Series or ndarray of int
+
+    Returns
+    -------
+    DatetimeIndex
+    """
+    year = np.asarray(year, dtype="int64")
+    month = np.asarray(month, dtype="int64")
+    day = np.asarray(day, dtype="int64")
+
+    invalid = (month < 1) | (month > 12) | (day < 1)
+    invalid |= day > _days_in_month(year, month.clip(1, 12))
+    if invalid.any():
+        row = np.flatnonzero(invalid)[0]
+        raise ValueError(
+            f"Invalid date {year[row]}-{month[row]}-{day[row]} in line {row + 1}."
+        )
+
+    # Days since 1970-01-01 of the proleptic Gregorian calendar, counting the
+    # years from March so that the leap day is the last day of the year
+    shifted_year = year - (month <= 2)
+    era = shifted_year // 400
+    year_of_era = shifted_year - era * 400
+    day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+
+    dates = pd.DatetimeIndex(days.astype("datetime64[D]"))
+    return dates.as_unit(_datetime_unit())
+
+
+def _days_in_month(year, month):
+    is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+    return DAYS_IN_MONTH[month - 1] + ((month == 2) & is_leap)
+
+
+@lru_cache(maxsize=None)
+def _datetime_unit():
+    """Return the resolution that pandas uses for parsed dates."""
+    return pd.to_datetime(["1970-01-01"]).unit
@@ -11,8 +11,9 @@ setup(
     description="Detect heat waves from weather station data",
     author="Ilias Agathangelidis",
     packages=["hotspell"],
-    package_data={"hotspell": ["datasets/*.pickle"]},
+    package_data={"hotspell": ["datasets/*.csv"]},
     install_requires=["numpy", "pandas"],
+    entry_points={"console_scripts": ["hotspell=hotspell.cli:main"]},
     long_description=long_description,
     long_description_content_type="text/x-rst",
     include_package_data=True,
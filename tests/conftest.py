@@ -0,0 +1,71 @@
+import shutil
+from importlib.resources import files
+
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def station_dir(tmp_path):
+    """A folder with the bundled datasets as the stations "athens" and "sydney"."""
+    stations = tmp_path / "stations"
+    stations.mkdir()
+    for station, dataset in [
+        ("athens", "test_input.csv"),
+        ("sydney", "test_input_southern_hem.csv"),
+    ]:
+        shutil.copy(
+            str(files("hotspell") / "datasets" / dataset), stations / f"{station}.csv"
+        )
+    return stations
+
+
+@pytest.fixture
+def synthetic_station(tmp_path):
+    """
+    Create the csv files of synthetic stations in `tmp_path`.
+
+    The fixture is a function that writes the file "<name>.csv" and returns
+    its data. The maximum temperature is a seasonal cycle plus random
+    anomalies, which are autocorrelated if `ar_coef` is set, and the minimum
+    temperature is about 10 degrees lower. Some days are missing values and
+    some are dropped from the file.
+    """
+
+    def synthetic_station(
+        name="station",
+        first_year=1961,
+        last_year=2000,
+        seed=0,
+        missing_pct=3,
+        dropped_pct=3,
+        ar_coef=0,
+    ):
+        rng = np.random.default_rng(seed)
+        dates = pd.date_range(f"{first_year}-01-01", f"{last_year}-12-31", freq="D")
+        season = 8 * np.cos(2 * np.pi * (dates.dayofyear.values - 200) / 365.25)
+        anomaly = rng.normal(0, 3, len(dates))
+        if ar_coef:
+            for day in range(1, len(dates)):
+                anomaly[day] += ar_coef * anomaly[day - 1]
+        tmax = np.round(28 + season + anomaly, 1)
+        tmin = np.round(tmax - rng.normal(10, 2, len(dates)), 1)
+        missing = rng.random(len(dates)) < missing_pct / 100
+        tmax[missing] = np.nan
+        tmin[missing] = np.nan
+
+        df = pd.DataFrame(
+            {
+                "year": dates.year,
+                "month": dates.month,
+                "day": dates.day,
+                "tmin": tmin,
+                "tmax": tmax,
+            }
+        )
+        df = df.sample(frac=1 - dropped_pct / 100, random_state=seed).sort_index()
+        df.to_csv(tmp_path / f"{name}.csv", header=False, index=False)
+        return df
+
+    return synthetic_station
@@ -0,0 +1,72 @@
+import os
+from importlib.resources import files
+
+import numpy as np
+import pandas as pd
+
+import hotspell.heatwaves
+from hotspell.cache import MemoryThresholdCache, ThresholdCache, _get_cache
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+
+
+def test_thresholds_loaded_from_cache(tmp_path, monkeypatch):
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    kwargs = dict(
+        hw_index=index(name="test_index"),
+        ref_years=("1970-01-01", "1971-12-31"),
+        max_missing_days_pct=100,
+        export=False,
+    )
+
+    target = get_heatwaves(filename, **kwargs)
+    get_heatwaves(filename, cache_dir=tmp_path, **kwargs)
+    assert len(os.listdir(tmp_path)) == 1
+
+    def fail(**kwargs):
+        raise AssertionError("Thresholds were computed again.")
+
+    monkeypatch.setattr(hotspell.heatwaves, "_build_quantile_indices", fail)
+    heatwaves = get_heatwaves(filename, cache_dir=tmp_path, **kwargs)
+
+    pd.testing.assert_frame_equal(heatwaves.events, target.events)
+    pd.testing.assert_frame_equal(heatwaves.metrics, target.metrics)
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    cache = ThresholdCache(tmp_path, max_size=0)
+    thresholds = np.arange(366.0)
+    for i, key in enumerate(["a", "b", "c"]):
+        cache.save(key, thresholds)
+        os.utime(tmp_path / f"{key}.npy", (i, i))
+    cache.max_size = 2 * os.path.getsize(tmp_path / "a.npy")
+
+    cache.load("a")
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == ["a.npy", "c.npy"]
+    assert np.array_equal(cache.load("a"), thresholds) is True
+
+
+def test_memory_cache_evicts_least_recently_used_entries():
+    thresholds = np.arange(366.0)
+    cache = MemoryThresholdCache(max_size=2 * thresholds.nbytes)
+    cache.save("a", thresholds)
+    cache.save("b", thresholds)
+
+    cache.load("a")
+    cache.save("c", thresholds)
+
+    assert cache.load("b") is None
+    assert cache.load("a") is thresholds
+    assert len(cache) == 2
+    assert cache.nbytes == 2 * thresholds.nbytes
+
+
+def test_memory_cache_is_not_a_disk_cache():
+    cache = MemoryThresholdCache()
+
+    assert not isinstance(cache, ThresholdCache)
+    assert not hasattr(cache, "cache_dir") and not hasattr(cache, "_path")
+    assert _get_cache(cache) is cache
+    cache.evict()
@@ -0,0 +1,158 @@
+import pandas as pd
+import pytest
+
+from hotspell.cli import main
+from hotspell.export import read_dataset
+from hotspell.heatwaves import get_heatwaves_many
+from hotspell.indices import index
+from hotspell.long_format import get_heatwaves_long
+from hotspell.store import create_store
+
+REF_YEARS = ["1970-01-01", "1971-12-31"]
+
+
+def test_station_files(station_dir, tmp_path, capsys):
+    output = tmp_path / "output"
+
+    status = main(
+        [
+            str(station_dir / "*.csv"),
+            "--index",
+            "ctx90pct",
+            "--ref-years",
+            *REF_YEARS,
+            "--jobs",
+            "2",
+            "--format",
+            "npz",
+            "--output",
+            str(output),
+        ]
+    )
+
+    expected = get_heatwaves_many(
+        station_dir, index("ctx90pct"), ref_years=tuple(REF_YEARS)
+    )
+    assert status == 0
+    pd.testing.assert_frame_equal(read_dataset(output), expected.events)
+    pd.testing.assert_frame_equal(read_dataset(output, "metrics"), expected.metrics)
+    summary = capsys.readouterr().out
+    assert summary.startswith("2 stations")
+    assert "thresholds" in summary and "export" in summary
+
+
+def test_existing_dataset_is_replaced(station_dir, tmp_path):
+    output = tmp_path / "output"
+    get_heatwaves_many(
+        station_dir, index("ctx90pct"), ref_years=tuple(REF_YEARS), dataset_dir=output
+    )
+
+    main(
+        [
+            str(station_dir / "athens.csv"),
+            "--index",
+            "ctx90pct",
+            "--ref-years",
+            *REF_YEARS,
+            "--output",
+            str(output),
+            "--quiet",
+        ]
+    )
+
+    expected = get_heatwaves_many(
+        [station_dir / "athens.csv"],
+        index("ctx90pct"),
+        ref_years=tuple(REF_YEARS),
+        dataset_dir=tmp_path / "expected",
+    )
+    pd.testing.assert_frame_equal(read_dataset(output), expected.events)
+    for table in ["events", "metrics"]:
+        assert (output / table / "part-0.csv").read_text() == (
+            tmp_path / "expected" / table / "part-0.csv"
+        ).read_text()
+
+
+def test_long_format_with_custom_index(station_dir, tmp_path):
+    frames = []
+    for station in ["athens", "sydney"]:
+        df = pd.read_csv(station_dir / f"{station}.csv", header=None)
+        frames.append(df.assign(station=station))
+    data = pd.concat(frames)[["station", 0, 1, 2, 3, 4]]
+    data.to_csv(tmp_path / "long.csv", header=False, index=False)
+    output = tmp_path / "output"
+
+    main(
+        [
+            "--long",
+            str(tmp_path / "long.csv"),
+            "--index",
+            "hw95",
+            "--var",
+            "tmin",
+            "--pct",
+            "95",
+            "--min-duration",
+            "2",
+            "--window-length",
+            "7",
+            "--ref-years",
+            *REF_YEARS,
+            "--no-metrics",
+            "--quiet",
+            "--format",
+            "npz",
+            "--output",
+            str(output),
+        ]
+    )
+
+    hw_index = index(name="hw95", var="tmin", pct=95, min_duration=2, window_length=7)
+    expected = get_heatwaves_long(
+        str(tmp_path / "long.csv"), hw_index, ref_years=tuple(REF_YEARS), metrics=False
+    )
+    pd.testing.assert_frame_equal(read_dataset(output), expected.events)
+
+
+def test_store(station_dir, tmp_path):
+    create_store(tmp_path / "stations.hss", station_dir)
+    output = tmp_path / "output"
+
+    main(
+        [
+            "sydney",
+            "--store",
+            str(tmp_path / "stations.hss"),
+            "--index",
+            "ctn90pct",
+            "--ref-years",
+            *REF_YEARS,
+            "--quiet",
+            "--format",
+            "npz",
+            "--output",
+            str(output),
+        ]
+    )
+
+    expected = get_heatwaves_many(
+        [station_dir / "sydney.csv"], index("ctn90pct"), ref_years=tuple(REF_YEARS)
+    )
+    pd.testing.assert_frame_equal(read_dataset(output), expected.events)
+    pd.testing.assert_frame_equal(read_dataset(output, "metrics"), expected.metrics)
+
+
+@pytest.mark.parametrize(
+    "arguments",
+    [
+        ["--index", "ctx90pct"],
+        ["missing/*.csv", "--index", "ctx90pct"],
+        ["stations", "--index", "hw95", "--pct", "95"],
+        ["stations", "--index", "ctx90pct", "--pct", "95"],
+    ],
+)
+def test_invalid_arguments(arguments, tmp_path):
+    with pytest.raises(SystemExit) as error:
+        main([*arguments, "--output", str(tmp_path / "output")])
+
+    assert error.value.code == 2
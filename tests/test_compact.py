@@ -0,0 +1,55 @@
+import pickle
+from importlib.resources import files
+
+import numpy as np
+import pandas as pd
+
+from hotspell.compact import _CompactFrame
+from hotspell.heatwaves import HeatWaves, get_heatwaves
+from hotspell.indices import index
+
+
+def test_compact_frame_round_trip():
+    df = pd.DataFrame(
+        {
+            "date": pd.to_datetime(["1970-06-01", "1999-08-31", "2020-07-15"]),
+            "duration": np.array([3, 12, 300], dtype="int64"),
+            "avg_tmax": np.round([38.25, -0.04, 1e-3], 1),
+            "std_tmax": [np.nan, 0.1234, 2.5],
+        },
+        index=pd.Index(np.array([1970, 1999, 2020], dtype="int32"), name="year"),
+    )
+
+    compact = _CompactFrame.from_frame(df)
+
+    assert [array.dtype for array in compact.columns] == [
+        np.dtype("int32"),
+        np.dtype("int16"),
+        np.dtype("float32"),
+        np.dtype("float64"),
+    ]
+    pd.testing.assert_frame_equal(compact.to_frame(), df)
+
+
+def test_heatwaves_concat():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    results = [
+        get_heatwaves(
+            filename,
+            index(name=name),
+            ref_years=("1970-01-01", "1971-12-31"),
+            max_missing_days_pct=100,
+            export=False,
+        )
+        for name in ["test_index", "summer_days"]
+    ]
+    results = [pickle.loads(pickle.dumps(result)) for result in results]
+
+    heatwaves = HeatWaves.concat(results, keys=["a", "b"])
+
+    for name in ["events", "metrics"]:
+        target = pd.concat(
+            [getattr(result, name) for result in results], keys=["a", "b"]
+        )
+        target.index.names = ["station", *target.index.names[1:]]
+        pd.testing.assert_frame_equal(getattr(heatwaves, name), target)
@@ -0,0 +1,122 @@
+import os
+import shutil
+from importlib.resources import files
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspell.export import _DatasetWriter, read_dataset
+from hotspell.heatwaves import get_heatwaves, get_heatwaves_many
+from hotspell.indices import index
+
+
+@pytest.mark.parametrize("export_format", ["csv", "npz", "parquet", "feather"])
+def test_export_formats(tmp_path, export_format):
+    if export_format in ["parquet", "feather"]:
+        pytest.importorskip("pyarrow")
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+
+    heatwaves = get_heatwaves(
+        filename,
+        index(name="test_index"),
+        ref_years=("1970-01-01", "1971-12-31"),
+        max_missing_days_pct=100,
+        export_format=export_format,
+        output_dir=tmp_path / "output",
+    )
+
+    assert sorted(os.listdir(tmp_path / "output")) == [
+        f"test_input_test_index_heatwaves_{table}.{export_format}"
+        for table in ["events", "metrics"]
+    ]
+    if export_format == "npz":
+        with np.load(
+            tmp_path / "output" / "test_input_test_index_heatwaves_events.npz"
+        ) as npz:
+            assert npz.files == [
+                "begin_date",
+                "end_date",
+                *heatwaves.events.columns[2:],
+            ]
+            assert np.array_equal(npz["duration"], heatwaves.events["duration"].values)
+
+
+@pytest.mark.parametrize("export_format", ["npz", "parquet"])
+def test_dataset(tmp_path, export_format):
+    if export_format == "parquet":
+        pytest.importorskip("pyarrow")
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    for station in ["station_a", "station_b"]:
+        shutil.copy(filename, tmp_path / f"{station}.csv")
+
+    heatwaves = get_heatwaves_many(
+        tmp_path,
+        index(name="test_index"),
+        ref_years=("1970-01-01", "1971-12-31"),
+        max_missing_days_pct=100,
+        export_format=export_format,
+        dataset_dir=tmp_path / "dataset",
+    )
+
+    pd.testing.assert_frame_equal(read_dataset(tmp_path / "dataset"), heatwaves.events)
+    pd.testing.assert_frame_equal(
+        read_dataset(tmp_path / "dataset", "metrics"), heatwaves.metrics
+    )
+
+
+def test_dataset_is_replaced(tmp_path):
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    for station in ["station_a", "station_b"]:
+        shutil.copy(filename, tmp_path / f"{station}.csv")
+    kwargs = dict(
+        ref_years=("1970-01-01", "1971-12-31"),
+        max_missing_days_pct=100,
+        dataset_dir=tmp_path / "dataset",
+    )
+    get_heatwaves_many(tmp_path, index(name="test_index"), **kwargs)
+    (tmp_path / "dataset" / "README").write_text("kept")
+    os.remove(tmp_path / "station_b.csv")
+
+    heatwaves = get_heatwaves_many(
+        tmp_path, index(name="ctx90pct"), export_format="npz", **kwargs
+    )
+
+    # Neither station_b nor the csv files are read again
+    pd.testing.assert_frame_equal(read_dataset(tmp_path / "dataset"), heatwaves.events)
+    assert os.listdir(tmp_path / "dataset" / "events") == ["part-0.npz"]
+    assert (tmp_path / "dataset" / "README").read_text() == "kept"
+
+
+@pytest.mark.parametrize("export_format", ["csv", "npz"])
+def test_dataset_writes_many_stations_per_file(tmp_path, export_format):
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    station_ids = ["007", "athens", "rome", "madrid", "sydney"]
+    for station in station_ids:
+        shutil.copy(filename, tmp_path / f"{station}.csv")
+    heatwaves = get_heatwaves_many(
+        [tmp_path / f"{station}.csv" for station in station_ids],
+        index(name="test_index"),
+        ref_years=("1970-01-01", "1971-12-31"),
+        max_missing_days_pct=100,
+    )
+
+    writer = _DatasetWriter(tmp_path / "dataset", export_format, stations_per_part=2)
+    for station in station_ids:
+        writer.add(
+            station,
+            heatwaves.events.loc[station],
+            heatwaves.metrics.loc[station],
+        )
+    writer.flush()
+
+    assert sorted(os.listdir(tmp_path / "dataset" / "events")) == [
+        f"part-{part}.{export_format}" for part in range(3)
+    ]
+    pd.testing.assert_frame_equal(read_dataset(tmp_path / "dataset"), heatwaves.events)
+    # csv files do not store the dtype of the years
+    pd.testing.assert_frame_equal(
+        read_dataset(tmp_path / "dataset", "metrics"),
+        heatwaves.metrics,
+        check_index_type=export_format != "csv",
+    )
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspell.grid import get_heatwaves_grid
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+
+
+@pytest.mark.parametrize(
+    "index_name, summer_months",
+    [("ctx90pct", (6, 7, 8)), ("hot_days", (6, 7, 8)), ("tx90p", (12, 1, 2))],
+)
+def test_grid_matches_stations(tmp_path, synthetic_station, index_name, summer_months):
+    cells = [
+        synthetic_station(
+            f"cell_{cell}",
+            last_year=1995,
+            seed=cell,
+            missing_pct=5,
+            dropped_pct=0,
+            ar_coef=0.7,
+        )
+        for cell in range(6)
+    ]
+    dates = pd.DatetimeIndex(pd.to_datetime(cells[0][["year", "month", "day"]]))
+    data = np.stack([df["tmax"].values for df in cells], axis=-1).reshape(-1, 2, 3)
+    hw_index = index(name=index_name)
+
+    grid = get_heatwaves_grid(
+        data, hw_index, dates=dates, summer_months=summer_months, chunk_size=4
+    )
+
+    assert grid.spatial_shape == (2, 3)
+    for cell in range(len(cells)):
+        station = get_heatwaves(
+            tmp_path / f"cell_{cell}.csv",
+            hw_index,
+            summer_months=summer_months,
+            export=False,
+        )
+
+        pd.testing.assert_frame_equal(grid.events.loc[cell], station.events)
+        metrics = pd.DataFrame(
+            {name: grid.metrics[name][:, cell] for name in station.metrics},
+            index=pd.Index(grid.years, name="year"),
+        ).loc[station.metrics.index]
+        assert np.array_equal(
+            metrics.values, station.metrics.values.astype(float), equal_nan=True
+        )
+        others = ~np.isin(grid.years, station.metrics.index)
+        assert np.isnan(grid.metrics["hwn"][others, cell]).all()
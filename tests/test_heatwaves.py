@@ -1,17 +1,22 @@
-import os
-import pkg_resources
+import shutil
+from importlib.resources import files
 
 import numpy as np
 import pandas as pd
+import pytest
 
-from hotspell.heatwaves import get_heatwaves
+from hotspell.heatwaves import (
+    _map_stations,
+    get_heatwaves,
+    get_heatwaves_indices,
+    get_heatwaves_many,
+)
+from hotspell.incremental import monitor_heatwaves
 from hotspell.indices import index
 
 
 def test_output_custom_index():
-    filename = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "test_input.csv"),
-    )
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
 
     hw_index = index(var="tmax", pct=90, min_duration=3, window_length=3,)
 
@@ -24,9 +29,7 @@ def test_output_custom_index():
     )
     hw_events = heatwaves.events.iloc[:, 2:].astype(float).values
 
-    input_file = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "target_output.csv"),
-    )
+    input_file = str(files("hotspell") / "datasets" / "target_output.csv")
     target_output = pd.read_csv(
         input_file, sep=",", skiprows=1, header=None, index_col=False
     )
@@ -36,9 +39,7 @@ def test_output_custom_index():
 
 
 def test_output_fixed_thres():
-    filename = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "test_input.csv"),
-    )
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
 
     hw_index = index(var="tmax", fixed_thres=38, min_duration=2)
 
@@ -51,9 +52,7 @@ def test_output_fixed_thres():
     )
     hw_events = heatwaves.events.iloc[:, 2:].astype(float).values
 
-    input_file = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "target_output_fixed_thres.csv"),
-    )
+    input_file = str(files("hotspell") / "datasets" / "target_output_fixed_thres.csv")
     target_output = pd.read_csv(
         input_file, sep=",", skiprows=1, header=None, index_col=False
     )
@@ -63,9 +62,7 @@ def test_output_fixed_thres():
 
 
 def test_output_predefined_index():
-    filename = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "test_input.csv"),
-    )
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
 
     index_name = "test_index"
     hw_index = index(name=index_name)
@@ -79,9 +76,7 @@ def test_output_predefined_index():
     )
     hw_events = heatwaves.events.iloc[:, 2:].astype(float).values
 
-    input_file = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "target_output.csv"),
-    )
+    input_file = str(files("hotspell") / "datasets" / "target_output.csv")
     target_output = pd.read_csv(
         input_file, sep=",", skiprows=1, header=None, index_col=False
     )
@@ -91,9 +86,7 @@ def test_output_predefined_index():
 
 
 def test_output_southern_hem_predefined_index():
-    filename = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "test_input_southern_hem.csv"),
-    )
+    filename = str(files("hotspell") / "datasets" / "test_input_southern_hem.csv")
 
     index_name = "test_index"
     hw_index = index(name=index_name)
@@ -108,12 +101,186 @@ def test_output_southern_hem_predefined_index():
     )
     hw_events = heatwaves.events.iloc[:, 2:].astype(float).values
 
-    input_file = pkg_resources.resource_filename(
-        "hotspell", os.path.join("datasets", "target_output_southern_hem.csv"),
-    )
+    input_file = str(files("hotspell") / "datasets" / "target_output_southern_hem.csv")
     target_output = pd.read_csv(
         input_file, sep=",", skiprows=1, header=None, index_col=False
     )
     target_output = target_output.iloc[:, 2:].astype(float).values
 
     assert np.array_equal(hw_events, target_output) is True
+
+
+def test_output_many_stations(tmp_path):
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    for station in ["station_a", "station_b"]:
+        shutil.copy(filename, tmp_path / f"{station}.csv")
+
+    hw_index = index(name="test_index")
+    kwargs = dict(ref_years=("1970-01-01", "1971-12-31"), max_missing_days_pct=100)
+
+    heatwaves = get_heatwaves_many(tmp_path, hw_index, n_jobs=2, **kwargs)
+    target = get_heatwaves(filename, hw_index, export=False, **kwargs)
+
+    assert list(heatwaves.events.index.unique("station")) == ["station_a", "station_b"]
+    for station in ["station_a", "station_b"]:
+        pd.testing.assert_frame_equal(heatwaves.events.loc[station], target.events)
+        pd.testing.assert_frame_equal(heatwaves.metrics.loc[station], target.metrics)
+
+
+def test_map_stations_bounds_work_in_flight():
+    consumed = []
+
+    def stations():
+        for station in range(100):
+            consumed.append(station)
+            yield station
+
+    results = _map_stations(abs, stations(), 100, n_jobs=2, chunksize=1)
+
+    assert next(results) == 0
+    assert len(consumed) <= 5
+    assert list(results) == list(range(1, 100))
+
+
+def test_output_multiple_indices():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+
+    hw_indices = [
+        index(name="test_index"),
+        index(name="custom", var="tmax", pct=90, min_duration=1, window_length=3),
+        index(name="tropical_nights"),
+    ]
+    kwargs = dict(ref_years=("1970-01-01", "1971-12-31"), max_missing_days_pct=100)
+
+    heatwaves = get_heatwaves_indices(filename, hw_indices, export=False, **kwargs)
+
+    assert list(heatwaves) == ["test_index", "custom", "tropical_nights"]
+    for hw_index in hw_indices:
+        target = get_heatwaves(filename, hw_index, export=False, **kwargs)
+        pd.testing.assert_frame_equal(heatwaves[hw_index.name].events, target.events)
+        pd.testing.assert_frame_equal(heatwaves[hw_index.name].metrics, target.metrics)
+
+
+def test_output_selected_metrics():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+
+    hw_index = index(name="test_index")
+    kwargs = dict(ref_years=("1970-01-01", "1971-12-31"), max_missing_days_pct=100)
+
+    heatwaves = get_heatwaves(
+        filename, hw_index, export=False, metrics=["hwa", "hwn"], **kwargs
+    )
+    target = get_heatwaves(filename, hw_index, export=False, **kwargs)
+
+    pd.testing.assert_frame_equal(heatwaves.metrics, target.metrics[["hwn", "hwa"]])
+
+
+def test_output_compound_index(tmp_path, synthetic_station):
+    filename = tmp_path / "station.csv"
+    synthetic_station(seed=4, ar_coef=0.7)
+    hw_index = index(
+        name="hot_days_and_nights",
+        min_duration=2,
+        components=[
+            index(var="tmax", fixed_thres=30),
+            index(var="tmin", fixed_thres=19),
+        ],
+    )
+
+    heatwaves = get_heatwaves(
+        filename,
+        hw_index,
+        summer_months=None,
+        max_missing_days_pct=100,
+        export=False,
+    )
+
+    data = pd.read_csv(filename, header=None, names=["y", "m", "d", "tmin", "tmax"])
+    data.index = pd.to_datetime(
+        data[["y", "m", "d"]].set_axis(["year", "month", "day"], axis=1)
+    )
+    data = data.asfreq("D")
+    hot = (data["tmax"] > 30) & (data["tmin"] > 19)
+    runs = (hot != hot.shift()).cumsum()[hot]
+    events = (
+        data[hot]
+        .groupby(runs)
+        .agg(
+            begin_date=("y", lambda days: days.index[0]),
+            duration=("y", "size"),
+            avg_tmax=("tmax", "mean"),
+            max_tmin=("tmin", "max"),
+        )
+    )
+    events = events[events["duration"] >= 2]
+
+    assert list(heatwaves.events.columns[-6:]) == [
+        "avg_tmax",
+        "std_tmax",
+        "max_tmax",
+        "avg_tmin",
+        "std_tmin",
+        "max_tmin",
+    ]
+    assert len(heatwaves.events) == len(events) > 0
+    assert list(heatwaves.events["begin_date"]) == list(events["begin_date"])
+    assert list(heatwaves.events["duration"]) == list(events["duration"])
+    assert np.allclose(heatwaves.events["avg_tmax"], events["avg_tmax"], atol=0.05)
+    assert list(heatwaves.events["max_tmin"]) == list(events["max_tmin"])
+
+
+def test_output_compound_index_shares_thresholds(tmp_path, synthetic_station):
+    filename = tmp_path / "station.csv"
+    synthetic_station(seed=4, ar_coef=0.7)
+    hw_indices = [index("compound90pct"), index("ctx90pct"), index("ctn90pct")]
+
+    heatwaves = get_heatwaves_indices(filename, hw_indices, export=False)
+
+    # Every day of a compound heat wave exceeds the thresholds of both indices
+    kwargs = dict(export=False, summer_months=(6, 7, 8))
+    days = {}
+    for name in ["ctx90pct", "ctn90pct", "compound90pct"]:
+        hw_index = index(name)
+        if name != "compound90pct":
+            hw_index.min_duration = 1
+        events = get_heatwaves(filename, hw_index, **kwargs).events
+        days[name] = set(
+            np.concatenate(
+                [
+                    pd.date_range(begin, end)
+                    for begin, end in zip(events["begin_date"], events["end_date"])
+                ]
+            )
+        )
+    assert days["compound90pct"]
+    assert days["compound90pct"] <= days["ctx90pct"] & days["ctn90pct"]
+    pd.testing.assert_frame_equal(
+        heatwaves["compound90pct"].events,
+        get_heatwaves(filename, index("compound90pct"), **kwargs).events,
+    )
+    assert heatwaves["compound90pct"].metrics["hwn"].sum() == len(
+        heatwaves["compound90pct"].events
+    )
+
+    with pytest.raises(ValueError):
+        monitor_heatwaves(filename, index("compound90pct"))
+
+
+def test_output_bootstrap_thresholds(tmp_path, synthetic_station):
+    filename = tmp_path / "station.csv"
+    synthetic_station(seed=4, ar_coef=0.7)
+    hw_index = index("tx90p")
+    kwargs = dict(ref_years=("1961-01-01", "1980-12-31"), export=False)
+
+    heatwaves = get_heatwaves(filename, hw_index, bootstrap=True, **kwargs)
+    target = get_heatwaves(filename, hw_index, **kwargs)
+
+    # Only the thresholds of the years of the reference period change
+    pd.testing.assert_frame_equal(
+        heatwaves.events.loc["1981":], target.events.loc["1981":]
+    )
+    in_base = heatwaves.metrics.loc[:1980, "hwf"]
+    assert not in_base.equals(target.metrics.loc[:1980, "hwf"])
+    # In-base years are no longer part of the sample of their own thresholds,
+    # which were biased upwards
+    assert in_base.mean() > target.metrics.loc[:1980, "hwf"].mean()
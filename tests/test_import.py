@@ -0,0 +1,42 @@
+import subprocess
+import sys
+
+import pytest
+
+import hotspell
+
+
+def _imported_modules(statement):
+    code = f"import sys; {statement}; print(' '.join(sys.modules))"
+    output = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return set(output.split())
+
+
+def test_import_is_lazy():
+    modules = _imported_modules("import hotspell")
+
+    assert "hotspell" in modules
+    assert not {"numpy", "pandas", "pkg_resources"} & modules
+
+
+def test_public_names():
+    from hotspell.heatwaves import get_heatwaves
+
+    assert hotspell.get_heatwaves is get_heatwaves
+    assert set(hotspell.__all__) <= set(dir(hotspell))
+    for name in hotspell.__all__:
+        assert getattr(hotspell, name).__module__.startswith("hotspell.")
+
+    with pytest.raises(AttributeError):
+        hotspell.heatwave
+
+
+def test_submodules_are_attributes():
+    modules = _imported_modules("import hotspell; hotspell.indices")
+
+    assert "hotspell.indices" in modules
+    assert "hotspell.heatwaves" not in modules
+    assert hotspell.heatwaves.get_heatwaves is hotspell.get_heatwaves
+    assert hotspell.indices.index is hotspell.index
@@ -0,0 +1,86 @@
+import pandas as pd
+import pytest
+
+from hotspell import incremental
+from hotspell.heatwaves import get_heatwaves
+from hotspell.incremental import monitor_heatwaves
+from hotspell.indices import index
+from hotspell.metrics import _count_missing_days
+
+
+@pytest.mark.parametrize(
+    "index_name, summer_months",
+    [("ctx90pct", (6, 7, 8)), ("summer_days", (6, 7, 8)), ("tx90p", (12, 1, 2))],
+)
+def test_updates_match_full_recompute(
+    tmp_path, synthetic_station, index_name, summer_months
+):
+    df = synthetic_station()
+    kwargs = dict(hw_index=index(name=index_name), summer_months=summer_months)
+    target = get_heatwaves(tmp_path / "station.csv", export=False, **kwargs)
+
+    history = df[df["year"] < 1995]
+    history.to_csv(tmp_path / "history.csv", header=False, index=False)
+    monitor = monitor_heatwaves(tmp_path / "history.csv", **kwargs)
+
+    new_days = df[df["year"] >= 1995].set_index(
+        pd.to_datetime(df[df["year"] >= 1995][["year", "month", "day"]])
+    )
+    splits = [0, 20, 200, 201, 1000, 1500, len(new_days)]
+    for start, stop in zip(splits[:-1], splits[1:]):
+        heatwaves = monitor.update(new_days.iloc[start:stop])
+
+    pd.testing.assert_frame_equal(heatwaves.events, target.events)
+    pd.testing.assert_frame_equal(heatwaves.metrics, target.metrics)
+
+
+def test_update_rejects_old_data(tmp_path, synthetic_station):
+    synthetic_station(last_year=1995, seed=1)
+    monitor = monitor_heatwaves(tmp_path / "station.csv", index(name="ctx90pct"))
+
+    with pytest.raises(ValueError):
+        monitor.update(pd.Series([30.0], index=pd.DatetimeIndex(["1995-12-31"])))
+
+
+def test_update_without_new_days(tmp_path, synthetic_station):
+    synthetic_station(last_year=1995, seed=1)
+    monitor = monitor_heatwaves(tmp_path / "station.csv", index(name="ctx90pct"))
+    previous = monitor.heatwaves
+    (tmp_path / "empty.csv").write_text("")
+
+    for data in [
+        pd.Series([], index=pd.DatetimeIndex([]), dtype=float),
+        pd.DataFrame({"tmax": []}, index=pd.DatetimeIndex([])),
+        tmp_path / "empty.csv",
+    ]:
+        assert monitor.update(data) is previous
+    assert monitor.last_date == pd.Timestamp("1995-12-31")
+
+
+def test_update_processes_only_new_days(tmp_path, synthetic_station, monkeypatch):
+    synthetic_station(last_year=1995, seed=2)
+    monitor = monitor_heatwaves(tmp_path / "station.csv", index(name="ctx90pct"))
+    previous = monitor.heatwaves
+    previous_events = previous.events.copy()
+
+    counted = []
+
+    def count_missing_days(timeseries, summer_months):
+        counted.append(len(timeseries))
+        return _count_missing_days(timeseries, summer_months)
+
+    monkeypatch.setattr(incremental, "_count_missing_days", count_missing_days)
+    new_days = pd.Series(
+        [45.0] * 10, index=pd.date_range("1996-07-01", periods=10, freq="D")
+    )
+    monitor.update(new_days.iloc[:5])
+    heatwaves = monitor.update(new_days.iloc[5:])
+
+    # Only the days of the last update are counted
+    assert counted[-1] == 5
+    assert len(heatwaves.events) == len(previous_events) + 1
+    assert heatwaves.events["duration"].iloc[-1] == 10
+    pd.testing.assert_frame_equal(previous.events, previous_events)
+    pd.testing.assert_frame_equal(
+        heatwaves.events.iloc[:-1], previous_events, check_freq=False
+    )
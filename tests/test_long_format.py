@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from hotspell.export import read_dataset
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+from hotspell.long_format import get_heatwaves_long
+from hotspell.utils import _import_long_data
+
+STATIONS = ["athens", "madrid", "rome"]
+
+
+@pytest.fixture
+def long_data(synthetic_station):
+    frames = []
+    for seed, station in enumerate(STATIONS):
+        df = synthetic_station(
+            station, first_year=1955, last_year=2004, seed=seed, missing_pct=0
+        )
+        frames.append(df.assign(station=station))
+    df = pd.concat(frames, ignore_index=True)
+    return df[["station", "year", "month", "day", "tmin", "tmax"]]
+
+
+def _assert_same_as_get_heatwaves(output, folder, hw_index):
+    for station in STATIONS:
+        expected = get_heatwaves(folder / f"{station}.csv", hw_index, export=False)
+        pd.testing.assert_frame_equal(output.events.loc[station], expected.events)
+        pd.testing.assert_frame_equal(output.metrics.loc[station], expected.metrics)
+
+
+def test_get_heatwaves_long(tmp_path, long_data):
+    hw_index = index("ctx90pct")
+    long_data.to_csv(tmp_path / "stations.csv", header=False, index=False)
+
+    output = get_heatwaves_long(tmp_path / "stations.csv", hw_index)
+
+    assert output.events.index.get_level_values("station").unique().tolist() == (
+        STATIONS
+    )
+    _assert_same_as_get_heatwaves(output, tmp_path, hw_index)
+
+
+def test_get_heatwaves_long_interleaved(tmp_path, long_data):
+    hw_index = index("ctx90pct")
+    # Interleave the stations while keeping the days of each in order
+    interleaved = long_data.sort_values(["year", "month", "day"], kind="stable")
+
+    output = get_heatwaves_long(
+        interleaved, hw_index, n_jobs=2, dataset_dir=tmp_path / "dataset"
+    )
+
+    _assert_same_as_get_heatwaves(output, tmp_path, hw_index)
+    assert read_dataset(tmp_path / "dataset").index.unique("station").tolist() == (
+        sorted(STATIONS)
+    )
+
+
+def test_import_long_data(long_data):
+    station_ids, starts, timeseries = _import_long_data(long_data.iloc[::-1], ["tmax"])
+
+    assert station_ids == STATIONS[::-1]
+    assert starts[0] == 0 and starts[-1] == len(long_data)
+    assert list(timeseries.columns) == ["tmax"]
+
+    with pytest.raises(ValueError):
+        _import_long_data(long_data.iloc[:0], ["tmax"])
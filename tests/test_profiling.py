@@ -0,0 +1,40 @@
+from importlib.resources import files
+
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+from hotspell.profiling import Profile
+
+
+def test_profile_stages():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    kwargs = dict(
+        hw_index=index(name="test_index"),
+        ref_years=("1970-01-01", "1971-12-31"),
+        export=False,
+    )
+
+    assert get_heatwaves(filename, **kwargs).profile is None
+
+    stages = []
+    heatwaves = get_heatwaves(
+        filename, profile=lambda record: stages.append(record["stage"]), **kwargs
+    )
+    assert stages == [
+        "import",
+        "thresholds",
+        "add_thresholds",
+        "find_heatwaves",
+        "metrics",
+    ]
+    records = heatwaves.profile.to_frame()
+    assert list(records["stage"]) == stages
+    assert records["rows"].iloc[0] == 20
+    assert (records["seconds"] > 0).all()
+    assert (records["peak_memory"] > 0).all()
+
+    profile = Profile(memory=False)
+    for _ in range(2):
+        get_heatwaves(filename, profile=profile, **kwargs)
+    summary = profile.summary()
+    assert list(summary.index) == stages
+    assert (summary["count"] == 2).all()
@@ -0,0 +1,82 @@
+from importlib.resources import files
+
+import numpy as np
+import pytest
+
+from hotspell.heatwaves import (
+    _compute_daily_thresholds,
+    _extend_plus_minus_one_month,
+)
+from hotspell.indices import index
+from hotspell.quantiles import QuantileIndex, _build_quantile_indices
+from hotspell.thresholds import (
+    _compute_percentile_thresholds,
+    _create_daily_windows,
+    _summer_days_mask,
+)
+from hotspell.utils import _import_data
+
+
+def _ref_array(decimals):
+    rng = np.random.default_rng(21)
+    ref_array = np.round(rng.normal(25, 5, size=(10, 366, 2)), decimals)
+    ref_array[rng.random(ref_array.shape) < 0.1] = np.nan
+    ref_array[:, 59] = np.nan  # February 29 of the common years
+    ref_array[:, 100:110] = np.nan  # days without values
+    return ref_array
+
+
+@pytest.mark.parametrize("decimals", [1, 8])
+def test_thresholds_match_percentile_thresholds(decimals):
+    ref_array = _ref_array(decimals)
+    window_indices = _create_daily_windows(15)
+    days_mask = _summer_days_mask((5, 6, 7, 8, 9))
+
+    quantile_indices = _build_quantile_indices(ref_array, window_indices, days_mask)
+
+    assert len(quantile_indices) == 2
+    for pct in [0, 10, 33.3, 50, 90, 97.5, 100]:
+        expected = _compute_percentile_thresholds(
+            ref_array, window_indices, pct, days_mask
+        )
+        for variable, quantile_index in enumerate(quantile_indices):
+            np.testing.assert_array_equal(
+                quantile_index.thresholds(pct), expected[:, variable]
+            )
+
+
+def test_values_are_stored_in_single_precision():
+    rounded, unrounded = (
+        _build_quantile_indices(
+            _ref_array(decimals),
+            _create_daily_windows(15),
+            _summer_days_mask((5, 6, 7, 8, 9)),
+        )[0]
+        for decimals in [1, 8]
+    )
+
+    assert rounded.values.dtype == np.float32
+    assert unrounded.values.dtype == np.float64
+    assert len(rounded.offsets) == 367
+    np.testing.assert_array_equal(rounded.counts, unrounded.counts)
+    assert rounded.nbytes < unrounded.nbytes
+    with pytest.raises(ValueError):
+        rounded.thresholds(101)
+
+
+def test_from_file():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+    ref_years = ("1970-01-01", "1971-12-31")
+    summer_months = _extend_plus_minus_one_month((6, 7, 8))
+    timeseries = _import_data(filename, "tmax")
+
+    quantile_index = QuantileIndex.from_file(filename, "tmax", ref_years)
+
+    for pct in [90, 95]:
+        expected = _compute_daily_thresholds(
+            daily_windows=_create_daily_windows(15),
+            timeseries_ref_period=timeseries.loc[ref_years[0] : ref_years[-1]],
+            hw_index=index(name="custom", var="tmax", pct=pct),
+            summer_months=summer_months,
+        )
+        np.testing.assert_array_equal(quantile_index.thresholds(pct), expected)
@@ -0,0 +1,28 @@
+import numpy as np
+import pandas as pd
+
+from hotspell.runs import _find_runs, _run_statistics
+
+
+def test_find_runs():
+    mask = np.array([True, True, False, False, True, False, True, True, True])
+
+    begins, durations = _find_runs(mask)
+
+    assert begins.tolist() == [0, 4, 6]
+    assert durations.tolist() == [2, 1, 3]
+
+
+def test_run_statistics_match_pandas():
+    rng = np.random.default_rng(0)
+    values = np.round(rng.normal(30, 5, 5000), 1)
+    begins, durations = _find_runs(values > 32)
+
+    mean, std, maximum = _run_statistics(values, begins, durations)
+
+    groups = np.repeat(np.arange(len(begins)), durations)
+    days = np.concatenate([np.arange(b, b + d) for b, d in zip(begins, durations)])
+    target = pd.Series(values[days]).groupby(groups)
+    assert np.array_equal(mean, target.mean().values) is True
+    assert np.array_equal(std, target.std().values, equal_nan=True) is True
+    assert np.array_equal(maximum, target.max().values) is True
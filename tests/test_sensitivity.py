@@ -0,0 +1,81 @@
+import itertools
+from importlib.resources import files
+
+import pandas as pd
+import pytest
+
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+from hotspell.sensitivity import get_heatwaves_sensitivity
+
+
+@pytest.mark.parametrize(
+    "dataset, summer_months",
+    [("test_input.csv", (6, 7, 8)), ("test_input_southern_hem.csv", (12, 1, 2))],
+)
+def test_sweep_matches_get_heatwaves(dataset, summer_months):
+    filename = str(files("hotspell") / "datasets" / dataset)
+    ref_years = ("1970-01-01", "1971-12-31")
+    pcts, min_durations, window_lengths = [85, 92.5, 99], [1, 3, 5], [1, 15]
+
+    sweep = get_heatwaves_sensitivity(
+        filename,
+        "tmax",
+        pct=pcts,
+        min_duration=min_durations,
+        window_length=window_lengths,
+        ref_years=ref_years,
+        summer_months=summer_months,
+    )
+
+    assert list(sweep.columns[:4]) == ["pct", "window_length", "min_duration", "year"]
+    for pct, window_length, min_duration in itertools.product(
+        pcts, window_lengths, min_durations
+    ):
+        hw_index = index(
+            name="custom",
+            var="tmax",
+            pct=pct,
+            min_duration=min_duration,
+            window_length=window_length,
+        )
+        expected = get_heatwaves(
+            filename,
+            hw_index,
+            ref_years=ref_years,
+            summer_months=summer_months,
+            export=False,
+        ).metrics
+        rows = (
+            (sweep["pct"] == pct)
+            & (sweep["window_length"] == window_length)
+            & (sweep["min_duration"] == min_duration)
+        )
+        output = sweep.loc[rows, ["year", *expected.columns]].set_index("year")
+        pd.testing.assert_frame_equal(output, expected, check_index_type=False)
+
+
+def test_sweep_with_single_values_and_some_metrics():
+    filename = str(files("hotspell") / "datasets" / "test_input.csv")
+
+    sweep = get_heatwaves_sensitivity(
+        filename,
+        "tmin",
+        pct=90,
+        min_duration=3,
+        window_length=15,
+        ref_years=("1970-01-01", "1971-12-31"),
+        metrics=["hwn", "hwf"],
+    )
+
+    assert list(sweep.columns) == [
+        "pct",
+        "window_length",
+        "min_duration",
+        "year",
+        "hwn",
+        "hwf",
+    ]
+    assert set(sweep["pct"]) == {90}
+    with pytest.raises(ValueError):
+        get_heatwaves_sensitivity(filename, "tmin", pct=[])
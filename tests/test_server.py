@@ -0,0 +1,150 @@
+import asyncio
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+import hotspell.server
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+from hotspell.server import HeatWaveServer
+
+REF_YEARS = ("1970-01-01", "1971-12-31")
+
+
+async def _get(address, target):
+    if isinstance(address, str):
+        reader, writer = await asyncio.open_unix_connection(address)
+    else:
+        reader, writer = await asyncio.open_connection(*address)
+    writer.write(f"GET {target} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, body = response.split(b"\r\n\r\n", 1)
+    return int(head.split()[1]), json.loads(body)
+
+
+def _query(station_dir, targets, path=None, before=None):
+    async def main():
+        server = HeatWaveServer(station_dir, ref_years=REF_YEARS, n_workers=2)
+        address = await server.start(path=path)
+        try:
+            responses = await asyncio.gather(
+                *(_get(address, target) for target in targets)
+            )
+            if before is not None:
+                before()
+                responses += [await _get(address, target) for target in targets]
+        finally:
+            await server.close()
+        return responses, server.stats()
+
+    return asyncio.run(main())
+
+
+def test_events_and_metrics(station_dir):
+    expected = get_heatwaves(
+        str(station_dir / "athens.csv"),
+        index("ctx90pct"),
+        ref_years=REF_YEARS,
+        export=False,
+    )
+    query = "station=athens&index=ctx90pct"
+
+    responses, stats = _query(
+        station_dir,
+        [
+            "/stations",
+            f"/events?{query}",
+            f"/metrics?{query}",
+            f"/events?{query}&start=1971-01-01&end=1971-12-31",
+        ],
+    )
+
+    assert responses[0] == (200, ["athens", "sydney"])
+    status, events = responses[1]
+    assert status == 200
+    events = pd.DataFrame(events)
+    assert (
+        events["begin_date"].tolist()
+        == expected.events["begin_date"].dt.strftime("%Y-%m-%d").tolist()
+    )
+    assert events["avg_tmax"].tolist() == expected.events["avg_tmax"].tolist()
+    status, metrics = responses[2]
+    assert [row["year"] for row in metrics] == expected.metrics.index.tolist()
+    status, events_1971 = responses[3]
+    assert {event["begin_date"][:4] for event in events_1971} <= {"1971"}
+    # The simultaneous queries of the same index share a single detection
+    assert stats["results"]["entries"] == 1
+    assert stats["stations"]["misses"] == 1
+    assert stats["thresholds"]["entries"] == 1
+
+
+def test_custom_index_and_errors(station_dir):
+    responses, _ = _query(
+        station_dir,
+        [
+            "/events?station=athens&index=hw95&var=tmin&pct=95&min_duration=2",
+            "/events?station=madrid&index=ctx90pct",
+            "/events?station=athens&index=unknown",
+            "/events?station=athens&index=ctx90pct&pct=95",
+            "/events?station=athens&index=ctx90pct&start=never",
+            "/unknown",
+        ],
+    )
+
+    assert [status for status, _ in responses] == [200, 404, 400, 400, 400, 404]
+    assert all("error" in body for _, body in responses[1:])
+
+
+def test_station_listing_is_cached(station_dir, monkeypatch):
+    listings = []
+    list_station_files = hotspell.server._list_station_files
+
+    def counting_list_station_files(station_dir):
+        listings.append(station_dir)
+        return list_station_files(station_dir)
+
+    monkeypatch.setattr(
+        hotspell.server, "_list_station_files", counting_list_station_files
+    )
+    targets = [
+        "/stations",
+        "/metrics?station=athens&index=ctx90pct",
+        "/metrics?station=madrid&index=ctx90pct",
+    ]
+
+    def rename_athens():
+        (station_dir / "athens.csv").rename(station_dir / "madrid.csv")
+
+    responses, _ = _query(station_dir, targets, before=rename_athens)
+
+    assert [status for status, _ in responses] == [200, 200, 404, 200, 404, 200]
+    # The folder is listed once, then again for the unknown station and for
+    # the station whose file is gone, which finds the new station too
+    assert len(listings) == 3
+
+
+def test_detection_errors(station_dir, monkeypatch):
+    def failing_detection(*args, **kwargs):
+        raise KeyError("tmax")
+
+    monkeypatch.setattr(hotspell.server, "_get_heatwaves_from_data", failing_detection)
+
+    responses, _ = _query(
+        station_dir,
+        ["/events?station=athens&index=ctx90pct", "/events?index=ctx90pct"],
+    )
+
+    assert [status for status, _ in responses] == [500, 400]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="requires Unix sockets")
+def test_unix_socket(station_dir, tmp_path):
+    responses, _ = _query(
+        station_dir, ["/stations"], path=str(tmp_path / "hotspell.sock")
+    )
+
+    assert responses == [(200, ["athens", "sydney"])]
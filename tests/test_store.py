@@ -0,0 +1,74 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspell.heatwaves import get_heatwaves_many
+from hotspell.indices import index
+from hotspell.store import StationStore, create_store, get_heatwaves_store
+from hotspell.utils import _import_data
+
+REF_YEARS = ("1970-01-01", "1971-12-31")
+
+
+def test_read_stations(station_dir, tmp_path):
+    # Values with more than one decimal are stored in double precision
+    df = pd.read_csv(station_dir / "athens.csv", header=None)
+    df[4] = df[4] + 0.01234
+    df.to_csv(station_dir / "rome.csv", header=False, index=False)
+
+    store = create_store(tmp_path / "stations.hss", station_dir)
+
+    assert store.station_ids == ["athens", "rome", "sydney"]
+    for station_id in store.station_ids:
+        filename = station_dir / f"{station_id}.csv"
+        for var in ["tmax", ["tmin", "tmax"]]:
+            pd.testing.assert_frame_equal(
+                store.read(station_id, var), _import_data(filename, var)
+            )
+    arrays = store.arrays("athens")
+    assert [array.dtype for array in arrays.values()] == [
+        np.int32,
+        np.float32,
+        np.float32,
+    ]
+    assert not arrays["tmax"].flags.writeable
+    assert store.arrays("rome")["tmax"].dtype == np.float64
+    with pytest.raises(KeyError):
+        store.read("madrid")
+
+
+def test_long_format_store(station_dir, tmp_path):
+    frames = [
+        pd.read_csv(station_dir / f"{station}.csv", header=None).assign(station=station)
+        for station in ["sydney", "athens"]
+    ]
+    long_data = pd.concat(frames)[["station", 0, 1, 2, 3, 4]]
+    long_data.columns = ["station", "year", "month", "day", "tmin", "tmax"]
+
+    store = create_store(tmp_path / "stations.hss", long_data=long_data)
+
+    assert store.station_ids == ["sydney", "athens"]
+    pd.testing.assert_frame_equal(
+        store.read("athens"), _import_data(station_dir / "athens.csv", ["tmin", "tmax"])
+    )
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_get_heatwaves_store(station_dir, tmp_path, n_jobs):
+    create_store(tmp_path / "stations.hss", station_dir)
+    hw_index = index("compound90pct")
+
+    output = get_heatwaves_store(
+        tmp_path / "stations.hss", hw_index, ref_years=REF_YEARS, n_jobs=n_jobs
+    )
+
+    expected = get_heatwaves_many(station_dir, hw_index, ref_years=REF_YEARS)
+    pd.testing.assert_frame_equal(output.events, expected.events)
+    pd.testing.assert_frame_equal(output.metrics, expected.metrics)
+
+
+def test_invalid_store(tmp_path):
+    (tmp_path / "stations.hss").write_bytes(b"year,month,day,tmin,tmax\n" * 4)
+
+    with pytest.raises(ValueError):
+        StationStore(tmp_path / "stations.hss")
@@ -0,0 +1,105 @@
+import pandas as pd
+import pytest
+
+from hotspell.heatwaves import get_heatwaves
+from hotspell.indices import index
+from hotspell.streaming import get_heatwaves_streaming
+from hotspell.utils import _import_data, _iter_data, _iter_station_data
+
+
+def test_iter_data(tmp_path, synthetic_station):
+    synthetic_station(first_year=1955, last_year=2004)
+
+    chunks = list(_iter_data(tmp_path / "station.csv", "tmax", 7, chunk_rows=1000))
+
+    assert [chunk.index.year[0] for chunk in chunks] == list(range(1955, 2005, 7))
+    pd.testing.assert_frame_equal(
+        pd.concat(chunks), _import_data(tmp_path / "station.csv", "tmax")
+    )
+
+    chunks = _iter_data(tmp_path / "station.csv", "tmax", 7, years=(1970, 1975))
+    assert [chunk.index.year[0] for chunk in chunks] == [1969]
+
+
+@pytest.mark.parametrize(
+    "index_name, summer_months, chunk_years",
+    [
+        ("ctx90pct", (6, 7, 8), 1),
+        ("summer_days", (6, 7, 8), 4),
+        ("tx90p", (12, 1, 2), 3),
+        ("tx90p", None, 10),
+    ],
+)
+def test_streaming_matches_get_heatwaves(
+    tmp_path, synthetic_station, index_name, summer_months, chunk_years
+):
+    synthetic_station(first_year=1955, last_year=2004, seed=1)
+    kwargs = dict(hw_index=index(name=index_name), summer_months=summer_months)
+
+    heatwaves = get_heatwaves_streaming(
+        tmp_path / "station.csv", chunk_years=chunk_years, **kwargs
+    )
+    target = get_heatwaves(tmp_path / "station.csv", export=False, **kwargs)
+
+    pd.testing.assert_frame_equal(heatwaves.events, target.events)
+    pd.testing.assert_frame_equal(heatwaves.metrics, target.metrics)
+
+
+def _write_archive(tmp_path, synthetic_station, layout):
+    """Write two stations to a single file and return the files of each."""
+    filenames = {"athens": tmp_path / "athens.csv", "rome": tmp_path / "rome.csv"}
+    synthetic_station("athens", first_year=1955, last_year=2004, seed=1)
+    synthetic_station("rome", last_year=1995, seed=2)
+    with open(tmp_path / "archive.csv", "w") as archive:
+        for station, filename in filenames.items():
+            for line in filename.read_text().splitlines():
+                prefix = f"{station}," if layout == "long" else ""
+                archive.write(f"{prefix}{line}\n")
+    return filenames
+
+
+@pytest.mark.parametrize("layout", ["long", "concatenated"])
+def test_iter_station_data(tmp_path, synthetic_station, layout):
+    filenames = _write_archive(tmp_path, synthetic_station, layout)
+
+    chunks = list(
+        _iter_station_data(
+            tmp_path / "archive.csv", "tmax", 7, chunk_rows=1000, layout=layout
+        )
+    )
+
+    station_ids = ["athens", "rome"] if layout == "long" else [0, 1]
+    assert list(dict.fromkeys(station for station, _ in chunks)) == station_ids
+    for station, filename in zip(station_ids, filenames.values()):
+        pd.testing.assert_frame_equal(
+            pd.concat([chunk for key, chunk in chunks if key == station]),
+            _import_data(filename, "tmax"),
+        )
+
+
+@pytest.mark.parametrize("layout", ["long", "concatenated"])
+def test_streaming_many_stations(tmp_path, synthetic_station, layout):
+    filenames = _write_archive(tmp_path, synthetic_station, layout)
+    kwargs = dict(hw_index=index(name="ctx90pct"), summer_months=(6, 7, 8))
+
+    heatwaves = get_heatwaves_streaming(
+        tmp_path / "archive.csv", chunk_years=3, layout=layout, **kwargs
+    )
+
+    station_ids = ["athens", "rome"] if layout == "long" else [0, 1]
+    assert heatwaves.events.index.unique("station").tolist() == station_ids
+    for station, filename in zip(station_ids, filenames.values()):
+        target = get_heatwaves(filename, export=False, **kwargs)
+        pd.testing.assert_frame_equal(heatwaves.events.loc[station], target.events)
+        pd.testing.assert_frame_equal(heatwaves.metrics.loc[station], target.metrics)
+
+
+def test_streaming_rejects_split_stations(tmp_path, synthetic_station):
+    _write_archive(tmp_path, synthetic_station, "long")
+    lines = (tmp_path / "archive.csv").read_text().splitlines()
+    (tmp_path / "archive.csv").write_text("\n".join([*lines, lines[0]]) + "\n")
+
+    with pytest.raises(ValueError, match="contiguous"):
+        get_heatwaves_streaming(
+            tmp_path / "archive.csv", index(name="ctx90pct"), layout="long"
+        )
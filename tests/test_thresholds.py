@@ -0,0 +1,160 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspell.heatwaves import (
+    _add_threshold_to_timeseries,
+    _compute_daily_thresholds,
+    _compute_daily_thresholds_many,
+)
+from hotspell.indices import index
+from hotspell.thresholds import (
+    _compute_bootstrap_thresholds,
+    _compute_percentile_thresholds,
+    _create_daily_windows,
+    _nanpercentile_rows,
+    _reference_matrix,
+    _summer_days_mask,
+)
+
+
+def _string_daily_windows(window_length):
+    days = pd.date_range("1972-01-01", freq="D", periods=366)
+    offset = pd.Timedelta(days=window_length // 2)
+    return pd.Series(
+        [
+            pd.date_range(day - offset, day + offset).strftime("%m-%d").tolist()
+            for day in days
+        ],
+        index=days,
+    )
+
+
+@pytest.mark.parametrize("window_length", [1, 3, 4, 15, 31])
+def test_daily_windows(window_length):
+    daily_windows = _create_daily_windows(window_length)
+    positions = {day: i for i, day in enumerate(_string_daily_windows(1).str[0])}
+    target = [
+        [positions[day] for day in window]
+        for window in _string_daily_windows(window_length)
+    ]
+
+    assert daily_windows.dtype == np.int16
+    assert np.array_equal(daily_windows, target) is True
+
+
+def test_nanpercentile_rows():
+    rng = np.random.default_rng(0)
+    values = rng.normal(25, 5, size=(50, 40))
+    values[rng.random(values.shape) < 0.3] = np.nan
+    values[0] = np.nan
+
+    result = _nanpercentile_rows(values, 90)
+    with pytest.warns(RuntimeWarning, match="All-NaN slice"):
+        target = np.array([np.nanpercentile(row, 90) for row in values])
+
+    assert np.array_equal(result, target, equal_nan=True) is True
+
+
+def test_percentile_thresholds_match_string_windows():
+    rng = np.random.default_rng(1)
+    dates = pd.date_range("1961-01-01", "1990-12-31", freq="D")
+    timeseries = pd.DataFrame({"var": rng.normal(25, 5, len(dates))}, index=dates)
+    timeseries = timeseries.sample(frac=0.9, random_state=1).sort_index()
+
+    summer_months = (5, 6, 7, 8, 9)
+    thresholds = _compute_percentile_thresholds(
+        ref_matrix=_reference_matrix(timeseries),
+        window_indices=_create_daily_windows(15),
+        pct=90,
+        days_mask=_summer_days_mask(summer_months),
+    )
+
+    by_day = timeseries.set_index(timeseries.index.strftime("%m-%d"))["var"]
+    target = [
+        (
+            np.nanpercentile(by_day[by_day.index.isin(window)].values, 90)
+            if day.month in summer_months
+            else np.nan
+        )
+        for day, window in _string_daily_windows(15).items()
+    ]
+
+    assert np.array_equal(thresholds, target, equal_nan=True) is True
+
+
+def test_add_threshold_matches_string_merge():
+    rng = np.random.default_rng(2)
+    dates = pd.date_range("1995-11-01", "2001-03-31", freq="D", name="index")
+    timeseries = pd.DataFrame({"var": rng.normal(25, 5, len(dates))}, index=dates)
+    timeseries = timeseries.sample(frac=0.8, random_state=2).sort_index()
+    daily_thresholds = rng.normal(30, 3, 366)
+
+    result = _add_threshold_to_timeseries(timeseries, daily_thresholds)
+
+    target = timeseries.asfreq("D")
+    thresholds = pd.Series(
+        daily_thresholds,
+        index=pd.date_range("1972-01-01", freq="D", periods=366).strftime("%m-%d"),
+    )
+    target["threshold"] = thresholds.loc[target.index.strftime("%m-%d")].values
+    pd.testing.assert_frame_equal(result, target)
+
+
+def test_thresholds_of_both_variables_in_one_pass():
+    rng = np.random.default_rng(3)
+    dates = pd.date_range("1961-01-01", "1990-12-31", freq="D", name="index")
+    tmax = rng.normal(30, 4, len(dates))
+    tmax[rng.random(len(dates)) < 0.05] = np.nan
+    data = pd.DataFrame({"tmax": tmax, "tmin": tmax - rng.normal(10, 2, len(dates))})
+    data = data.set_index(dates).sample(frac=0.95, random_state=3).sort_index()
+    hw_indices = [
+        index(var="tmax", pct=90, window_length=15),
+        index(var="tmin", pct=90, window_length=15),
+        index(var="tmin", pct=95, window_length=5),
+        index(var="tmax", fixed_thres=35),
+    ]
+    summer_months = (5, 6, 7, 8, 9)
+
+    result = _compute_daily_thresholds_many(data, hw_indices, summer_months)
+
+    for hw_index, thresholds in zip(hw_indices, result):
+        target = _compute_daily_thresholds(
+            daily_windows=_create_daily_windows(hw_index.window_length),
+            timeseries_ref_period=data[[hw_index.var]].rename(
+                columns={hw_index.var: "var"}
+            ),
+            hw_index=hw_index,
+            summer_months=summer_months,
+        )
+        assert np.array_equal(thresholds, target, equal_nan=True) is True
+
+
+def test_bootstrap_thresholds_match_resampled_periods():
+    rng = np.random.default_rng(5)
+    ref_matrix = np.round(rng.normal(25, 4, (6, 366)), 1)
+    ref_matrix[rng.random(ref_matrix.shape) < 0.05] = np.nan
+    ref_matrix[2, 150:170] = np.nan
+    window_indices = _create_daily_windows(5)
+    days_mask = _summer_days_mask((5, 6, 7, 8, 9))
+
+    thresholds = _compute_bootstrap_thresholds(
+        ref_matrix, window_indices, 90, days_mask
+    )
+
+    target = np.full((6, 366), np.nan)
+    for day in np.flatnonzero(days_mask):
+        values = ref_matrix[:, window_indices[day]]
+        for year in range(6):
+            others = np.delete(values, year, axis=0)
+            target[year, day] = np.mean(
+                [
+                    np.nanpercentile(np.concatenate([others.ravel(), values[k]]), 90)
+                    for k in range(6)
+                    if k != year
+                ]
+            )
+    assert np.allclose(thresholds, target, equal_nan=True)
+
+    with pytest.raises(ValueError):
+        _compute_bootstrap_thresholds(ref_matrix[:1], window_indices, 90, days_mask)
@@ -0,0 +1,18 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from hotspell.utils import _dates_from_components
+
+
+def test_dates_from_components():
+    dates = pd.date_range("1799-12-25", "2101-03-05", freq="D")
+
+    result = _dates_from_components(dates.year, dates.month, dates.day)
+
+    assert np.array_equal(result.values, dates.values.astype(result.dtype)) is True
+
+
+def test_dates_from_components_invalid_date():
+    with pytest.raises(ValueError, match="1999-2-29"):
+        _dates_from_components([1999, 1999], [2, 2], [28, 29])